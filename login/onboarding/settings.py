@@ -82,6 +82,25 @@ DATABASES = {
 
 AUTH_USER_MODEL = "users.User"
 
+# Argon2id first; older PBKDF2 hashes still verify and are rehashed on the next login
+PASSWORD_HASHERS = [
+    "users.hashers.TunedArgon2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2PasswordHasher",
+    "django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher",
+    "django.contrib.auth.hashers.BCryptSHA256PasswordHasher",
+    "django.contrib.auth.hashers.ScryptPasswordHasher",
+]
+
+PASSWORD_HASHING = {
+    # OWASP baseline for Argon2id: 19 MiB, 2 iterations, 1 lane
+    "ARGON2_TIME_COST": 2,
+    "ARGON2_MEMORY_COST": 19456,  # KiB
+    "ARGON2_PARALLELISM": 1,
+    "WORKERS": os.cpu_count() or 2,  # Concurrent hashes per process
+    "MAX_PENDING": 64,  # Logins allowed to wait for a hashing slot before answering 503
+    "WAIT_TIMEOUT": 5,  # Seconds
+}
+
 # REST Framework Configuration
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
@@ -120,6 +139,19 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
+# User claims embedded in access tokens (see users/claims.py)
+USER_CLAIMS = {
+    'EMBED': True,  # Add email and names to tokens issued at login
+    'FRESH_TTL': 30,  # Seconds is_active is cached for claims-authenticated requests
+}
+
+# Service-to-service tokens accepted on the token validation and revocation endpoints
+SERVICE_TOKENS = [
+    'posts_service_secret_token_123',
+    'internal_service_token_456',
+]
+TOKEN_VALIDATION_MAX_BATCH = 500
+
 # Email Configuration
 EMAIL_BACKEND = 'django.core.mail.backends.smtp.EmailBackend'
 EMAIL_HOST = 'smtp.gmail.com'  # You can change this to your email provider
@@ -129,5 +161,38 @@ EMAIL_HOST_USER = 'charanvenkatareddy678@gmail.com'  # Replace with your actual
 EMAIL_HOST_PASSWORD = 'byky kcch etkj kxdw'  # Replace with your app password
 DEFAULT_FROM_EMAIL = 'charanvenkatareddy678@gmail.com'  # Replace with your actual email
 
+# Rate limits applied before any hashing, database or email work (see users/ratelimit.py)
+RATE_LIMITS = {
+    'ENABLED': True,
+    'STORE': 'users.ratelimit.LocalRateLimitStore',  # users.ratelimit.CacheRateLimitStore with a shared cache for several workers
+    'TRUST_X_FORWARDED_FOR': False,  # Enable only behind a proxy that sets the header
+    'RULES': {
+        # scope: [(key, limit, period in seconds), ...]
+        'login': [('ip', 30, 60), ('email', 10, 5 * 60)],
+        'verification': [('ip', 10, 60 * 60), ('email', 3, 10 * 60)],
+    },
+}
+
+# Email verification codes (see users/verification.py)
+VERIFICATION_CODES = {
+    'BACKEND': 'users.verification.DatabaseCodeStore',  # or users.verification.CacheCodeStore with a shared cache
+    'TTL': 10 * 60,  # Seconds a code stays valid
+    'SWEEP_INTERVAL': 5 * 60,  # Seconds between expired-code sweeps (database backend)
+    'SWEEP_BATCH_SIZE': 1000,
+}
+
+# Outgoing email queue (see users/mailer.py)
+MAIL_QUEUE = {
+    'RUN_IN_PROCESS': True,  # Start dispatcher threads in the web process; set False when running send_queued_emails
+    'WORKERS': 2,
+    'BATCH_SIZE': 20,  # Emails sent per SMTP connection round
+    'POLL_INTERVAL': 5,  # Seconds between queue checks when idle
+    'MAX_ATTEMPTS': 5,
+    'RETRY_BASE_DELAY': 30,  # Seconds; doubles with every failed attempt
+    'RETRY_MAX_DELAY': 60 * 60,
+    'CLAIM_TIMEOUT': 5 * 60,  # Reclaim emails left "sending" by a crashed worker
+    'BACKEND': None,  # Defaults to EMAIL_BACKEND; use the locmem or file backend in tests
+}
+
 STATIC_URL = "static/"
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
\ No newline at end of file
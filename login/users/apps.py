@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'users'
+
+    def ready(self):
+        from .emails import verification_email
+
+        # Compile the verification email once at startup instead of on the first signup
+        verification_email.compile()
@@ -0,0 +1,43 @@
+from django.utils.functional import cached_property
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+
+from .claims import USER_CLAIMS, get_fresh_user_fields
+
+
+class ClaimsUser(TokenUser):
+    """User built from access token claims; only is_active comes from the (cached) database"""
+
+    @cached_property
+    def id(self):
+        return int(self.token[api_settings.USER_ID_CLAIM])
+
+    @cached_property
+    def fresh_fields(self):
+        return get_fresh_user_fields(self.id)
+
+    @property
+    def is_active(self):
+        return bool(self.fresh_fields and self.fresh_fields['is_active'])
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication for read-only endpoints that serves the user from
+    token claims instead of loading the user row on every request.
+
+    Tokens issued before claims were embedded fall back to the database lookup.
+    """
+
+    def get_user(self, validated_token):
+        if not all(claim in validated_token for claim in USER_CLAIMS):
+            return super().get_user(validated_token)
+
+        user = ClaimsUser(validated_token)
+        if user.fresh_fields is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
@@ -0,0 +1,54 @@
+"""
+User Claims in Access Tokens
+
+Access tokens issued by `LoginView` carry the user's stable profile fields
+(email and name) as claims, so read-only endpoints can answer from the token
+without loading the user row (see users.authentication.ClaimsJWTAuthentication).
+
+Fields that must reflect changes quickly (`is_active`) are not trusted from the
+token. They are read through a short-lived cache (`USER_CLAIMS['FRESH_TTL']`
+seconds) that `User.save` invalidates.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import RefreshToken
+
+USER_CLAIMS = ('email', 'first_name', 'last_name')
+
+
+def user_claims_config():
+    return {
+        'EMBED': True,
+        'FRESH_TTL': 30,
+        **getattr(settings, 'USER_CLAIMS', {}),
+    }
+
+
+def tokens_for_user(user):
+    """Refresh token for a user; its access tokens inherit the embedded claims"""
+    refresh = RefreshToken.for_user(user)
+    if user_claims_config()['EMBED']:
+        for claim in USER_CLAIMS:
+            refresh[claim] = getattr(user, claim)
+    return refresh
+
+
+def fresh_user_key(user_id):
+    return f'user:fresh:{user_id}'
+
+
+def get_fresh_user_fields(user_id):
+    """Fields that must not be served from token claims, or None if the user is gone"""
+    key = fresh_user_key(user_id)
+    fields = cache.get(key)
+    if fields is None:
+        from .models import User
+
+        fields = User.objects.filter(id=user_id).values('is_active').first() or {}
+        cache.set(key, fields, timeout=user_claims_config()['FRESH_TTL'])
+    return fields or None
+
+
+def invalidate_fresh_user(user_id):
+    cache.delete(fresh_user_key(user_id))
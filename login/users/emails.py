@@ -0,0 +1,45 @@
+"""
+Verification Email Rendering
+
+The verification email differs between requests only by the six-digit code.
+`VerificationEmailRenderer` renders the template and strips its tags once,
+with a placeholder in place of the code, and keeps both variants split around
+that placeholder. Rendering for a request is then a string join instead of a
+template render plus an HTML parse.
+"""
+
+import threading
+
+from django.template.loader import render_to_string
+from django.utils.html import escape, strip_tags
+
+VERIFICATION_TEMPLATE = 'users/verification_email.html'
+VERIFICATION_SUBJECT = 'Email Verification Code'
+CODE_PLACEHOLDER = 'VERIFICATIONCODEPLACEHOLDER'
+
+
+class VerificationEmailRenderer:
+    """Renders the verification email by substituting the code into precompiled parts"""
+
+    def __init__(self, template_name=VERIFICATION_TEMPLATE):
+        self.template_name = template_name
+        self._html_parts = None
+        self._text_parts = None
+        self._lock = threading.Lock()
+
+    def compile(self):
+        """Render the template once around the placeholder and keep the pieces"""
+        html = render_to_string(self.template_name, {'verification_code': CODE_PLACEHOLDER})
+        with self._lock:
+            self._html_parts = html.split(CODE_PLACEHOLDER)
+            self._text_parts = strip_tags(html).split(CODE_PLACEHOLDER)
+
+    def render(self, code):
+        """Return `(html, text)` for a verification code"""
+        if self._html_parts is None:
+            self.compile()
+        # The template autoescapes the code, so the HTML variant does too
+        return escape(code).join(self._html_parts), str(code).join(self._text_parts)
+
+
+verification_email = VerificationEmailRenderer()
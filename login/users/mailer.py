@@ -0,0 +1,227 @@
+"""
+Queued Email Delivery
+
+Request handlers never talk to the SMTP server. `enqueue_email` stores the
+message as an `OutgoingEmail` row and wakes the dispatcher; the response is
+returned right away. The dispatcher's worker threads:
+
+1. claim a batch of due rows (`SELECT ... FOR UPDATE SKIP LOCKED` on
+   PostgreSQL, so several processes can share the queue),
+2. send the batch over one SMTP connection that the worker keeps open between
+   batches,
+3. mark rows sent, or schedule a retry with exponential backoff until
+   `MAX_ATTEMPTS` is reached.
+
+Rows stuck in "sending" (a worker died mid-batch) are claimed again after
+`CLAIM_TIMEOUT` seconds; that counts as an attempt. Workers run inside the web process when
+`MAIL_QUEUE['RUN_IN_PROCESS']` is true; otherwise run
+`python manage.py send_queued_emails` as a separate process. Set
+`MAIL_QUEUE['BACKEND']` to the locmem or file email backend in tests.
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+logger = logging.getLogger(__name__)
+
+
+def mail_queue_config():
+    return {
+        'RUN_IN_PROCESS': True,
+        'WORKERS': 2,
+        'BATCH_SIZE': 20,
+        'POLL_INTERVAL': 5,
+        'MAX_ATTEMPTS': 5,
+        'RETRY_BASE_DELAY': 30,
+        'RETRY_MAX_DELAY': 60 * 60,
+        'CLAIM_TIMEOUT': 5 * 60,
+        'BACKEND': None,
+        **getattr(settings, 'MAIL_QUEUE', {}),
+    }
+
+
+def retry_delay(attempts, config=None):
+    """Backoff before the next attempt: base * 2^(attempts - 1), capped"""
+    config = config or mail_queue_config()
+    return min(config['RETRY_BASE_DELAY'] * 2 ** (attempts - 1), config['RETRY_MAX_DELAY'])
+
+
+def enqueue_email(to_email, subject, text_body, html_body=''):
+    """Queue an email for delivery and return the queued row"""
+    email = OutgoingEmail.objects.create(
+        to_email=to_email,
+        subject=subject,
+        text_body=text_body,
+        html_body=html_body,
+    )
+    if mail_queue_config()['RUN_IN_PROCESS']:
+        transaction.on_commit(get_dispatcher().wake)
+    return email
+
+
+class MailDispatcher:
+    """Pool of worker threads draining the OutgoingEmail queue"""
+
+    def __init__(self, config=None):
+        self.config = config or mail_queue_config()
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def claim_batch(self):
+        """Mark a batch of due emails as sending and return them"""
+        now = timezone.now()
+        due = Q(status=OutgoingEmail.PENDING, next_attempt_at__lte=now) | Q(
+            status=OutgoingEmail.SENDING,
+            claimed_at__lt=now - timedelta(seconds=self.config['CLAIM_TIMEOUT'])
+        )
+        with transaction.atomic():
+            batch = list(
+                OutgoingEmail.objects.select_for_update(skip_locked=True)
+                .filter(due)
+                .order_by('next_attempt_at')[:self.config['BATCH_SIZE']]
+            )
+            # A stale claim means a worker died mid-send; count it as an attempt so
+            # a message that kills workers is not retried forever
+            stale = [email for email in batch if email.status == OutgoingEmail.SENDING]
+            exhausted = [email.id for email in stale if email.attempts + 1 >= self.config['MAX_ATTEMPTS']]
+            if stale:
+                OutgoingEmail.objects.filter(id__in=[email.id for email in stale]).update(attempts=F('attempts') + 1)
+                for email in stale:
+                    email.attempts += 1
+            if exhausted:
+                OutgoingEmail.objects.filter(id__in=exhausted).update(
+                    status=OutgoingEmail.FAILED, claimed_at=None, last_error='Worker stopped while sending'
+                )
+                logger.error(f"Giving up on emails {exhausted}: claimed by workers that stopped while sending")
+                batch = [email for email in batch if email.id not in exhausted]
+            if batch:
+                OutgoingEmail.objects.filter(id__in=[email.id for email in batch]).update(
+                    status=OutgoingEmail.SENDING, claimed_at=now
+                )
+        return batch
+
+    def build_message(self, email, connection):
+        message = EmailMultiAlternatives(
+            subject=email.subject,
+            body=email.text_body,
+            from_email=settings.DEFAULT_FROM_EMAIL,
+            to=[email.to_email],
+            connection=connection,
+        )
+        if email.html_body:
+            message.attach_alternative(email.html_body, 'text/html')
+        return message
+
+    def send_batch(self, batch, connection):
+        """Send claimed emails over an open connection, recording the outcome of each"""
+        sent_ids = []
+        try:
+            for position, email in enumerate(batch):
+                try:
+                    connection.send_messages([self.build_message(email, connection)])
+                    sent_ids.append(email.id)
+                except Exception as e:
+                    self.record_failure(email, e)
+                    # The server may have dropped the connection; reopen it for the rest of the batch
+                    try:
+                        connection.close()
+                        connection.open()
+                    except Exception as reopen_error:
+                        for remaining in batch[position + 1:]:
+                            self.record_failure(remaining, f"SMTP connection lost: {reopen_error}")
+                        break
+        finally:
+            # Rows left in "sending" after an error are reclaimed after CLAIM_TIMEOUT
+            if sent_ids:
+                OutgoingEmail.objects.filter(id__in=sent_ids).update(
+                    status=OutgoingEmail.SENT, sent_at=timezone.now(), claimed_at=None, last_error=''
+                )
+        return len(sent_ids)
+
+    def record_failure(self, email, error):
+        attempts = email.attempts + 1
+        if attempts >= self.config['MAX_ATTEMPTS']:
+            status = OutgoingEmail.FAILED
+            logger.error(f"Giving up on email {email.id} to {email.to_email}: {error}")
+        else:
+            status = OutgoingEmail.PENDING
+            logger.warning(f"Email {email.id} failed (attempt {attempts}), retrying: {error}")
+        OutgoingEmail.objects.filter(id=email.id).update(
+            status=status,
+            attempts=attempts,
+            next_attempt_at=timezone.now() + timedelta(seconds=retry_delay(attempts, self.config)),
+            claimed_at=None,
+            last_error=str(error),
+        )
+
+    def drain(self, connection=None):
+        """Send every due email from the calling thread; returns the number sent"""
+        connection = connection or get_connection(backend=self.config['BACKEND'])
+        sent = 0
+        try:
+            while True:
+                batch = self.claim_batch()
+                if not batch:
+                    return sent
+                connection.open()
+                sent += self.send_batch(batch, connection)
+        finally:
+            connection.close()
+
+    def _work(self):
+        # Each worker keeps its SMTP connection open across batches
+        connection = get_connection(backend=self.config['BACKEND'])
+        while True:
+            self._wakeup.wait(self.config['POLL_INTERVAL'])
+            self._wakeup.clear()
+            try:
+                batch = self.claim_batch()
+                if not batch:
+                    # Idle: don't hold the SMTP connection until the server times it out
+                    connection.close()
+                while batch:
+                    connection.open()
+                    self.send_batch(batch, connection)
+                    batch = self.claim_batch()
+            except Exception:
+                logger.exception("Mail dispatcher batch failed")
+                connection.close()
+            finally:
+                close_old_connections()
+
+    def start(self):
+        """Start the worker threads if they are not running yet"""
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.config['WORKERS']:
+                thread = threading.Thread(target=self._work, name='mail-dispatcher', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def wake(self):
+        self.start()
+        self._wakeup.set()
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_dispatcher():
+    """Return the process-wide mail dispatcher"""
+    global _dispatcher
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = MailDispatcher()
+    return _dispatcher
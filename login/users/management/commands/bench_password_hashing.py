@@ -0,0 +1,55 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher, check_password
+from django.core.management.base import BaseCommand
+
+from users.hashers import TunedArgon2PasswordHasher
+
+
+class Command(BaseCommand):
+    help = 'Report password verifications (logins) per second per core for the configured hashing costs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=3.0, help='Measuring time per hasher')
+        parser.add_argument('--workers', type=int, default=settings.PASSWORD_HASHING['WORKERS'])
+
+    def measure(self, encoded, seconds, workers):
+        """Verifications per second using `workers` threads"""
+        def verify_for(deadline):
+            count = 0
+            while time.perf_counter() < deadline:
+                check_password('correct horse battery staple', encoded)
+                count += 1
+            return count
+
+        deadline = time.perf_counter() + seconds
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            counts = list(pool.map(verify_for, [deadline] * workers))
+        return sum(counts) / seconds
+
+    def handle(self, *args, **options):
+        seconds, workers = options['seconds'], options['workers']
+        hashers = [
+            (f'pbkdf2_sha256 ({PBKDF2PasswordHasher.iterations} iterations)', PBKDF2PasswordHasher()),
+            (
+                'argon2id (t={time_cost}, m={memory_cost} KiB, p={parallelism})'.format(
+                    time_cost=settings.PASSWORD_HASHING['ARGON2_TIME_COST'],
+                    memory_cost=settings.PASSWORD_HASHING['ARGON2_MEMORY_COST'],
+                    parallelism=settings.PASSWORD_HASHING['ARGON2_PARALLELISM'],
+                ),
+                TunedArgon2PasswordHasher(),
+            ),
+        ]
+
+        self.stdout.write(f'{os.cpu_count()} CPUs, {workers} hashing workers, {seconds:.0f}s per measurement')
+        for label, hasher in hashers:
+            encoded = hasher.encode('correct horse battery staple', hasher.salt())
+            single = self.measure(encoded, seconds, 1)
+            pooled = self.measure(encoded, seconds, workers)
+            self.stdout.write(
+                f'{label}: {1000 / single:.1f} ms per verify, '
+                f'{single:.1f} logins/sec per core, {pooled:.1f} logins/sec with {workers} workers'
+            )
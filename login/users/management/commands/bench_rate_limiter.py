@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+
+from users.ratelimit import CacheRateLimitStore, LocalRateLimitStore, check_rate_limit
+from users import ratelimit
+
+
+class Command(BaseCommand):
+    help = 'Measure the overhead of one rate limit check per store'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20000)
+        parser.add_argument('--clients', type=int, default=1000, help='Distinct IPs/emails cycled through')
+
+    def handle(self, *args, **options):
+        iterations, clients = options['iterations'], options['clients']
+        factory = RequestFactory()
+        requests = [
+            (factory.post('/api/users/login/', REMOTE_ADDR=f'10.0.{i // 256}.{i % 256}'), f'user{i}@example.com')
+            for i in range(clients)
+        ]
+
+        original_store = ratelimit._store
+        try:
+            for store in (LocalRateLimitStore(), CacheRateLimitStore()):
+                ratelimit._store = store
+                start = time.perf_counter()
+                for i in range(iterations):
+                    request, email = requests[i % clients]
+                    check_rate_limit(request, 'login', email=email)
+                elapsed = time.perf_counter() - start
+                self.stdout.write(
+                    f'{type(store).__name__}: {elapsed / iterations * 1e6:.1f} us per check '
+                    f'(IP and email rules)'
+                )
+        finally:
+            ratelimit._store = original_store
@@ -0,0 +1,102 @@
+import os
+import statistics
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from users.models import User
+from users.tokens import prune_expired_tokens
+
+BENCH_PREFIX = 'bench'
+
+
+class Command(BaseCommand):
+    help = 'Measure token refresh latency with a large token history, before and after pruning'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--history', type=int, default=100_000, help='Historical tokens to insert')
+        parser.add_argument('--expired-ratio', type=float, default=0.95)
+        parser.add_argument('--refreshes', type=int, default=200)
+        parser.add_argument('--batch-size', type=int, default=50_000)
+        parser.add_argument(
+            '--allow-non-test-db', action='store_true',
+            help="Run against a database whose name does not start with 'test' (inserts and deletes rows)"
+        )
+
+    def seed(self, history, expired_ratio, batch_size):
+        now = aware_utcnow()
+        expired = int(history * expired_ratio)
+        for start in range(0, history, batch_size):
+            tokens = OutstandingToken.objects.bulk_create([
+                OutstandingToken(
+                    jti=f'{BENCH_PREFIX}{uuid.uuid4().hex[len(BENCH_PREFIX):]}',
+                    token='',
+                    created_at=now - timedelta(days=2),
+                    expires_at=now - timedelta(days=1) if i < expired else now + timedelta(days=1),
+                )
+                for i in range(start, min(start + batch_size, history))
+            ], batch_size=batch_size)
+            # Rotation blacklists most refresh tokens
+            BlacklistedToken.objects.bulk_create(
+                [BlacklistedToken(token=token) for token in tokens[::5] + tokens[1::5] + tokens[2::5]],
+                batch_size=batch_size
+            )
+            self.stdout.write(f'  seeded {min(start + batch_size, history)}/{history}', ending='\r')
+        self.stdout.write('')
+
+    def measure(self, user, refreshes):
+        refresh = str(RefreshToken.for_user(user))
+        timings = []
+        for _ in range(refreshes):
+            start = time.perf_counter()
+            serializer = TokenRefreshSerializer(data={'refresh': refresh})
+            serializer.is_valid(raise_exception=True)
+            timings.append((time.perf_counter() - start) * 1000)
+            refresh = serializer.validated_data['refresh']
+        timings.sort()
+        return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+    def handle(self, *args, **options):
+        database = str(connection.settings_dict['NAME'])
+        if not os.path.basename(database).startswith('test') and not options['allow_non_test_db']:
+            raise CommandError(
+                f"Refusing to seed {options['history']} tokens into '{database}'; "
+                "use a test database or pass --allow-non-test-db"
+            )
+
+        user, _ = User.objects.get_or_create(
+            email='token-bench@example.com', defaults={'first_name': 'Token', 'last_name': 'Bench'}
+        )
+
+        self.stdout.write(f'Seeding {options["history"]} historical tokens...')
+        self.seed(options['history'], options['expired_ratio'], options['batch_size'])
+
+        try:
+            p50, p95 = self.measure(user, options['refreshes'])
+            self.stdout.write(f'Before pruning ({OutstandingToken.objects.count()} outstanding): '
+                              f'refresh p50 {p50:.2f} ms, p95 {p95:.2f} ms')
+
+            start = time.monotonic()
+            # Only the seeded tokens: the database's own expired tokens are not the benchmark's to delete
+            deleted = prune_expired_tokens(
+                batch_size=options['batch_size'],
+                tokens=OutstandingToken.objects.filter(jti__startswith=BENCH_PREFIX),
+            )
+            self.stdout.write(f'Pruned {deleted} expired tokens in {time.monotonic() - start:.1f}s')
+
+            p50, p95 = self.measure(user, options['refreshes'])
+            self.stdout.write(f'After pruning ({OutstandingToken.objects.count()} outstanding): '
+                              f'refresh p50 {p50:.2f} ms, p95 {p95:.2f} ms')
+        finally:
+            bench_tokens = OutstandingToken.objects.filter(jti__startswith=BENCH_PREFIX)
+            BlacklistedToken.objects.filter(token__in=bench_tokens).delete()
+            bench_tokens.delete()
+            OutstandingToken.objects.filter(user=user).delete()
+            user.delete()
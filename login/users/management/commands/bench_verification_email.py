@@ -0,0 +1,44 @@
+import random
+import time
+
+from django.core.management.base import BaseCommand
+from django.template.loader import render_to_string
+from django.utils.html import strip_tags
+
+from users.emails import VERIFICATION_TEMPLATE, VerificationEmailRenderer
+
+
+class Command(BaseCommand):
+    help = 'Compare per-request CPU of template rendering against the precompiled verification email'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        iterations = options['iterations']
+        codes = [str(random.randint(100000, 999999)) for _ in range(iterations)]
+        renderer = VerificationEmailRenderer()
+        renderer.compile()
+
+        for code in codes[:20]:
+            html = render_to_string(VERIFICATION_TEMPLATE, {'verification_code': code})
+            if renderer.render(code) != (html, strip_tags(html)):
+                self.stderr.write(self.style.ERROR('Precompiled output differs from the template output'))
+                return
+
+        start = time.process_time()
+        for code in codes:
+            html = render_to_string(VERIFICATION_TEMPLATE, {'verification_code': code})
+            strip_tags(html)
+        template_time = time.process_time() - start
+
+        start = time.process_time()
+        for code in codes:
+            renderer.render(code)
+        precompiled_time = time.process_time() - start
+
+        self.stdout.write(f'render_to_string + strip_tags: {template_time / iterations * 1e6:.1f} us CPU per email')
+        self.stdout.write(f'precompiled renderer:          {precompiled_time / iterations * 1e6:.1f} us CPU per email')
+        self.stdout.write(self.style.SUCCESS(
+            f'{template_time / max(precompiled_time, 1e-9):.0f}x less CPU per signup request'
+        ))
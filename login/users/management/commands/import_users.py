@@ -0,0 +1,161 @@
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.contrib.auth.hashers import identify_hasher, make_password
+from django.core.management.base import BaseCommand, CommandError
+
+from users.models import User
+
+
+def _setup_worker():
+    # Needed when worker processes are spawned rather than forked
+    django.setup()
+
+
+def _hash_passwords(passwords):
+    """Runs in a worker process: hash a chunk of raw passwords"""
+    return [make_password(password) for password in passwords]
+
+
+def _is_true(value):
+    """Blank or missing values keep the default (True); only explicit false values disable"""
+    if isinstance(value, bool):
+        return value
+    return str(value).strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+def read_rows(stream, file_format):
+    """Yield one dict per user from a CSV (with a header row) or JSONL stream"""
+    if file_format == 'csv':
+        yield from csv.DictReader(stream)
+        return
+    for line in stream:
+        if line.strip():
+            yield json.loads(line)
+
+
+class Command(BaseCommand):
+    help = (
+        'Import users from a CSV or JSONL file in bulk. Each row has email, first_name, last_name '
+        'and either password (hashed in a process pool) or password_hash (stored as is).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="CSV or JSONL file, or '-' for stdin")
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=2000, help='Users per bulk insert')
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 2, help='Hashing processes')
+        parser.add_argument(
+            '--share-hashes', action='store_true',
+            help='Hash each distinct password once and reuse it (synthetic load-test data only)'
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or ('jsonl' if path.endswith(('.jsonl', '.ndjson')) else 'csv')
+        if path == '-' and not options['format']:
+            raise CommandError('--format is required when reading from stdin')
+
+        self.batch_size = options['batch_size']
+        self.share_hashes = options['share_hashes']
+        self.shared = {}
+        self.rows_read = self.created = self.skipped = self.invalid = 0
+        start = time.monotonic()
+
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            with ProcessPoolExecutor(max_workers=options['workers'], initializer=_setup_worker) as pool:
+                self.pool = pool
+                self.workers = options['workers']
+                rows = read_rows(stream, file_format)
+                # Hash the next batch in the pool while the current one is inserted
+                pending = self.prepare(list(islice(rows, self.batch_size)))
+                while pending is not None:
+                    batch = list(islice(rows, self.batch_size))
+                    following = self.prepare(batch) if batch else None
+                    self.insert(*pending)
+                    pending = following
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        elapsed = time.monotonic() - start
+        rate = self.created / elapsed * 60 if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(
+            f'Created {self.created} users in {elapsed:.1f}s ({rate:.0f}/min); '
+            f'{self.skipped} already existed, {self.invalid} invalid rows skipped'
+        ))
+
+    def prepare(self, rows):
+        """Validate a batch and start hashing its raw passwords; returns (users, passwords, futures)"""
+        users, passwords = {}, {}
+        for row in rows:
+            self.rows_read += 1
+            email = User.objects.normalize_email((row.get('email') or '').strip())
+            password, password_hash = row.get('password') or '', row.get('password_hash') or ''
+            if not email or not (password or password_hash):
+                self.invalid += 1
+                self.stderr.write(f'Row {self.rows_read}: email and password or password_hash are required')
+                continue
+            if password_hash:
+                try:
+                    identify_hasher(password_hash)
+                except ValueError:
+                    self.invalid += 1
+                    self.stderr.write(f'Row {self.rows_read}: unrecognized password_hash for {email}')
+                    continue
+            if email in users:
+                self.skipped += 1
+                continue
+            users[email] = User(
+                email=email,
+                first_name=row.get('first_name') or '',
+                last_name=row.get('last_name') or '',
+                is_active=_is_true(row.get('is_active', True)),
+                password=password_hash,
+            )
+            if not password_hash:
+                passwords[email] = password
+
+        if self.share_hashes:
+            distinct = sorted(set(passwords.values()) - self.shared.keys())
+            futures = [(distinct, self.pool.submit(_hash_passwords, distinct))] if distinct else []
+        else:
+            # A few chunks per worker keeps every process busy without per-password overhead
+            emails = list(passwords)
+            size = max(len(emails) // (self.workers * 4), 1)
+            futures = [
+                (chunk, self.pool.submit(_hash_passwords, [passwords[email] for email in chunk]))
+                for chunk in (emails[i:i + size] for i in range(0, len(emails), size))
+            ]
+        return list(users.values()), passwords, futures
+
+    def insert(self, users, passwords, futures):
+        """Wait for a batch's hashes and bulk insert the users that do not exist yet"""
+        hashes = {}
+        for keys, future in futures:
+            (self.shared if self.share_hashes else hashes).update(zip(keys, future.result()))
+        if self.share_hashes:
+            hashes = {email: self.shared[password] for email, password in passwords.items()}
+
+        existing = set(
+            User.objects.filter(email__in=[user.email for user in users]).values_list('email', flat=True)
+        )
+        new_users = []
+        for user in users:
+            if user.email in existing:
+                continue
+            if not user.password:
+                user.password = hashes[user.email]
+            new_users.append(user)
+
+        # bulk_create bypasses User.save; imported users have no cached claims to invalidate
+        User.objects.bulk_create(new_users, batch_size=self.batch_size)
+        self.created += len(new_users)
+        self.skipped += len(users) - len(new_users)
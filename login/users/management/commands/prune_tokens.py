@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.tokens import prune_expired_tokens
+
+
+class Command(BaseCommand):
+    help = 'Delete expired simplejwt outstanding/blacklisted tokens in small batches (safe to run while serving)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--pause', type=float, default=0.05, help='Seconds to sleep between batches')
+        parser.add_argument('--every', type=int, default=0, help='Keep running, pruning every N seconds')
+
+    def handle(self, *args, **options):
+        while True:
+            start = time.monotonic()
+            deleted = prune_expired_tokens(batch_size=options['batch_size'], pause=options['pause'])
+            self.stdout.write(self.style.SUCCESS(
+                f'Deleted {deleted} expired tokens in {time.monotonic() - start:.1f}s'
+            ))
+            if not options['every']:
+                return
+            time.sleep(options['every'])
@@ -0,0 +1,24 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from users.mailer import get_dispatcher
+
+
+class Command(BaseCommand):
+    help = 'Send queued emails (run as a separate process when MAIL_QUEUE["RUN_IN_PROCESS"] is False)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Send everything that is due and exit')
+
+    def handle(self, *args, **options):
+        dispatcher = get_dispatcher()
+        if options['once']:
+            sent = dispatcher.drain()
+            self.stdout.write(self.style.SUCCESS(f'Sent {sent} queued emails'))
+            return
+
+        self.stdout.write('Sending queued emails, press Ctrl+C to stop')
+        dispatcher.start()
+        while True:
+            time.sleep(60)
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from users.verification import get_code_store
+
+
+class Command(BaseCommand):
+    help = 'Delete expired email verification codes in batches (for cron; the web process also sweeps periodically)'
+
+    def handle(self, *args, **options):
+        deleted = get_code_store().sweep()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} expired verification codes'))
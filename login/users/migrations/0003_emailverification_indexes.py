@@ -0,0 +1,21 @@
+# Generated by Django 4.2.7 on 2026-10-19 06:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_outgoingemail'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailverification',
+            index=models.Index(fields=['email', 'code', 'created_at'], name='users_email_email_f2efec_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='emailverification',
+            index=models.Index(fields=['created_at'], name='users_email_created_a30d9d_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+from django.db import migrations
+
+
+# simplejwt's token_blacklist tables have no index on the columns used to prune
+# expired tokens and to read the revocation feed. They belong to a third-party
+# app, so the indexes are created here; on PostgreSQL without locking writes.
+INDEXES = [
+    ('users_outstandingtoken_expires_at_idx', 'token_blacklist_outstandingtoken', 'expires_at'),
+    ('users_blacklistedtoken_blacklisted_at_idx', 'token_blacklist_blacklistedtoken', 'blacklisted_at'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    for name, table, column in INDEXES:
+        schema_editor.execute(f'CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} ({column})')
+
+
+def drop_indexes(apps, schema_editor):
+    concurrently = 'CONCURRENTLY ' if schema_editor.connection.vendor == 'postgresql' else ''
+    for name, table, column in INDEXES:
+        schema_editor.execute(f'DROP INDEX {concurrently}IF EXISTS {name}')
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    atomic = False
+
+    dependencies = [
+        ('users', '0003_emailverification_indexes'),
+        ('token_blacklist', '0008_migrate_to_bigautofield'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
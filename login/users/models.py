@@ -1,8 +1,11 @@
+from django.conf import settings
 from django.db import models
 from django.contrib.auth.models import AbstractBaseUser, PermissionsMixin, BaseUserManager
 from datetime import timedelta
 from django.utils import timezone
 
+from .claims import invalidate_fresh_user
+
 
 class UserManager(BaseUserManager):
     def create_user(self, email, first_name, last_name, password=None, **extra_fields):
@@ -39,14 +42,69 @@ class User(AbstractBaseUser, PermissionsMixin):
     def __str__(self):
         return self.email
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Drop the cached fields served alongside token claims
+        invalidate_fresh_user(self.id)
+
+    def delete(self, *args, **kwargs):
+        user_id = self.id
+        result = super().delete(*args, **kwargs)
+        invalidate_fresh_user(user_id)
+        return result
+
 
 class EmailVerification(models.Model):
     email = models.EmailField()
     code = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Code lookups: newest row for an (email, code) pair
+            models.Index(fields=["email", "code", "created_at"]),
+            # Expiry sweeps
+            models.Index(fields=["created_at"]),
+        ]
+
     def is_valid(self):
-        return timezone.now() <= self.created_at + timedelta(minutes=10)
+        ttl = getattr(settings, "VERIFICATION_CODES", {}).get("TTL", 10 * 60)
+        return timezone.now() <= self.created_at + timedelta(seconds=ttl)
 
     def __str__(self):
         return f"{self.email} - {self.code}"
+
+
+class OutgoingEmail(models.Model):
+    """Email waiting in the send queue (see users.mailer)"""
+
+    PENDING = "pending"
+    SENDING = "sending"
+    SENT = "sent"
+    FAILED = "failed"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (SENDING, "Sending"),
+        (SENT, "Sent"),
+        (FAILED, "Failed"),
+    ]
+
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    text_body = models.TextField()
+    html_body = models.TextField(blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.to_email} - {self.subject} ({self.status})"
@@ -0,0 +1,101 @@
+"""
+Offloaded Password Verification
+
+Password hashing is deliberately expensive. Running it on the request worker
+means a burst of logins pins every worker's CPU, including for requests that
+never hash anything. Login verification is therefore submitted to a bounded
+thread pool (argon2-cffi and hashlib's PBKDF2 release the GIL while hashing,
+so the pool uses every core):
+
+- at most `WORKERS` hashes run at once, and at most `MAX_PENDING` logins wait
+  for a slot; beyond that `PasswordHashingBusy` is raised and the login view
+  answers 503 instead of queueing without bound
+- when a password verifies against a hash made with an older hasher or older
+  costs, the new hash is computed in the pool and saved (transparent rehash)
+- unknown emails still cost one hash, so response time does not reveal which
+  accounts exist (as in Django's ModelBackend)
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+from .models import User
+
+
+class PasswordHashingBusy(Exception):
+    """Raised when the password hashing pool is saturated"""
+
+
+class HashingPool:
+    """Thread pool with a bounded number of queued hashing jobs"""
+
+    def __init__(self, workers, max_pending, wait_timeout):
+        self.wait_timeout = wait_timeout
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+
+    def run(self, func, *args):
+        if not self._slots.acquire(timeout=self.wait_timeout):
+            raise PasswordHashingBusy("Too many logins in progress")
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda _: self._slots.release())
+        try:
+            return future.result(timeout=self.wait_timeout)
+        except TimeoutError:
+            raise PasswordHashingBusy("Password verification timed out")
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool():
+    """Return the process-wide password hashing pool"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                config = settings.PASSWORD_HASHING
+                _pool = HashingPool(config['WORKERS'], config['MAX_PENDING'], config['WAIT_TIMEOUT'])
+    return _pool
+
+
+def _verify(raw_password, encoded):
+    """Runs in the pool: returns (valid, upgraded hash or None)"""
+    if encoded is None:
+        # Equalize timing for unknown accounts
+        make_password(raw_password)
+        return False, None
+
+    upgraded = []
+    valid = check_password(raw_password, encoded, setter=lambda raw: upgraded.append(make_password(raw)))
+    return valid, upgraded[0] if upgraded else None
+
+
+def authenticate_user(email, password):
+    """
+    Return the active user matching the credentials, or None.
+
+    The user lookup runs in the calling thread; hashing runs in the pool.
+    """
+    try:
+        user = User._default_manager.get_by_natural_key(email)
+    except User.DoesNotExist:
+        user = None
+
+    usable = user is not None and user.has_usable_password()
+    valid, upgraded = get_hashing_pool().run(_verify, password, user.password if usable else None)
+    if not valid or not user.is_active:
+        return None
+
+    if upgraded:
+        user.password = upgraded
+        user.save(update_fields=['password'])
+    return user
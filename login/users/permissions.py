@@ -0,0 +1,9 @@
+from django.conf import settings
+from rest_framework.permissions import BasePermission
+
+
+class IsInternalService(BasePermission):
+    """Allow requests carrying a known X-Service-Token header (other microservices)"""
+
+    def has_permission(self, request, view):
+        return request.META.get('HTTP_X_SERVICE_TOKEN', '') in getattr(settings, 'SERVICE_TOKENS', [])
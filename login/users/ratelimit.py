@@ -0,0 +1,166 @@
+"""
+Request Rate Limiting
+
+Login and verification requests are limited per client IP and per email
+address before any password hashing, database access or email is done.
+Limits use a sliding-window counter: the count of the current fixed window
+plus the previous window's count weighted by how much of it still overlaps
+the sliding window. That needs only two counters per key and atomic
+increments, so it works on a shared cache as well as in memory.
+
+Rules live in `RATE_LIMITS['RULES']` as `scope: [(key type, limit, period
+seconds), ...]`. The store is pluggable (`RATE_LIMITS['STORE']`):
+
+- `LocalRateLimitStore`: in-process dict, for a single process
+- `CacheRateLimitStore`: the Django cache, shared between workers when the
+  cache is (e.g. Redis)
+"""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+
+
+def rate_limit_config():
+    return {
+        'ENABLED': True,
+        'STORE': 'users.ratelimit.LocalRateLimitStore',
+        'TRUST_X_FORWARDED_FOR': False,
+        'RULES': {},
+        **getattr(settings, 'RATE_LIMITS', {}),
+    }
+
+
+def _retry_after(previous, current, limit, period, now):
+    """Seconds until the weighted count drops below the limit (0 if a hit is allowed now)"""
+    elapsed = now % period
+    weight = 1 - elapsed / period
+    if previous * weight + current < limit:
+        return 0
+    if current < limit:
+        # Wait until the previous window's weight has decayed enough
+        return max(math.ceil((1 - (limit - current) / previous) * period - elapsed), 1)
+    # This window's hits become the previous count of the next one
+    return max(math.ceil(period - elapsed + (1 - limit / current) * period), 1)
+
+
+class LocalRateLimitStore:
+    """Sliding-window counters in a process-local dict, bounded in least-recently-used order"""
+
+    max_keys = 100000
+
+    def __init__(self):
+        self._counters = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, limit, period):
+        """Record a hit if allowed; return 0, or seconds to wait when limited"""
+        now = time.time()
+        window = int(now // period)
+        with self._lock:
+            # counter: [window, current count, previous count]
+            counter = self._counters.pop(key, None)
+            if counter is None or counter[0] < window - 1:
+                counter = [window, 0, 0]
+            elif counter[0] == window - 1:
+                counter = [window, 0, counter[1]]
+
+            retry_after = _retry_after(counter[2], counter[1], limit, period, now)
+            if not retry_after:
+                counter[1] += 1
+            # Re-inserting moves the key to the most recently used end
+            self._counters[key] = counter
+
+            # Evict the least recently used keys; O(1) per hit however many keys are live
+            while len(self._counters) > self.max_keys:
+                self._counters.popitem(last=False)
+        return retry_after
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+
+
+class CacheRateLimitStore:
+    """Sliding-window counters in the Django cache (shared when the cache backend is)"""
+
+    def _increment(self, key, timeout):
+        cache.add(key, 0, timeout=timeout)
+        try:
+            return cache.incr(key)
+        except ValueError:
+            # Expired between add and incr
+            cache.set(key, 1, timeout=timeout)
+            return 1
+
+    def hit(self, key, limit, period):
+        now = time.time()
+        window = int(now // period)
+        current_key = f'ratelimit:{key}:{window}'
+        previous_key = f'ratelimit:{key}:{window - 1}'
+
+        # Increment first and decide from the returned count: concurrent workers
+        # each see a distinct count, so no more than the limit can pass
+        current = self._increment(current_key, period * 2)
+        retry_after = _retry_after(cache.get(previous_key, 0), current - 1, limit, period, now)
+        if retry_after:
+            # Rejected hits do not count against the client
+            try:
+                cache.decr(current_key)
+            except ValueError:
+                pass
+        return retry_after
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_rate_limit_store():
+    """Return the process-wide rate limit store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(rate_limit_config()['STORE'])()
+    return _store
+
+
+def client_ip(request, config=None):
+    config = config or rate_limit_config()
+    if config['TRUST_X_FORWARDED_FOR']:
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR')
+        if forwarded:
+            return forwarded.split(',')[0].strip()
+    return request.META.get('REMOTE_ADDR', '')
+
+
+def check_rate_limit(request, scope, email=None):
+    """
+    Apply the rules of `scope` to a request.
+
+    Returns 0 when the request may proceed, otherwise the number of seconds
+    the client should wait (for the Retry-After header).
+    """
+    config = rate_limit_config()
+    if not config['ENABLED']:
+        return 0
+
+    identities = {
+        'ip': client_ip(request, config),
+        'email': email.strip().lower() if isinstance(email, str) and email else None,
+    }
+    store = get_rate_limit_store()
+    for key_type, limit, period in config['RULES'].get(scope, []):
+        identity = identities.get(key_type)
+        if not identity:
+            continue
+        retry_after = store.hit(f'{scope}:{key_type}:{identity}', limit, period)
+        if retry_after:
+            return retry_after
+    return 0
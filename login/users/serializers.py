@@ -1,6 +1,7 @@
 from rest_framework import serializers
-from .models import User, EmailVerification
-from django.contrib.auth import authenticate
+from .models import User
+from .passwords import authenticate_user
+from .verification import EXPIRED, MISSING, get_code_store
 
 class OnboardingSerializer(serializers.Serializer):
     first_name = serializers.CharField()
@@ -13,12 +14,11 @@ class OnboardingSerializer(serializers.Serializer):
         email = data["email"]
         code = data["verification_code"]
 
-        try:
-            verification = EmailVerification.objects.filter(email=email, code=code).latest("created_at")
-        except EmailVerification.DoesNotExist:
+        state = get_code_store().lookup(email, code)
+        if state == MISSING:
             raise serializers.ValidationError("Invalid verification code.")
 
-        if not verification.is_valid():
+        if state == EXPIRED:
             raise serializers.ValidationError("Verification code expired.")
 
         if User.objects.filter(email=email).exists():
@@ -48,7 +48,8 @@ class LoginSerializer(serializers.Serializer):
         password = data.get('password')
 
         if email and password:
-            user = authenticate(email=email, password=password)
+            # Password verification runs on the bounded hashing pool
+            user = authenticate_user(email, password)
             if user:
                 if not user.is_active:
                     raise serializers.ValidationError("User account is disabled.")
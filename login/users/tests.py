@@ -1,3 +1,267 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail import get_connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .claims import tokens_for_user
+from .mailer import MailDispatcher, mail_queue_config
+from .models import OutgoingEmail, User
+from .ratelimit import CacheRateLimitStore, LocalRateLimitStore, check_rate_limit, get_rate_limit_store
+from .tokens import _utcnow, get_revocations, prune_expired_tokens
+
+LOCMEM_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+
+def queue_config(**overrides):
+    return {**mail_queue_config(), 'RUN_IN_PROCESS': False, 'BACKEND': LOCMEM_BACKEND, **overrides}
+
+
+class MailDispatcherTests(TestCase):
+    def setUp(self):
+        self.dispatcher = MailDispatcher(queue_config(BATCH_SIZE=2, MAX_ATTEMPTS=3))
+
+    def queue(self, count, **fields):
+        return [
+            OutgoingEmail.objects.create(to_email=f'user{i}@example.com', subject='Hi', text_body='Body', **fields)
+            for i in range(count)
+        ]
+
+    def test_drain_sends_every_due_email_in_batches(self):
+        self.queue(5)
+        self.queue(1, next_attempt_at=timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(self.dispatcher.drain(), 5)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertEqual(OutgoingEmail.objects.filter(status=OutgoingEmail.SENT).count(), 5)
+        self.assertEqual(OutgoingEmail.objects.filter(status=OutgoingEmail.PENDING).count(), 1)
+
+    def test_claim_skips_fresh_claims_and_reclaims_stale_ones(self):
+        fresh, stale = self.queue(2, status=OutgoingEmail.SENDING, claimed_at=timezone.now())
+        OutgoingEmail.objects.filter(id=stale.id).update(claimed_at=timezone.now() - timedelta(hours=1))
+
+        batch = self.dispatcher.claim_batch()
+
+        self.assertEqual([email.id for email in batch], [stale.id])
+        self.assertEqual(batch[0].attempts, 1)
+        stale.refresh_from_db()
+        self.assertEqual(stale.attempts, 1)
+
+    def test_stale_claim_gives_up_after_max_attempts(self):
+        email, = self.queue(
+            1, status=OutgoingEmail.SENDING, attempts=2, claimed_at=timezone.now() - timedelta(hours=1)
+        )
+
+        self.assertEqual(self.dispatcher.claim_batch(), [])
+        email.refresh_from_db()
+        self.assertEqual(email.status, OutgoingEmail.FAILED)
+        self.assertEqual(email.attempts, 3)
+
+    def test_failure_schedules_retry_with_backoff_then_gives_up(self):
+        email, = self.queue(1)
+        connection = get_connection(backend=LOCMEM_BACKEND)
+        with mock.patch.object(connection, 'send_messages', side_effect=OSError('refused')):
+            for attempt in range(1, 4):
+                OutgoingEmail.objects.filter(id=email.id).update(next_attempt_at=timezone.now())
+                self.dispatcher.send_batch(self.dispatcher.claim_batch(), connection)
+                email.refresh_from_db()
+                self.assertEqual(email.attempts, attempt)
+
+        self.assertEqual(email.status, OutgoingEmail.FAILED)
+        self.assertEqual(email.last_error, 'refused')
+
+        retried, = self.queue(1)
+        self.dispatcher.record_failure(retried, OSError('refused'))
+        retried.refresh_from_db()
+        self.assertEqual(retried.status, OutgoingEmail.PENDING)
+        self.assertGreater(retried.next_attempt_at, timezone.now() + timedelta(seconds=20))
+
+    def test_lost_connection_marks_rest_of_batch_for_retry(self):
+        self.queue(2)
+        connection = get_connection(backend=LOCMEM_BACKEND)
+        batch = self.dispatcher.claim_batch()
+        with mock.patch.object(connection, 'send_messages', side_effect=OSError('reset')), \
+                mock.patch.object(connection, 'open', side_effect=OSError('unreachable')):
+            self.assertEqual(self.dispatcher.send_batch(batch, connection), 0)
+
+        emails = list(OutgoingEmail.objects.order_by('id'))
+        self.assertEqual([email.status for email in emails], [OutgoingEmail.PENDING] * 2)
+        self.assertEqual([email.attempts for email in emails], [1, 1])
+        self.assertEqual(emails[1].last_error, 'SMTP connection lost: unreachable')
+
+
+class RateLimitStoreTests(TestCase):
+    store_class = LocalRateLimitStore
+
+    def setUp(self):
+        cache.clear()
+        self.store = self.store_class()
+
+    def hits(self, count, at, key='client', limit=3, period=60):
+        with mock.patch('users.ratelimit.time.time', return_value=at):
+            return [self.store.hit(key, limit, period) for _ in range(count)]
+
+    def test_allows_up_to_the_limit_per_window(self):
+        results = self.hits(4, at=6000)
+
+        self.assertEqual(results[:3], [0, 0, 0])
+        self.assertEqual(results[3], 60)
+
+    def test_rejected_hits_do_not_count(self):
+        self.hits(10, at=6000)
+
+        # Half of the previous window still overlaps: 3 * 0.5 + 2 > 3 stops the third hit
+        results = self.hits(3, at=6090)
+
+        self.assertEqual(results[:2], [0, 0])
+        self.assertGreater(results[2], 0)
+
+    def test_previous_window_expires(self):
+        self.hits(3, at=6000)
+
+        self.assertEqual(self.hits(3, at=6120), [0, 0, 0])
+
+    def test_keys_are_independent(self):
+        self.hits(3, at=6000, key='one')
+
+        self.assertEqual(self.hits(1, at=6000, key='two'), [0])
+
+
+class CacheRateLimitStoreTests(RateLimitStoreTests):
+    store_class = CacheRateLimitStore
+
+
+class LocalRateLimitStoreEvictionTests(TestCase):
+    def test_evicts_least_recently_used_keys(self):
+        store = LocalRateLimitStore()
+        store.max_keys = 2
+        with mock.patch('users.ratelimit.time.time', return_value=6000):
+            for key in ('a', 'b', 'a', 'c'):
+                store.hit(key, 1, 60)
+
+            self.assertEqual(list(store._counters), ['a', 'c'])
+            # 'a' kept its count; 'b' starts over
+            self.assertGreater(store.hit('a', 1, 60), 0)
+            self.assertEqual(store.hit('b', 1, 60), 0)
+
+
+@override_settings(RATE_LIMITS={'RULES': {'login': [('ip', 3, 60), ('email', 1, 60)]}})
+class CheckRateLimitTests(TestCase):
+    def setUp(self):
+        get_rate_limit_store().clear()
+        self.factory = RequestFactory()
+
+    def test_limits_by_email_and_ip(self):
+        request = self.factory.post('/api/users/login/', REMOTE_ADDR='10.0.0.1')
+
+        self.assertEqual(check_rate_limit(request, 'login', email='User@Example.com'), 0)
+        self.assertGreater(check_rate_limit(request, 'login', email=' user@example.com'), 0)
+        self.assertEqual(check_rate_limit(request, 'login', email='other@example.com'), 0)
+        self.assertGreater(check_rate_limit(request, 'login', email='third@example.com'), 0)
+
+    def test_unknown_scope_and_disabled_limits_pass(self):
+        request = self.factory.post('/api/users/login/')
+
+        self.assertEqual(check_rate_limit(request, 'signup'), 0)
+        with override_settings(RATE_LIMITS={'ENABLED': False, 'RULES': {'login': [('ip', 0, 60)]}}):
+            self.assertEqual(check_rate_limit(request, 'login'), 0)
+
+
+class RevocationFeedTests(TestCase):
+    def test_empty_page_has_no_watermark(self):
+        entries, next_since, next_cursor, has_more = get_revocations(since=1000.0)
+
+        # None tells the caller to keep its watermark instead of adopting `since`
+        self.assertEqual((entries, next_since, next_cursor, has_more), ([], None, None, False))
+
+
+class ClaimsJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user('ada@example.com', 'Ada', 'Lovelace')
+        self.client = APIClient()
+
+    def get_profile(self, access_token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        return self.client.get('/api/users/profile/')
+
+    def test_profile_is_served_from_claims(self):
+        access_token = tokens_for_user(self.user).access_token
+        self.get_profile(access_token)
+
+        # is_active is now cached; name and email come from the token
+        with self.assertNumQueries(0):
+            response = self.get_profile(access_token)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data, {
+            'id': self.user.id, 'email': 'ada@example.com', 'first_name': 'Ada', 'last_name': 'Lovelace',
+            'is_active': True,
+        })
+
+    def test_token_without_claims_loads_the_user(self):
+        access_token = RefreshToken.for_user(self.user).access_token
+
+        with self.assertNumQueries(1):
+            response = self.get_profile(access_token)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['email'], 'ada@example.com')
+
+    def test_inactive_user_is_rejected(self):
+        access_token = tokens_for_user(self.user).access_token
+        self.assertEqual(self.get_profile(access_token).status_code, 200)
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.get_profile(access_token).status_code, 401)
+
+    def test_deleted_user_is_rejected(self):
+        access_token = tokens_for_user(self.user).access_token
+        self.assertEqual(self.get_profile(access_token).status_code, 200)
+
+        self.user.delete()
+
+        response = self.get_profile(access_token)
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.data['detail'].code, 'user_not_found')
+
+
+class PruneExpiredTokensTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user('ada@example.com', 'Ada', 'Lovelace')
+
+    def token(self, jti, expires_in, blacklisted=False):
+        token = OutstandingToken.objects.create(
+            user=self.user, jti=jti, token=jti, expires_at=_utcnow() + timedelta(seconds=expires_in)
+        )
+        if blacklisted:
+            BlacklistedToken.objects.create(token=token)
+        return token
+
+    def test_deletes_only_expired_tokens_in_batches(self):
+        for i in range(5):
+            self.token(f'expired-{i}', -60 * (i + 1), blacklisted=i % 2 == 0)
+        self.token('live', 3600)
+        self.token('live-revoked', 3600, blacklisted=True)
+
+        with mock.patch('users.tokens.time.sleep') as sleep:
+            self.assertEqual(prune_expired_tokens(batch_size=2, pause=0.1), 5)
+
+        # Three batches of at most two, each followed by the pause
+        self.assertEqual(sleep.call_count, 3)
+        self.assertEqual(set(OutstandingToken.objects.values_list('jti', flat=True)), {'live', 'live-revoked'})
+        self.assertEqual(list(BlacklistedToken.objects.values_list('token__jti', flat=True)), ['live-revoked'])
+
+    def test_nothing_to_prune(self):
+        self.token('live', 3600)
+
+        self.assertEqual(prune_expired_tokens(), 0)
+        self.assertEqual(OutstandingToken.objects.count(), 1)
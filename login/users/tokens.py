@@ -0,0 +1,189 @@
+"""
+Token validation and revocation helpers shared by the token endpoints.
+
+Other services verify access tokens locally with the shared signing key and
+only need the login service for what a signature cannot tell them: whether
+the token was revoked (blacklisted) and whether its user is still active.
+"""
+
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch, datetime_to_epoch
+
+from .models import User
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def _to_timestamp(value):
+    """Sub-second UNIX timestamp of a model datetime (aware, or naive local time with USE_TZ off)"""
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value.timestamp()
+
+
+def _from_timestamp(value):
+    moment = datetime.fromtimestamp(value, tz=dt_timezone.utc)
+    return moment if settings.USE_TZ else timezone.make_naive(moment)
+
+
+def validate_access_tokens(raw_tokens):
+    """
+    Validate many access tokens at once.
+
+    Signatures and expiry are checked in memory; blacklisted JTIs and user
+    status are each loaded with a single query for the whole batch.
+    Returns one result dict per token, in order.
+    """
+    results = [None] * len(raw_tokens)
+    decoded = {}
+    for position, raw_token in enumerate(raw_tokens):
+        try:
+            decoded[position] = AccessToken(raw_token)
+        except (TokenError, TypeError) as e:
+            results[position] = {'valid': False, 'error': str(e)}
+
+    jtis = {token['jti'] for token in decoded.values()}
+    user_ids = {token['user_id'] for token in decoded.values()}
+    revoked = set(
+        BlacklistedToken.objects.filter(token__jti__in=jtis).values_list('token__jti', flat=True)
+    ) if jtis else set()
+    users = {
+        str(user.id): user for user in
+        User.objects.filter(id__in=user_ids).only('id', 'email', 'first_name', 'last_name', 'is_active')
+    } if user_ids else {}
+
+    for position, token in decoded.items():
+        user = users.get(str(token['user_id']))
+        if token['jti'] in revoked:
+            results[position] = {'valid': False, 'error': 'Token has been revoked'}
+        elif user is None or not user.is_active:
+            results[position] = {'valid': False, 'error': 'User not found or inactive'}
+        else:
+            results[position] = {
+                'valid': True,
+                'user_id': user.id,
+                'email': user.email,
+                'username': user.email,
+                'first_name': user.first_name,
+                'last_name': user.last_name,
+                'jti': token['jti'],
+                'exp': token['exp'],
+            }
+    return results
+
+
+def revoke_access_token(token, user):
+    """Blacklist an access token so it shows up in the revocation feed"""
+    outstanding, _ = OutstandingToken.objects.get_or_create(
+        jti=token['jti'],
+        defaults={
+            'user': user,
+            'token': str(token),
+            'created_at': datetime_from_epoch(token['iat']) if 'iat' in token else None,
+            'expires_at': datetime_from_epoch(token['exp']),
+        }
+    )
+    BlacklistedToken.objects.get_or_create(token=outstanding)
+
+
+def _to_micros(value):
+    """Exact integer microseconds since the epoch, for keyset cursors"""
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value):
+    moment = EPOCH + timedelta(microseconds=value)
+    return moment if settings.USE_TZ else timezone.make_naive(moment)
+
+
+def _utcnow():
+    now = aware_utcnow()
+    # simplejwt stores naive UTC datetimes when time zones are off
+    return now if settings.USE_TZ else now.replace(tzinfo=None)
+
+
+def get_revocations(since=None, limit=1000, cursor=None):
+    """
+    Unexpired blacklisted tokens, oldest first.
+
+    Starts after `since` (a UNIX timestamp), or after `cursor` (the
+    `next_cursor` of a previous page) to continue a listing. Pages are keyed on
+    (blacklisted_at, id), so tokens blacklisted in the same instant are never
+    lost at a page boundary. Returns `(entries, next_since, next_cursor,
+    has_more)`; raises ValueError for a malformed cursor or a limit below 1.
+    """
+    if limit < 1:
+        raise ValueError('limit must be at least 1')
+
+    queryset = (
+        BlacklistedToken.objects.select_related('token')
+        .filter(token__expires_at__gt=_utcnow())
+        .order_by('blacklisted_at', 'id')
+    )
+    if cursor:
+        micros, _, last_id = cursor.partition('-')
+        blacklisted_at = _from_micros(int(micros))
+        queryset = queryset.filter(
+            Q(blacklisted_at__gt=blacklisted_at) | Q(blacklisted_at=blacklisted_at, id__gt=int(last_id))
+        )
+    elif since is not None:
+        queryset = queryset.filter(blacklisted_at__gt=_from_timestamp(since))
+
+    rows = list(queryset[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    entries = [{
+        'jti': row.token.jti,
+        'user_id': row.token.user_id,
+        'blacklisted_at': _to_timestamp(row.blacklisted_at),
+        'expires_at': datetime_to_epoch(row.token.expires_at),
+    } for row in rows]
+    if not rows:
+        # Nothing new: the caller keeps its own watermark (echoing `since` back would
+        # hand a client its overlap-adjusted request value as the new watermark)
+        return entries, None, None, has_more
+    last = rows[-1]
+    return entries, entries[-1]['blacklisted_at'], f'{_to_micros(last.blacklisted_at)}-{last.id}', has_more
+
+
+def prune_expired_tokens(batch_size=5000, pause=0.0, now=None, tokens=None):
+    """
+    Delete expired outstanding tokens and their blacklist entries in batches.
+
+    Every batch is its own short transaction found through the expires_at
+    index, so the job can run next to live traffic; `pause` seconds between
+    batches leave room for other writers. Expired tokens fail signature
+    validation anyway, so their blacklist entries are no longer needed.
+    `tokens` limits pruning to an OutstandingToken queryset (default: all).
+    Returns the number of outstanding tokens deleted.
+    """
+    tokens = OutstandingToken.objects.all() if tokens is None else tokens
+    now = now or aware_utcnow()
+    if not settings.USE_TZ:
+        # simplejwt stores naive UTC datetimes when time zones are off
+        now = now.replace(tzinfo=None)
+
+    deleted = 0
+    while True:
+        ids = list(
+            tokens.filter(expires_at__lt=now)
+            .order_by('expires_at')
+            .values_list('id', flat=True)[:batch_size]
+        )
+        if not ids:
+            return deleted
+        BlacklistedToken.objects.filter(token_id__in=ids).delete()
+        deleted += OutstandingToken.objects.filter(id__in=ids).delete()[0]
+        if pause:
+            time.sleep(pause)
@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import RequestVerificationCode, VerifyEmail, OnboardUser, LoginView, LogoutView, UserProfileView, CustomTokenRefreshView, health_check
+from .views import RequestVerificationCode, VerifyEmail, OnboardUser, LoginView, LogoutView, UserProfileView, CustomTokenRefreshView, ValidateTokenView, BulkValidateTokenView, TokenRevocationFeedView, health_check
 
 urlpatterns = [
     path('request-verification/', RequestVerificationCode.as_view(), name='request-verification'),
@@ -9,5 +9,8 @@ urlpatterns = [
     path('logout/', LogoutView.as_view(), name='logout'),
     path('profile/', UserProfileView.as_view(), name='user-profile'),
     path('token/refresh/', CustomTokenRefreshView.as_view(), name='token-refresh'),
+    path('validate-token/', ValidateTokenView.as_view(), name='validate-token'),
+    path('validate-tokens/', BulkValidateTokenView.as_view(), name='validate-tokens'),
+    path('token-revocations/', TokenRevocationFeedView.as_view(), name='token-revocations'),
     path('health/', health_check, name='health_check'),
 ]
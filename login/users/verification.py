@@ -0,0 +1,163 @@
+"""
+Verification Code Store
+
+Verification codes live for `VERIFICATION_CODES['TTL']` seconds. Two
+interchangeable backends are provided (selected by `VERIFICATION_CODES['BACKEND']`):
+
+- `DatabaseCodeStore` keeps codes in `EmailVerification`. Lookups use the
+  composite (email, code, created_at) index, and a sweeper deletes expired
+  rows in small batches every `SWEEP_INTERVAL` seconds, so the table only
+  holds codes issued within the last TTL and lookup cost stays flat.
+- `CacheCodeStore` keeps codes in the Django cache with the TTL as the cache
+  timeout; nothing needs sweeping. Use it with a shared cache (Redis) when
+  running several workers.
+
+`lookup` returns VALID, EXPIRED or MISSING. The cache backend cannot tell an
+expired code from a wrong one, so it never returns EXPIRED.
+"""
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import EmailVerification
+
+logger = logging.getLogger(__name__)
+
+VALID = 'valid'
+EXPIRED = 'expired'
+MISSING = 'missing'
+
+
+def verification_config():
+    return {
+        'BACKEND': 'users.verification.DatabaseCodeStore',
+        'TTL': 10 * 60,
+        'SWEEP_INTERVAL': 5 * 60,
+        'SWEEP_BATCH_SIZE': 1000,
+        **getattr(settings, 'VERIFICATION_CODES', {}),
+    }
+
+
+class DatabaseCodeStore:
+    """Verification codes in the EmailVerification table with a batched expiry sweeper"""
+
+    def __init__(self, config=None):
+        self.config = config or verification_config()
+        self._sweeper = None
+        self._lock = threading.Lock()
+
+    def cutoff(self):
+        return timezone.now() - timedelta(seconds=self.config['TTL'])
+
+    def issue(self, email, code):
+        self.start_sweeper()
+        EmailVerification.objects.create(email=email, code=code)
+
+    def lookup(self, email, code):
+        verification = (
+            EmailVerification.objects.filter(email=email, code=code)
+            .order_by('-created_at')
+            .values_list('created_at', flat=True)
+            .first()
+        )
+        if verification is None:
+            return MISSING
+        return VALID if verification >= self.cutoff() else EXPIRED
+
+    def discard(self, email, code):
+        EmailVerification.objects.filter(email=email, code=code).delete()
+
+    def discard_all(self, email):
+        EmailVerification.objects.filter(email=email).delete()
+
+    def sweep(self):
+        """Delete expired codes in batches; returns the number deleted"""
+        cutoff = self.cutoff()
+        batch_size = self.config['SWEEP_BATCH_SIZE']
+        deleted = 0
+        while True:
+            # Small batches keep each delete's locks short on a busy table
+            ids = list(
+                EmailVerification.objects.filter(created_at__lt=cutoff)
+                .values_list('id', flat=True)[:batch_size]
+            )
+            if not ids:
+                return deleted
+            deleted += EmailVerification.objects.filter(id__in=ids).delete()[0]
+
+    def _sweep_forever(self):
+        while True:
+            time.sleep(self.config['SWEEP_INTERVAL'])
+            try:
+                self.sweep()
+            except Exception:
+                logger.exception("Verification code sweep failed")
+            finally:
+                close_old_connections()
+
+    def start_sweeper(self):
+        """Start the background sweeper thread if it is not running yet"""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+        with self._lock:
+            if self._sweeper is None or not self._sweeper.is_alive():
+                self._sweeper = threading.Thread(
+                    target=self._sweep_forever, name='verification-sweeper', daemon=True
+                )
+                self._sweeper.start()
+
+
+class CacheCodeStore:
+    """Verification codes in the Django cache, expired by the cache timeout"""
+
+    def __init__(self, config=None):
+        self.config = config or verification_config()
+
+    def _code_key(self, email, code):
+        return f'verification:{email}:{code}'
+
+    def _codes_key(self, email):
+        return f'verification:{email}:codes'
+
+    def issue(self, email, code):
+        ttl = self.config['TTL']
+        codes = cache.get(self._codes_key(email), [])
+        cache.set_many({
+            self._code_key(email, code): True,
+            self._codes_key(email): codes + [code],
+        }, timeout=ttl)
+
+    def lookup(self, email, code):
+        return VALID if cache.get(self._code_key(email, code)) else MISSING
+
+    def discard(self, email, code):
+        cache.delete(self._code_key(email, code))
+
+    def discard_all(self, email):
+        codes = cache.get(self._codes_key(email), [])
+        cache.delete_many([self._code_key(email, code) for code in codes] + [self._codes_key(email)])
+
+    def sweep(self):
+        return 0
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_code_store():
+    """Return the process-wide verification code store"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(verification_config()['BACKEND'])()
+    return _store
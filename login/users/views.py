@@ -6,11 +6,17 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenRefreshView
 from rest_framework.decorators import api_view
 from .serializers import OnboardingSerializer, LoginSerializer
-from .models import EmailVerification, User
-from django.core.mail import send_mail
+from .authentication import ClaimsJWTAuthentication
+from .claims import tokens_for_user
+from .emails import VERIFICATION_SUBJECT, verification_email
+from .mailer import enqueue_email
+from .models import User
+from .passwords import PasswordHashingBusy
+from .permissions import IsInternalService
+from .ratelimit import check_rate_limit
+from .tokens import get_revocations, revoke_access_token, validate_access_tokens
+from .verification import EXPIRED, MISSING, get_code_store
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.utils.html import strip_tags
 from django.utils import timezone
 import random
 
@@ -27,6 +33,13 @@ def health_check(request):
     })
 
 
+def rate_limited_response(retry_after):
+    return Response({
+        'error': 'Too many requests. Please try again later.',
+        'retry_after': retry_after
+    }, status=status.HTTP_429_TOO_MANY_REQUESTS, headers={'Retry-After': str(retry_after)})
+
+
 class RequestVerificationCode(APIView):
     permission_classes = [AllowAny]
     
@@ -34,35 +47,28 @@ class RequestVerificationCode(APIView):
         email = request.data.get("email")
         if not email:
             return Response({"error": "Email is required"}, status=400)
+        
+        retry_after = check_rate_limit(request, 'verification', email=email)
+        if retry_after:
+            return rate_limited_response(retry_after)
 
         # Generate a random 6-digit code
         code = str(random.randint(100000, 999999))
         
-        # Save the verification code to database
-        EmailVerification.objects.create(email=email, code=code)
+        # Save the verification code (expires after VERIFICATION_CODES['TTL'])
+        code_store = get_code_store()
+        code_store.issue(email, code)
 
-        # Send the verification code via email
+        # Queue the verification email; the mail dispatcher sends it in the background
         try:
-            subject = 'Email Verification Code'
-            
-            # Render HTML email template
-            html_message = render_to_string('users/verification_email.html', {
-                'verification_code': code
-            })
-            
-            # Create plain text version
-            plain_message = strip_tags(html_message)
+            # HTML and plain text variants from the precompiled template
+            html_message, plain_message = verification_email.render(code)
             
-            from_email = settings.DEFAULT_FROM_EMAIL
-            recipient_list = [email]
-            
-            send_mail(
-                subject=subject,
-                message=plain_message,
-                from_email=from_email,
-                recipient_list=recipient_list,
-                html_message=html_message,
-                fail_silently=False,
+            enqueue_email(
+                to_email=email,
+                subject=VERIFICATION_SUBJECT,
+                text_body=plain_message,
+                html_body=html_message,
             )
             
             return Response({
@@ -71,8 +77,8 @@ class RequestVerificationCode(APIView):
             }, status=200)
             
         except Exception as e:
-            # If email sending fails, delete the verification code and return error
-            EmailVerification.objects.filter(email=email, code=code).delete()
+            # If queueing the email fails, delete the verification code and return error
+            code_store.discard(email, code)
             return Response({
                 "error": "Failed to send verification code. Please try again.",
                 "details": str(e)
@@ -90,29 +96,27 @@ class VerifyEmail(APIView):
                 "error": "Both email and verification code are required"
             }, status=400)
         
-        try:
-            # Find the verification record
-            verification = EmailVerification.objects.get(email=email, code=code)
-            
-            # Check if code is still valid
-            if not verification.is_valid():
-                verification.delete()
-                return Response({
-                    "error": "Verification code has expired. Please request a new one."
-                }, status=400)
-            
-            # Mark email as verified (you might want to add a field to User model for this)
-            # For now, we'll just delete the verification record
-            verification.delete()
-            
-            return Response({
-                "message": "Email verified successfully"
-            }, status=200)
-            
-        except EmailVerification.DoesNotExist:
+        # Find the verification code
+        code_store = get_code_store()
+        state = code_store.lookup(email, code)
+        
+        if state == MISSING:
             return Response({
                 "error": "Invalid verification code"
             }, status=400)
+        
+        # Mark email as verified (you might want to add a field to User model for this)
+        # For now, we'll just delete the verification code, expired or not
+        code_store.discard(email, code)
+        
+        if state == EXPIRED:
+            return Response({
+                "error": "Verification code has expired. Please request a new one."
+            }, status=400)
+        
+        return Response({
+            "message": "Email verified successfully"
+        }, status=200)
 
 class OnboardUser(APIView):
     permission_classes = [AllowAny]
@@ -124,7 +128,7 @@ class OnboardUser(APIView):
             
             # Delete the verification code after successful user creation
             email = request.data.get('email')
-            EmailVerification.objects.filter(email=email).delete()
+            get_code_store().discard_all(email)
             
             return Response({"message": "User onboarded", "user_id": user.id}, status=201)
         return Response(serializer.errors, status=400)
@@ -133,12 +137,24 @@ class LoginView(APIView):
     permission_classes = [AllowAny]
     
     def post(self, request):
+        # Throttle before any password hashing or database work
+        retry_after = check_rate_limit(request, 'login', email=request.data.get('email'))
+        if retry_after:
+            return rate_limited_response(retry_after)
+        
         serializer = LoginSerializer(data=request.data)
-        if serializer.is_valid():
+        try:
+            is_valid = serializer.is_valid()
+        except PasswordHashingBusy:
+            return Response({
+                'error': 'Too many login attempts in progress. Please retry shortly.'
+            }, status=status.HTTP_503_SERVICE_UNAVAILABLE, headers={'Retry-After': '1'})
+        
+        if is_valid:
             user = serializer.validated_data['user']
             
-            # Generate JWT tokens
-            refresh = RefreshToken.for_user(user)
+            # Generate JWT tokens carrying the user's profile claims
+            refresh = tokens_for_user(user)
             access_token = refresh.access_token
             
             return Response({
@@ -167,6 +183,9 @@ class LogoutView(APIView):
                 token = RefreshToken(refresh_token)
                 token.blacklist()
             
+            # Revoke the access token too; other services pick it up from the revocation feed
+            revoke_access_token(request.auth, request.user)
+            
             return Response({
                 'message': 'Logout successful'
             }, status=status.HTTP_200_OK)
@@ -176,6 +195,8 @@ class LogoutView(APIView):
             }, status=status.HTTP_400_BAD_REQUEST)
 
 class UserProfileView(APIView):
+    # Served from token claims; no user row is loaded per request
+    authentication_classes = [ClaimsJWTAuthentication]
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
@@ -203,3 +224,65 @@ class CustomTokenRefreshView(TokenRefreshView):
                 'error': 'Failed to refresh token',
                 'details': str(e)
             }, status=status.HTTP_400_BAD_REQUEST)
+
+class ValidateTokenView(APIView):
+    """Validate one access token (Authorization header or `token` in the body)"""
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    
+    def post(self, request):
+        raw_token = request.data.get('token')
+        if not raw_token:
+            header = request.META.get('HTTP_AUTHORIZATION', '')
+            if header.startswith('Bearer '):
+                raw_token = header.split(' ', 1)[1]
+        
+        if not raw_token:
+            return Response({'error': 'Token is required'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        result = validate_access_tokens([raw_token])[0]
+        if not result['valid']:
+            return Response(result, status=status.HTTP_401_UNAUTHORIZED)
+        return Response(result, status=status.HTTP_200_OK)
+
+class BulkValidateTokenView(APIView):
+    """Validate many access tokens in one request (service-to-service)"""
+    authentication_classes = []
+    permission_classes = [IsInternalService]
+    
+    def post(self, request):
+        tokens = request.data.get('tokens')
+        if not isinstance(tokens, list) or not tokens:
+            return Response({'error': 'tokens must be a non-empty list'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        max_tokens = getattr(settings, 'TOKEN_VALIDATION_MAX_BATCH', 500)
+        if len(tokens) > max_tokens:
+            return Response({'error': f'At most {max_tokens} tokens per request'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response({'results': validate_access_tokens(tokens)}, status=status.HTTP_200_OK)
+
+class TokenRevocationFeedView(APIView):
+    """Blacklisted token JTIs since a UNIX timestamp, for services keeping a local deny-list"""
+    authentication_classes = []
+    permission_classes = [IsInternalService]
+    
+    def get(self, request):
+        since = request.query_params.get('since')
+        try:
+            since = float(since) if since else None
+            limit = min(int(request.query_params.get('limit', 1000)), 1000)
+            entries, next_since, next_cursor, has_more = get_revocations(
+                since=since, limit=limit, cursor=request.query_params.get('cursor')
+            )
+        except ValueError:
+            return Response(
+                {'error': 'since must be a UNIX timestamp, limit a positive integer and cursor a next_cursor value'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({
+            'results': entries,
+            'next_since': next_since,
+            'next_cursor': next_cursor,
+            'has_more': has_more,
+        }, status=status.HTTP_200_OK)
@@ -0,0 +1 @@
+# Feed app
@@ -0,0 +1,10 @@
+from django.contrib import admin
+from .models import PostCategory
+
+
+@admin.register(PostCategory)
+class PostCategoryAdmin(admin.ModelAdmin):
+    list_display = ['post', 'category', 'created_at']
+    list_filter = ['category']
+    search_fields = ['post__description']
+    ordering = ['-created_at']
@@ -0,0 +1,152 @@
+"""
+Feed Page Cache
+
+Ranked feed pages are cached per user and feed plan in the feed store. Pages
+are not expired by short TTLs; instead every cache key embeds generation
+stamps that events bump:
+
+- a new post bumps the generation of each interest category it was tagged with
+- a like or comment bumps the engaging user's generation (their author affinity changed)
+- a follow or unfollow bumps the follower's generation
+- a post by a celebrity author (not fanned out) bumps that author's
+  generation, which is part of the key of every follower's page
+
+A bumped generation changes the key, so the old page is simply never read
+again. The last page built for a user/plan is also kept under a stable key:
+on a miss, one request takes a short lock and rebuilds while concurrent
+requests are served that stale page, so a popular user's cache miss never
+fans out into many simultaneous ranking runs.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+
+from django.db import close_old_connections
+
+from .config import feed_config
+from .store import get_store
+
+logger = logging.getLogger(__name__)
+
+HIT = 'hit'
+STALE = 'stale'
+MISS = 'miss'
+
+
+def _generation_key(scope, ident):
+    return f'feed:gen:{scope}:{ident}'
+
+
+def invalidate_user(user_id):
+    """Invalidate every cached feed page of one user"""
+    get_store().incr(_generation_key('user', user_id))
+
+
+def invalidate_users(user_ids, pipe):
+    """Queue invalidation of many users' feed pages on a store pipeline"""
+    for user_id in user_ids:
+        pipe.incr(_generation_key('user', user_id))
+
+
+def invalidate_author(author_id):
+    """Invalidate cached feed pages that pull this (celebrity) author's posts at read time"""
+    get_store().incr(_generation_key('author', author_id))
+
+
+def invalidate_categories(categories):
+    """Invalidate cached feed pages of every user interested in these categories"""
+    store = get_store()
+    for category in categories:
+        store.incr(_generation_key('category', category))
+
+
+class FeedCache:
+    """Per-user feed page cache with stale-while-revalidate rebuilds"""
+
+    def __init__(self, store=None):
+        self.store = store or get_store()
+        config = feed_config()
+        self.page_ttl = config.get('PAGE_CACHE_TTL', 24 * 60 * 60)
+        self.lock_ttl = config.get('PAGE_REBUILD_LOCK_TTL', 30)
+        self.wait_timeout = config.get('PAGE_REBUILD_WAIT', 2.0)
+
+    def _page_id(self, user_id, plan, page, limit, categories):
+        return f'{user_id}:{plan}:{page}:{limit}:' + ','.join(sorted(categories))
+
+    def page_key(self, user_id, plan, page, limit, categories, authors=()):
+        """
+        Key of the page for the current generation of the user, their
+        categories and the followed authors whose posts are pulled at read
+        time (celebrities, which are not fanned out)
+        """
+        generation_keys = [_generation_key('user', user_id)]
+        generation_keys += [_generation_key('category', category) for category in sorted(categories)]
+        generation_keys += [_generation_key('author', author_id) for author_id in sorted(authors)]
+        generations = ':'.join(value or '0' for value in self.store.mget(generation_keys))
+        digest = hashlib.sha1(generations.encode()).hexdigest()[:16]
+        return f'feed:page:{self._page_id(user_id, plan, page, limit, categories)}:{digest}'
+
+    def _last_key(self, page_id):
+        return f'feed:page:last:{page_id}'
+
+    def _lock_key(self, page_id):
+        return f'feed:page:lock:{page_id}'
+
+    def _store_page(self, key, page_id, data):
+        value = json.dumps(data, default=str)
+        self.store.set(key, value, ex=self.page_ttl)
+        self.store.set(self._last_key(page_id), value, ex=self.page_ttl)
+
+    def _rebuild(self, key, page_id, build):
+        try:
+            data = build()
+            self._store_page(key, page_id, data)
+            return data
+        finally:
+            self.store.delete(self._lock_key(page_id))
+
+    def _rebuild_in_background(self, key, page_id, build):
+        def run():
+            try:
+                self._rebuild(key, page_id, build)
+            except Exception:
+                logger.exception("Background feed rebuild failed for %s", page_id)
+            finally:
+                close_old_connections()
+
+        threading.Thread(target=run, daemon=True).start()
+
+    def get_or_build(self, user_id, plan, page, limit, categories, build, authors=()):
+        """
+        Return `(data, state)` for a feed page, calling `build()` only when this
+        request won the rebuild lock (or waited too long for another rebuild).
+        """
+        key = self.page_key(user_id, plan, page, limit, categories, authors)
+        cached = self.store.get(key)
+        if cached is not None:
+            return json.loads(cached), HIT
+
+        page_id = self._page_id(user_id, plan, page, limit, categories)
+        stale = self.store.get(self._last_key(page_id))
+        if self.store.set(self._lock_key(page_id), '1', ex=self.lock_ttl, nx=True):
+            if stale is not None:
+                self._rebuild_in_background(key, page_id, build)
+                return json.loads(stale), STALE
+            return self._rebuild(key, page_id, build), MISS
+
+        if stale is not None:
+            return json.loads(stale), STALE
+
+        # Another request is building the first page for this user; wait for it briefly
+        deadline = time.monotonic() + self.wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            cached = self.store.get(key)
+            if cached is not None:
+                return json.loads(cached), HIT
+        data = build()
+        self._store_page(key, page_id, data)
+        return data, MISS
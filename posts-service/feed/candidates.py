@@ -0,0 +1,216 @@
+"""
+Interest-Based Candidate Generation
+
+Posts are tagged with interest categories when they are written. Each category
+keeps a bounded, newest-first list of post IDs in the feed store, so building
+a candidate pool for a user is one bounded list read per selected interest.
+"""
+
+import json
+import logging
+
+from shared_auth.utils import call_service_api
+
+from posts.models import Post
+from .classifiers import get_classifier
+from .config import feed_config
+from .fanout import CELEBRITIES_KEY, inbox_key
+from .models import PostCategory
+from .store import get_store
+
+logger = logging.getLogger(__name__)
+
+
+def category_key(category):
+    """Store key of the recency-ordered post list for a category"""
+    return f'feed:category:{category}'
+
+
+def tag_post(post):
+    """Classify a new post and add it to its category lists"""
+    categories = get_classifier().classify(post.description)
+    if not categories:
+        return []
+
+    PostCategory.objects.bulk_create(
+        [PostCategory(post=post, category=category, created_at=post.created_at) for category in categories],
+        ignore_conflicts=True
+    )
+
+    list_size = feed_config().get('CATEGORY_LIST_SIZE', 500)
+    with get_store().pipeline() as pipe:
+        for category in categories:
+            key = category_key(category)
+            # Only extend a loaded list: a missing (expired or flushed) one is rebuilt from the
+            # database on its next read, which already includes this post
+            pipe.lpushx(key, str(post.id))
+            pipe.ltrim(key, 0, list_size - 1)
+            pipe.delete(empty_category_key(category))
+        pipe.execute()
+
+    return categories
+
+
+def category_list_ttl():
+    """
+    Seconds a category list is kept before it is rebuilt from the database.
+
+    A process-local store only sees posts tagged by its own worker, so its lists
+    expire after `CATEGORY_LIST_TTL` (default 300) seconds; a shared store keeps
+    them until evicted unless the setting is given.
+    """
+    config = feed_config()
+    if 'CATEGORY_LIST_TTL' in config:
+        return config['CATEGORY_LIST_TTL']
+    return None if config.get('STORE_URL') else 300
+
+
+def rebuild_category_list(category):
+    """Reload a category list from the database (cold start or store flush)"""
+    list_size = feed_config().get('CATEGORY_LIST_SIZE', 500)
+    post_ids = [
+        str(post_id) for post_id in
+        PostCategory.objects.filter(category=category)
+        .order_by('-created_at')
+        .values_list('post_id', flat=True)[:list_size]
+    ]
+
+    store = get_store()
+    key = category_key(category)
+    store.delete(key)
+    if post_ids:
+        # lpush prepends, so push oldest first to keep the list newest-first
+        store.lpush(key, *reversed(post_ids))
+        ttl = category_list_ttl()
+        if ttl:
+            store.expire(key, ttl)
+    return post_ids
+
+
+def empty_category_key(category):
+    """Store key marking a category with no posts, so reads skip the rebuild query"""
+    return f'feed:category:{category}:empty'
+
+
+def get_category_posts(category, limit):
+    """Return up to `limit` of the newest post IDs tagged with a category"""
+    store = get_store()
+    post_ids = store.lrange(category_key(category), 0, limit - 1)
+    if post_ids or store.get(empty_category_key(category)) is not None:
+        return post_ids
+
+    post_ids = rebuild_category_list(category)[:limit]
+    if not post_ids:
+        # tag_post clears this marker once a post arrives; until then query at most every EMPTY_CATEGORY_TTL seconds
+        store.set(empty_category_key(category), 1, ex=feed_config().get('EMPTY_CATEGORY_TTL', 60))
+    return post_ids
+
+
+def get_candidates(categories, per_category=None):
+    """
+    Build a candidate pool from the user's interest categories.
+
+    Lists are interleaved so every interest contributes its newest posts
+    before any interest contributes older ones; duplicates (posts tagged with
+    several of the user's categories) are kept once.
+    """
+    per_category = per_category or feed_config().get('CANDIDATES_PER_CATEGORY', 100)
+    lists = [get_category_posts(category, per_category) for category in categories]
+
+    candidates = []
+    seen = set()
+    for position in range(max((len(post_ids) for post_ids in lists), default=0)):
+        for post_ids in lists:
+            if position < len(post_ids) and post_ids[position] not in seen:
+                seen.add(post_ids[position])
+                candidates.append(post_ids[position])
+    return candidates
+
+
+def following_key(user_id):
+    """Store key of the cached list of users a user follows"""
+    return f'feed:following:{user_id}'
+
+
+def invalidate_following(user_id):
+    """Drop the cached following list of a user after a follow or unfollow"""
+    get_store().delete(following_key(user_id))
+
+
+def fetch_following(user_id):
+    """
+    User IDs followed by a user (first page), cached for `INTERESTS_CACHE_TTL`
+    seconds or until the user follows or unfollows someone. Only needed to
+    pull posts from followed celebrity authors.
+    """
+    store = get_store()
+    cache_key = following_key(user_id)
+    cached = store.get(cache_key)
+    if cached is not None:
+        return json.loads(cached)
+
+    response = call_service_api('profile', f'/api/follows/following/?user_id={user_id}&limit=1000')
+    if response is None or response.status_code != 200:
+        logger.warning("Could not load followed users from profile service")
+        return []
+
+    following = response.json().get('results', [])
+    store.set(cache_key, json.dumps(following), ex=feed_config().get('INTERESTS_CACHE_TTL', 300))
+    return following
+
+
+def followed_celebrities(user_id):
+    """Followed authors whose posts are pulled at read time instead of fanned out"""
+    celebrities = get_store().smembers(CELEBRITIES_KEY)
+    if not celebrities:
+        return set()
+    return celebrities.intersection(str(followed_id) for followed_id in fetch_following(user_id))
+
+
+def get_following_candidates(user_id, limit=None):
+    """
+    Candidates from followed authors: the user's fanned-out inbox plus recent
+    posts of followed celebrity authors, which are not fanned out on write.
+    """
+    limit = limit or feed_config().get('INBOX_SIZE', 500)
+    post_ids = get_store().lrange(inbox_key(user_id), 0, limit - 1)
+
+    celebrities = followed_celebrities(user_id)
+    if celebrities:
+        post_ids += [
+            str(post_id) for post_id in
+            Post.objects.filter(user_id__in=celebrities)
+            .order_by('-created_at')
+            .values_list('id', flat=True)[:limit]
+        ]
+    return post_ids
+
+
+def fetch_user_categories(token, user_id=None):
+    """
+    Get the interest categories selected by the token's user from the profile service.
+
+    When `user_id` is given the result is kept in the feed store for
+    `INTERESTS_CACHE_TTL` seconds so repeated feed reads skip the HTTP call.
+    """
+    store = get_store()
+    cache_key = f'feed:interests:{user_id}'
+    if user_id is not None:
+        cached = store.get(cache_key)
+        if cached is not None:
+            return json.loads(cached)
+
+    response = call_service_api('profile', '/api/profiles/my_profile/', token=token)
+    if response is None or response.status_code != 200:
+        logger.warning("Could not load interests from profile service")
+        return []
+
+    categories = []
+    for user_interest in response.json().get('user_interests', []):
+        category = user_interest.get('interest', {}).get('category')
+        if category and category not in categories:
+            categories.append(category)
+
+    if user_id is not None:
+        store.set(cache_key, json.dumps(categories), ex=feed_config().get('INTERESTS_CACHE_TTL', 300))
+    return categories
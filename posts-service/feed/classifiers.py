@@ -0,0 +1,98 @@
+"""
+Post Interest Classifiers
+
+Classifiers map a post description to interest category keys. The keys match
+`Interest.INTEREST_CATEGORIES` in the profile service, so a user's selected
+interests can be used directly to look up candidate posts.
+
+The keyword classifier is a stand-in until a model-backed classifier is
+available; any class implementing `classify(text)` can be configured through
+`FEED_CONFIG['CLASSIFIER']`.
+"""
+
+import re
+from collections import Counter
+
+from django.utils.module_loading import import_string
+
+from .config import feed_config
+
+
+INTEREST_KEYWORDS = {
+    'technology': ['tech', 'technology', 'programming', 'code', 'coding', 'software', 'developer',
+                   'python', 'javascript', 'ai', 'app', 'apps', 'computer', 'gadget', 'startup'],
+    'sports': ['sport', 'sports', 'football', 'soccer', 'basketball', 'tennis', 'cricket',
+               'match', 'goal', 'team', 'league', 'swimming', 'marathon'],
+    'music': ['music', 'song', 'songs', 'album', 'concert', 'band', 'guitar', 'piano',
+              'jazz', 'rock', 'pop', 'playlist', 'singer'],
+    'travel': ['travel', 'trip', 'vacation', 'holiday', 'flight', 'beach', 'backpacking',
+               'hotel', 'tour', 'journey', 'abroad'],
+    'food': ['food', 'recipe', 'cooking', 'cook', 'baking', 'bake', 'dinner', 'lunch',
+             'breakfast', 'restaurant', 'delicious', 'cuisine', 'wine'],
+    'art': ['art', 'painting', 'drawing', 'sketch', 'design', 'sculpture', 'gallery',
+            'artist', 'illustration'],
+    'fashion': ['fashion', 'outfit', 'style', 'dress', 'shoes', 'clothing', 'wardrobe',
+                'vintage', 'accessories'],
+    'gaming': ['game', 'games', 'gaming', 'gamer', 'playstation', 'xbox', 'nintendo',
+               'esports', 'console', 'steam'],
+    'fitness': ['fitness', 'workout', 'gym', 'exercise', 'health', 'yoga', 'running',
+                'training', 'cardio', 'diet', 'wellness'],
+    'books': ['book', 'books', 'reading', 'novel', 'author', 'chapter', 'library', 'poetry'],
+    'movies': ['movie', 'movies', 'film', 'cinema', 'series', 'tv', 'netflix', 'episode',
+               'trailer', 'actor'],
+    'photography': ['photo', 'photos', 'photography', 'camera', 'lens', 'shot', 'portrait',
+                    'landscape', 'photographer'],
+    'nature': ['nature', 'outdoors', 'hiking', 'hike', 'mountain', 'mountains', 'forest',
+               'camping', 'wildlife', 'sunset', 'river', 'lake'],
+    'business': ['business', 'finance', 'money', 'invest', 'investing', 'stocks', 'market',
+                 'entrepreneur', 'economy', 'crypto'],
+    'education': ['education', 'learning', 'learn', 'school', 'university', 'course',
+                  'study', 'student', 'teacher', 'tutorial'],
+    'politics': ['politics', 'election', 'vote', 'government', 'policy', 'president',
+                 'parliament', 'democracy', 'senate'],
+    'science': ['science', 'research', 'physics', 'chemistry', 'biology', 'space',
+                'experiment', 'astronomy', 'scientist'],
+    'history': ['history', 'historical', 'ancient', 'war', 'museum', 'heritage', 'century'],
+    'languages': ['language', 'languages', 'spanish', 'french', 'german', 'grammar',
+                  'vocabulary', 'translation', 'linguistics'],
+    'crafts': ['craft', 'crafts', 'diy', 'handmade', 'knitting', 'sewing', 'woodworking',
+               'pottery'],
+}
+
+INTEREST_CATEGORY_KEYS = list(INTEREST_KEYWORDS.keys())
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+class KeywordClassifier:
+    """Assign categories by counting keyword hits in the post description"""
+
+    def __init__(self, keywords=None, max_categories=3):
+        keywords = keywords or INTEREST_KEYWORDS
+        self.max_categories = max_categories
+        # word -> categories, built once so classification is a single pass over the text
+        self._index = {}
+        for category, words in keywords.items():
+            for word in words:
+                self._index.setdefault(word, []).append(category)
+
+    def classify(self, text):
+        """Return the best matching category keys for the given text"""
+        hits = Counter()
+        for word in _WORD_RE.findall((text or '').lower()):
+            for category in self._index.get(word, ()):
+                hits[category] += 1
+        return [category for category, _ in hits.most_common(self.max_categories)]
+
+
+_classifier = None
+
+
+def get_classifier():
+    """Return the configured classifier instance"""
+    global _classifier
+    if _classifier is None:
+        config = feed_config()
+        classifier_path = config.get('CLASSIFIER', 'feed.classifiers.KeywordClassifier')
+        _classifier = import_string(classifier_path)()
+    return _classifier
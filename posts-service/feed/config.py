@@ -0,0 +1,6 @@
+from django.conf import settings
+
+
+def feed_config():
+    """The FEED_CONFIG settings dict; every key is optional and read with its default at the call site"""
+    return getattr(settings, 'FEED_CONFIG', {})
@@ -0,0 +1,306 @@
+"""
+Feed Fan-Out
+
+When a post is created its ID has to reach the feed inbox of every follower of
+the author. Doing that inside `PostViewSet.perform_create` would make post
+creation O(followers), so the view only enqueues a job and a pool of worker
+threads delivers the post in batches:
+
+1. A job holds (author, post, follower cursor). A worker fetches one page of
+   followers from the profile service, pushes the post onto each follower's
+   bounded inbox list and re-enqueues the job with the next cursor, so large
+   fan-outs are interleaved with other posts instead of blocking the pool.
+   A batch's inbox writes and page invalidations go out in one pipeline. A
+   batch that failed on a transport error or a 5xx goes back on the queue
+   with a `retry_at` and exponential backoff, and is dropped only after
+   `FANOUT_MAX_ATTEMPTS`, so followers after its cursor are not silently
+   skipped. A 404 (the author has no profile) is an empty follower page; other
+   4xx answers will not change on retry and drop the batch at once.
+2. Authors with more than `CELEBRITY_FOLLOWER_THRESHOLD` followers are not
+   fanned out at all. They are recorded in a celebrity set and their posts
+   are pulled at read time by followers (fan-out-on-read).
+
+The queue is process-local by default (used by tests and single-process
+development); with `FANOUT_QUEUE = 'store'` jobs go through a list in the feed
+store so any worker process sharing the Redis store can pick them up.
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+
+from django.db import close_old_connections
+
+from shared_auth.utils import call_service_api
+
+from .cache import invalidate_author, invalidate_users
+from .config import feed_config
+from .store import get_store
+
+logger = logging.getLogger(__name__)
+
+
+class FanoutRejected(Exception):
+    """The profile service refused a followers request; retrying would not help"""
+
+CELEBRITIES_KEY = 'feed:celebrities'
+
+
+def inbox_key(user_id):
+    """Store key of a user's newest-first inbox of fanned-out post IDs"""
+    return f'feed:inbox:{user_id}'
+
+
+class LocalQueue:
+    """In-process FIFO job queue"""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def put(self, job):
+        self._queue.put(job)
+
+    def get(self, timeout=1.0):
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def oldest(self):
+        with self._queue.mutex:
+            return self._queue.queue[0] if self._queue.queue else None
+
+
+class StoreQueue:
+    """FIFO job queue kept as a list in the feed store, shared between processes"""
+
+    key = 'feed:fanout:queue'
+
+    def __init__(self, store=None):
+        self.store = store or get_store()
+
+    def put(self, job):
+        self.store.lpush(self.key, json.dumps(job))
+
+    def get(self, timeout=1.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            value = self.store.rpop(self.key)
+            if value is not None:
+                return json.loads(value)
+            if time.monotonic() >= deadline:
+                return None
+            time.sleep(0.05)
+
+    def __len__(self):
+        return self.store.llen(self.key)
+
+    def oldest(self):
+        value = self.store.lindex(self.key, -1)
+        return json.loads(value) if value is not None else None
+
+
+class FanoutScheduler:
+    """Batches feed insertions for new posts onto a pool of worker threads"""
+
+    def __init__(self, job_queue=None, store=None, workers=None, batch_size=None,
+                 celebrity_threshold=None, start_workers=True):
+        config = feed_config()
+        self.queue = job_queue if job_queue is not None else LocalQueue()
+        self.store = store or get_store()
+        self.workers = workers or config.get('FANOUT_WORKERS', 4)
+        self.batch_size = batch_size or config.get('FANOUT_BATCH_SIZE', 500)
+        self.celebrity_threshold = celebrity_threshold or config.get('CELEBRITY_FOLLOWER_THRESHOLD', 10000)
+        self.inbox_size = config.get('INBOX_SIZE', 500)
+        self.max_attempts = config.get('FANOUT_MAX_ATTEMPTS', 5)
+        self.retry_base_delay = config.get('FANOUT_RETRY_BASE_DELAY', 5)
+        self.retry_max_delay = config.get('FANOUT_RETRY_MAX_DELAY', 5 * 60)
+        # Tests pass start_workers=False and drain the queue with run_pending()
+        self.start_workers = start_workers
+        self.processed_batches = 0
+        self.delivered = 0
+        self.celebrity_posts = 0
+        self.failed_batches = 0
+        self.retried_batches = 0
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def schedule(self, post):
+        """Enqueue fan-out of a new post; returns immediately"""
+        self.queue.put({
+            'author_id': str(post.user_id),
+            'post_id': str(post.id),
+            'cursor': 0,
+            'enqueued_at': time.time(),
+        })
+        if self.start_workers:
+            self.start()
+
+    def start(self):
+        """Start the worker threads if they are not running yet"""
+        with self._lock:
+            self._threads = [thread for thread in self._threads if thread.is_alive()]
+            while len(self._threads) < self.workers:
+                thread = threading.Thread(target=self._work, name='feed-fanout', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                continue
+            if not self.is_due(job):
+                # Waiting for a retry: back to the end of the queue
+                self.queue.put(job)
+                time.sleep(min(job['retry_at'] - time.time(), 0.1))
+                continue
+            try:
+                self.process(job)
+            except FanoutRejected:
+                self.give_up(job)
+            except Exception:
+                self.retry(job)
+            finally:
+                close_old_connections()
+
+    @staticmethod
+    def is_due(job):
+        return job.get('retry_at', 0) <= time.time()
+
+    def retry(self, job):
+        """
+        Re-enqueue a failed batch with exponential backoff, like the login
+        mailer, so followers after its cursor still get the post. Called from
+        an exception handler; gives up after `max_attempts`.
+        """
+        attempts = job.get('attempts', 0) + 1
+        if attempts >= self.max_attempts:
+            self.give_up(job)
+            return
+
+        delay = min(self.retry_base_delay * 2 ** (attempts - 1), self.retry_max_delay)
+        logger.warning(
+            "Feed fan-out of post %s failed (attempt %s), retrying in %ss",
+            job.get('post_id'), attempts, delay, exc_info=True
+        )
+        with self._lock:
+            self.retried_batches += 1
+        self.queue.put(dict(job, attempts=attempts, retry_at=time.time() + delay))
+
+    def give_up(self, job):
+        """Drop a failed batch; called from an exception handler"""
+        with self._lock:
+            self.failed_batches += 1
+        logger.exception(
+            "Giving up on feed fan-out of post %s at cursor %s", job.get('post_id'), job.get('cursor')
+        )
+
+    def fetch_followers(self, author_id, cursor):
+        """
+        One page of the author's followers from the profile service.
+
+        A 404 means the author has no profile (yet, or any more) and is read
+        as no followers. Raises FanoutRejected for other 4xx answers and
+        RuntimeError for transport errors and 5xx, which are retried.
+        """
+        response = call_service_api(
+            'profile',
+            f'/api/follows/followers/?user_id={author_id}&cursor={cursor}&limit={self.batch_size}'
+        )
+        if response is not None and response.status_code == 404:
+            return {'count': 0, 'results': [], 'next_cursor': None}
+        if response is not None and 400 <= response.status_code < 500:
+            raise FanoutRejected(f"Profile service rejected followers of {author_id}: {response.status_code}")
+        if response is None or response.status_code != 200:
+            raise RuntimeError(f"Could not load followers of {author_id}")
+        return response.json()
+
+    def process(self, job):
+        """Deliver one batch of a job and re-enqueue the remainder"""
+        page = self.fetch_followers(job['author_id'], job['cursor'])
+
+        if job['cursor'] == 0:
+            if page.get('count', 0) > self.celebrity_threshold:
+                # Followers pull this author's posts at read time instead; their
+                # cached pages include the author's generation
+                self.store.sadd(CELEBRITIES_KEY, job['author_id'])
+                invalidate_author(job['author_id'])
+                with self._lock:
+                    self.celebrity_posts += 1
+                return
+            self.store.srem(CELEBRITIES_KEY, job['author_id'])
+
+        # One round trip per batch instead of three per follower
+        followers = page.get('results', [])
+        pipe = self.store.pipeline(transaction=False)
+        for follower_id in followers:
+            key = inbox_key(follower_id)
+            pipe.lpush(key, job['post_id'])
+            pipe.ltrim(key, 0, self.inbox_size - 1)
+        invalidate_users(followers, pipe)
+        pipe.execute()
+
+        with self._lock:
+            self.processed_batches += 1
+            self.delivered += len(page.get('results', []))
+
+        if page.get('next_cursor'):
+            self.queue.put(dict(job, cursor=page['next_cursor']))
+
+    def run_pending(self):
+        """Process due jobs in the calling thread until only jobs waiting for a retry are left"""
+        while True:
+            progressed = False
+            for _ in range(len(self.queue)):
+                job = self.queue.get(timeout=0)
+                if job is None:
+                    break
+                if not self.is_due(job):
+                    self.queue.put(job)
+                    continue
+                progressed = True
+                try:
+                    self.process(job)
+                except FanoutRejected:
+                    self.give_up(job)
+                except Exception:
+                    self.retry(job)
+            if not progressed:
+                return
+
+    def stats(self):
+        """Queue depth and lag (age of the oldest pending job) for monitoring"""
+        oldest = self.queue.oldest()
+        return {
+            'queue_depth': len(self.queue),
+            'lag_seconds': round(time.time() - oldest['enqueued_at'], 3) if oldest else 0.0,
+            'workers': len([thread for thread in self._threads if thread.is_alive()]),
+            'processed_batches': self.processed_batches,
+            'failed_batches': self.failed_batches,
+            'retried_batches': self.retried_batches,
+            'delivered': self.delivered,
+            'celebrity_posts': self.celebrity_posts,
+        }
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_fanout_scheduler():
+    """Return the process-wide fan-out scheduler"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                if feed_config().get('FANOUT_QUEUE', 'local') == 'store':
+                    _scheduler = FanoutScheduler(job_queue=StoreQueue())
+                else:
+                    _scheduler = FanoutScheduler()
+    return _scheduler
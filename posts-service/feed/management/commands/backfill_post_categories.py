@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from posts.models import Post
+from feed.candidates import tag_post
+from feed.models import PostCategory
+
+
+class Command(BaseCommand):
+    help = 'Tag existing posts with interest categories and rebuild category lists'
+    
+    def handle(self, *args, **options):
+        """Tag every post that has no categories yet, oldest first"""
+        untagged = Post.objects.exclude(
+            id__in=PostCategory.objects.values('post_id')
+        ).order_by('created_at')
+        
+        tagged_count = 0
+        for post in untagged.iterator(chunk_size=500):
+            if tag_post(post):
+                tagged_count += 1
+        
+        self.stdout.write(
+            self.style.SUCCESS(f'Tagged {tagged_count} posts with interest categories')
+        )
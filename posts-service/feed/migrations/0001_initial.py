@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('posts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostCategory',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(help_text='Interest category key from the profile service', max_length=50)),
+                ('created_at', models.DateTimeField(help_text='Copy of the post creation time for recency ordering')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='categories', to='posts.post')),
+            ],
+            options={
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['category', '-created_at'], name='feed_postca_categor_54519d_idx')],
+                'unique_together': {('post', 'category')},
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:49
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0001_initial'),
+        ('feed', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostStats',
+            fields=[
+                ('post', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='posts.post')),
+                ('like_count', models.PositiveIntegerField(default=0)),
+                ('comment_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Post Stats',
+                'verbose_name_plural': 'Post Stats',
+            },
+        ),
+        migrations.CreateModel(
+            name='AuthorAffinity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_id', models.CharField(help_text='User ID of the viewer', max_length=100)),
+                ('author_id', models.CharField(help_text='User ID of the post author', max_length=100)),
+                ('score', models.FloatField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Author Affinity',
+                'verbose_name_plural': 'Author Affinities',
+                'unique_together': {('user_id', 'author_id')},
+            },
+        ),
+    ]
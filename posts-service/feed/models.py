@@ -0,0 +1,53 @@
+from django.db import models
+from posts.models import Post
+
+
+class PostCategory(models.Model):
+    """Interest category assigned to a post at write time"""
+
+    post = models.ForeignKey(Post, on_delete=models.CASCADE, related_name='categories')
+    category = models.CharField(max_length=50, help_text="Interest category key from the profile service")
+    created_at = models.DateTimeField(help_text="Copy of the post creation time for recency ordering")
+
+    class Meta:
+        unique_together = ['post', 'category']
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['category', '-created_at']),
+        ]
+
+    def __str__(self):
+        return f"{self.category} - Post #{self.post.post_number}"
+
+
+class PostStats(models.Model):
+    """Engagement counters for a post, maintained from like/comment events"""
+
+    post = models.OneToOneField(Post, on_delete=models.CASCADE, primary_key=True, related_name='stats')
+    like_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Post Stats'
+        verbose_name_plural = 'Post Stats'
+
+    def __str__(self):
+        return f"Post #{self.post.post_number}: {self.like_count} likes, {self.comment_count} comments"
+
+
+class AuthorAffinity(models.Model):
+    """How strongly a user engages with an author's posts"""
+
+    user_id = models.CharField(max_length=100, help_text="User ID of the viewer")
+    author_id = models.CharField(max_length=100, help_text="User ID of the post author")
+    score = models.FloatField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ['user_id', 'author_id']
+        verbose_name = 'Author Affinity'
+        verbose_name_plural = 'Author Affinities'
+
+    def __str__(self):
+        return f"{self.user_id} -> {self.author_id}: {self.score}"
@@ -0,0 +1,182 @@
+"""
+Feed Ranking
+
+Second stage of the feed pipeline. Candidate features are loaded with a few
+flat queries into NumPy arrays and scored in a single vectorized pass against
+a weight vector selected by the feed plan. A diversity re-ranker then walks
+the sorted candidates once, capping how many posts each author and each
+interest category can place on a page.
+"""
+
+import math
+
+import numpy as np
+from django.db.models import F
+from django.utils import timezone
+
+from posts.models import Post
+from .config import feed_config
+from .models import AuthorAffinity, PostCategory, PostStats
+
+
+FEATURES = ('recency', 'likes', 'comments', 'affinity', 'interest_match')
+
+DEFAULT_PLANS = {
+    'default': {'recency': 1.0, 'likes': 0.3, 'comments': 0.4, 'affinity': 0.6, 'interest_match': 0.8},
+    'latest': {'recency': 3.0, 'likes': 0.05, 'comments': 0.05, 'affinity': 0.2, 'interest_match': 0.3},
+    'popular': {'recency': 0.5, 'likes': 1.0, 'comments': 0.8, 'affinity': 0.2, 'interest_match': 0.4},
+}
+
+
+def get_plans():
+    """Available feed plans mapped to their feature weights"""
+    return feed_config().get('RANKING_PLANS', DEFAULT_PLANS)
+
+
+def get_weights(plan='default'):
+    """Weight vector for a feed plan, ordered like FEATURES"""
+    plans = get_plans()
+    if plan not in plans:
+        raise KeyError(f"Unknown feed plan: {plan}")
+    weights = plans[plan]
+    return np.array([weights.get(feature, 0.0) for feature in FEATURES], dtype=np.float32)
+
+
+class CandidateSet:
+    """Feature matrix for a batch of candidate posts plus the metadata needed to re-rank"""
+
+    def __init__(self, post_ids, author_ids, categories, features):
+        self.post_ids = post_ids
+        self.author_ids = author_ids
+        self.categories = categories
+        self.features = features
+
+    def __len__(self):
+        return len(self.post_ids)
+
+
+def build_features(ages_hours, like_counts, comment_counts, affinities, interest_matches):
+    """Stack raw per-candidate values into a normalized (n, len(FEATURES)) matrix"""
+    half_life = feed_config().get('RECENCY_HALF_LIFE_HOURS', 24)
+    features = np.empty((len(ages_hours), len(FEATURES)), dtype=np.float32)
+    features[:, 0] = np.exp(-math.log(2) * np.maximum(ages_hours, 0) / half_life)
+    features[:, 1] = np.log1p(like_counts)
+    features[:, 2] = np.log1p(comment_counts)
+    features[:, 3] = np.log1p(affinities)
+    features[:, 4] = interest_matches
+    return features
+
+
+def load_candidates(post_ids, user_id, user_categories=()):
+    """Load features for the candidate posts with one query per feature source"""
+    rows = list(
+        Post.objects.filter(id__in=post_ids)
+        .values_list('id', 'user_id', 'created_at', 'stats__like_count', 'stats__comment_count')
+    )
+    count = len(rows)
+    ids = [str(row[0]) for row in rows]
+    author_ids = [row[1] for row in rows]
+
+    now = timezone.now().timestamp()
+    ages_hours = (now - np.fromiter((row[2].timestamp() for row in rows), dtype=np.float64, count=count)) / 3600
+    like_counts = np.fromiter((row[3] or 0 for row in rows), dtype=np.float32, count=count)
+    comment_counts = np.fromiter((row[4] or 0 for row in rows), dtype=np.float32, count=count)
+
+    affinity_by_author = dict(
+        AuthorAffinity.objects.filter(user_id=user_id, author_id__in=set(author_ids))
+        .values_list('author_id', 'score')
+    )
+    affinities = np.fromiter((affinity_by_author.get(author, 0.0) for author in author_ids), dtype=np.float32, count=count)
+
+    categories_by_post = {}
+    for post_id, category in PostCategory.objects.filter(post_id__in=ids).values_list('post_id', 'category'):
+        categories_by_post.setdefault(str(post_id), []).append(category)
+
+    wanted = set(user_categories)
+    interest_matches = np.fromiter(
+        (len(wanted.intersection(categories_by_post.get(post_id, ()))) for post_id in ids),
+        dtype=np.float32, count=count
+    ) / max(len(wanted), 1)
+
+    primary_categories = [categories_by_post.get(post_id, [None])[0] for post_id in ids]
+    features = build_features(ages_hours, like_counts, comment_counts, affinities, interest_matches)
+    return CandidateSet(ids, author_ids, primary_categories, features)
+
+
+def score(features, weights):
+    """Score every candidate in one matrix-vector product"""
+    return features @ weights
+
+
+def diversify(order, author_ids, categories, limit, max_per_author=None, max_per_category=None):
+    """
+    Pick up to `limit` candidates from `order` (best first) while capping how
+    many come from the same author or the same interest category.
+
+    Candidates skipped by a cap are used to fill the page if there are not
+    enough diverse candidates, so a page is never shorter than it has to be.
+    """
+    config = feed_config()
+    max_per_author = max_per_author or config.get('MAX_POSTS_PER_AUTHOR', 2)
+    max_per_category = max_per_category or config.get('MAX_POSTS_PER_CATEGORY', 4)
+
+    selected = []
+    skipped = []
+    per_author = {}
+    per_category = {}
+    for index in order:
+        if len(selected) >= limit:
+            break
+        author = author_ids[index]
+        category = categories[index]
+        if per_author.get(author, 0) >= max_per_author or (
+            category is not None and per_category.get(category, 0) >= max_per_category
+        ):
+            skipped.append(index)
+            continue
+        per_author[author] = per_author.get(author, 0) + 1
+        if category is not None:
+            per_category[category] = per_category.get(category, 0) + 1
+        selected.append(index)
+
+    if len(selected) < limit:
+        selected.extend(skipped[:limit - len(selected)])
+    return selected
+
+
+def rank(candidates, plan='default', limit=20):
+    """Rank a CandidateSet and return the post IDs for one page, best first"""
+    if not len(candidates):
+        return []
+
+    scores = score(candidates.features, get_weights(plan))
+    # Only the head of the ranking can reach the page, so avoid a full sort
+    head = min(len(scores), limit * feed_config().get('RERANK_WINDOW', 10))
+    top = np.argpartition(-scores, head - 1)[:head]
+    order = top[np.argsort(-scores[top], kind='stable')]
+
+    selected = diversify(order.tolist(), candidates.author_ids, candidates.categories, limit)
+    return [candidates.post_ids[index] for index in selected]
+
+
+def record_engagement(event, post, user_id):
+    """Apply a like/comment event to post counters and the user's author affinity"""
+    deltas = {
+        'like': ('like_count', 1),
+        'unlike': ('like_count', -1),
+        'comment': ('comment_count', 1),
+        'uncomment': ('comment_count', -1),
+    }
+    if event not in deltas:
+        raise ValueError(f"Unknown engagement event: {event}")
+
+    field, delta = deltas[event]
+    # Decrements never take a counter below zero (e.g. a replayed unlike event)
+    stats, _ = PostStats.objects.get_or_create(post=post)
+    floor = {f'{field}__gte': -delta} if delta < 0 else {}
+    PostStats.objects.filter(pk=stats.pk, **floor).update(**{field: F(field) + delta})
+
+    if str(user_id) != str(post.user_id):
+        affinity, _ = AuthorAffinity.objects.get_or_create(user_id=str(user_id), author_id=post.user_id)
+        floor = {'score__gte': -delta} if delta < 0 else {}
+        AuthorAffinity.objects.filter(pk=affinity.pk, **floor).update(score=F('score') + delta)
@@ -0,0 +1,244 @@
+"""
+Feed Store
+
+Feed data (per-category post lists, per-user inboxes, cached pages) lives in a
+key/value store with a Redis-compatible interface. When `FEED_CONFIG['STORE_URL']`
+points at a Redis server the redis-py client is used directly; otherwise a
+process-local in-memory store implementing the same subset of commands is used,
+which is what tests and single-process development run against. Each process
+then has its own copy, so category lists expire and are rebuilt from the
+database (see `CATEGORY_LIST_TTL`) to keep several workers from drifting apart.
+"""
+
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+from .config import feed_config
+
+logger = logging.getLogger(__name__)
+
+
+class LocalStore:
+    """
+    In-memory store implementing the subset of Redis commands used by the feed.
+
+    Values are stored as strings, like a Redis client created with
+    `decode_responses=True`. All commands are guarded by a single lock so the
+    store can be shared between request threads and background workers.
+    """
+
+    def __init__(self):
+        self._data = {}
+        self._expires = {}
+        self._lock = threading.RLock()
+
+    def _expired(self, key):
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(key, None)
+            self._expires.pop(key, None)
+            return True
+        return False
+
+    def _get_list(self, key, create=False):
+        if self._expired(key) and not create:
+            return None
+        value = self._data.get(key)
+        if value is None and create:
+            value = self._data[key] = []
+        return value
+
+    # Strings
+
+    def get(self, key):
+        with self._lock:
+            if self._expired(key):
+                return None
+            return self._data.get(key)
+
+    def mget(self, keys):
+        with self._lock:
+            return [None if self._expired(key) else self._data.get(key) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        with self._lock:
+            self._expired(key)
+            if nx and key in self._data:
+                return None
+            self._data[key] = str(value)
+            if ex:
+                self._expires[key] = time.monotonic() + ex
+            else:
+                self._expires.pop(key, None)
+            return True
+
+    def incr(self, key, amount=1):
+        with self._lock:
+            self._expired(key)
+            value = int(self._data.get(key, 0)) + amount
+            self._data[key] = str(value)
+            return value
+
+    def expire(self, key, seconds):
+        with self._lock:
+            if self._expired(key) or key not in self._data:
+                return False
+            self._expires[key] = time.monotonic() + seconds
+            return True
+
+    def delete(self, *keys):
+        with self._lock:
+            removed = 0
+            for key in keys:
+                if key in self._data:
+                    removed += 1
+                self._data.pop(key, None)
+                self._expires.pop(key, None)
+            return removed
+
+    # Lists
+
+    def lpush(self, key, *values):
+        with self._lock:
+            items = self._get_list(key, create=True)
+            for value in values:
+                items.insert(0, str(value))
+            return len(items)
+
+    def lpushx(self, key, *values):
+        with self._lock:
+            items = self._get_list(key)
+            if items is None:
+                return 0
+            for value in values:
+                items.insert(0, str(value))
+            return len(items)
+
+    def ltrim(self, key, start, end):
+        with self._lock:
+            items = self._get_list(key)
+            if items is not None:
+                items[:] = items[start:self._stop(end)]
+            return True
+
+    def lrange(self, key, start, end):
+        with self._lock:
+            items = self._get_list(key)
+            if not items:
+                return []
+            return items[start:self._stop(end)]
+
+    def rpop(self, key):
+        with self._lock:
+            items = self._get_list(key)
+            return items.pop() if items else None
+
+    def lindex(self, key, index):
+        with self._lock:
+            items = self._get_list(key)
+            if not items or not -len(items) <= index < len(items):
+                return None
+            return items[index]
+
+    def llen(self, key):
+        with self._lock:
+            items = self._get_list(key)
+            return len(items) if items else 0
+
+    @staticmethod
+    def _stop(end):
+        """Convert an inclusive Redis end index to a Python slice stop"""
+        return None if end == -1 else end + 1
+
+    # Sets
+
+    def sadd(self, key, *members):
+        with self._lock:
+            self._expired(key)
+            items = self._data.setdefault(key, set())
+            before = len(items)
+            items.update(str(member) for member in members)
+            return len(items) - before
+
+    def srem(self, key, *members):
+        with self._lock:
+            items = self._data.get(key) if not self._expired(key) else None
+            if not items:
+                return 0
+            before = len(items)
+            items.difference_update(str(member) for member in members)
+            return before - len(items)
+
+    def sismember(self, key, member):
+        with self._lock:
+            items = self._data.get(key) if not self._expired(key) else None
+            return bool(items) and str(member) in items
+
+    def smembers(self, key):
+        with self._lock:
+            items = self._data.get(key) if not self._expired(key) else None
+            return set(items) if items else set()
+
+    def pipeline(self, transaction=True):
+        """Queue commands and run them together, like a redis-py pipeline"""
+        return LocalPipeline(self)
+
+    def flushall(self):
+        with self._lock:
+            self._data.clear()
+            self._expires.clear()
+            return True
+
+
+class LocalPipeline:
+    """Commands queued on a LocalStore and run under its lock by `execute()`"""
+
+    def __init__(self, store):
+        self._store = store
+        self._commands = []
+
+    def __getattr__(self, name):
+        command = getattr(self._store, name)
+
+        def queue(*args, **kwargs):
+            self._commands.append((command, args, kwargs))
+            return self
+        return queue
+
+    def execute(self):
+        with self._store._lock:
+            results = [command(*args, **kwargs) for command, args, kwargs in self._commands]
+        self._commands = []
+        return results
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self._commands = []
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Return the configured feed store, creating it on first use"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                store_url = feed_config().get('STORE_URL')
+                if store_url:
+                    import redis
+                    _store = redis.Redis.from_url(store_url, decode_responses=True)
+                else:
+                    if not settings.DEBUG:
+                        logger.warning(
+                            "FEED_CONFIG['STORE_URL'] is not set; every worker process keeps its own feed store"
+                        )
+                    _store = LocalStore()
+    return _store
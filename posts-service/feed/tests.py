@@ -0,0 +1,391 @@
+import time
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from posts.models import Post, PostMedia
+from .cache import HIT, MISS, STALE, FeedCache, invalidate_author, invalidate_categories, invalidate_user
+from .candidates import (
+    category_key, empty_category_key, get_candidates, get_category_posts, rebuild_category_list, tag_post,
+)
+from .fanout import CELEBRITIES_KEY, FanoutScheduler, LocalQueue, inbox_key
+from .models import AuthorAffinity, PostCategory, PostStats
+from .ranking import FEATURES, CandidateSet, build_features, diversify, load_candidates, rank
+from .store import LocalStore
+from .views import FeedViewSet
+
+
+class LocalStoreTestCase(TestCase):
+    """Runs against a fresh LocalStore that module-level helpers also see"""
+
+    def setUp(self):
+        self.store = LocalStore()
+        for target in ('feed.cache.get_store', 'feed.candidates.get_store'):
+            patcher = mock.patch(target, return_value=self.store)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class FakeFollowers:
+    """Stands in for the profile service's cursor-paginated followers endpoint"""
+
+    def __init__(self, follower_ids, fail_at=(), failures=1):
+        self.follower_ids = follower_ids
+        self.fail_at = set(fail_at)
+        self.failures = failures
+        self.calls = []
+
+    def __call__(self, author_id, cursor):
+        self.calls.append(cursor)
+        if cursor in self.fail_at and self.calls.count(cursor) <= self.failures:
+            raise RuntimeError('profile service unavailable')
+        return {
+            'count': len(self.follower_ids),
+            'results': self.follower_ids[cursor:cursor + 2],
+            'next_cursor': cursor + 2 if cursor + 2 < len(self.follower_ids) else None,
+        }
+
+
+@override_settings(FEED_CONFIG={'INBOX_SIZE': 3, 'FANOUT_MAX_ATTEMPTS': 3, 'FANOUT_RETRY_BASE_DELAY': 0})
+class FanoutSchedulerTests(LocalStoreTestCase):
+    def scheduler(self, followers, **kwargs):
+        scheduler = FanoutScheduler(
+            job_queue=LocalQueue(), store=self.store, batch_size=2, start_workers=False, **kwargs
+        )
+        scheduler.fetch_followers = followers
+        return scheduler
+
+    def post(self, post_id, author_id='author'):
+        return SimpleNamespace(id=post_id, user_id=author_id)
+
+    def test_delivers_every_follower_in_cursor_batches(self):
+        followers = FakeFollowers([f'user-{i}' for i in range(5)])
+        scheduler = self.scheduler(followers)
+
+        scheduler.schedule(self.post('p1'))
+        scheduler.run_pending()
+
+        self.assertEqual(followers.calls, [0, 2, 4])
+        for i in range(5):
+            self.assertEqual(self.store.lrange(inbox_key(f'user-{i}'), 0, -1), ['p1'])
+            self.assertEqual(self.store.get(f'feed:gen:user:user-{i}'), '1')
+        self.assertEqual(scheduler.stats()['processed_batches'], 3)
+        self.assertEqual(scheduler.stats()['delivered'], 5)
+
+    def test_inbox_keeps_newest_posts(self):
+        scheduler = self.scheduler(FakeFollowers(['user-0']))
+
+        for post_id in ('p1', 'p2', 'p3', 'p4'):
+            scheduler.schedule(self.post(post_id))
+        scheduler.run_pending()
+
+        self.assertEqual(self.store.lrange(inbox_key('user-0'), 0, -1), ['p4', 'p3', 'p2'])
+
+    def test_celebrity_posts_are_not_fanned_out(self):
+        scheduler = self.scheduler(FakeFollowers([f'user-{i}' for i in range(5)]), celebrity_threshold=3)
+
+        scheduler.schedule(self.post('p1', author_id='star'))
+        scheduler.run_pending()
+
+        self.assertEqual(self.store.smembers(CELEBRITIES_KEY), {'star'})
+        self.assertEqual(self.store.get('feed:gen:author:star'), '1')
+        self.assertEqual(self.store.lrange(inbox_key('user-0'), 0, -1), [])
+        self.assertEqual(scheduler.stats()['celebrity_posts'], 1)
+
+    def test_failed_batch_is_retried_from_its_cursor(self):
+        followers = FakeFollowers([f'user-{i}' for i in range(5)], fail_at=[2], failures=2)
+        scheduler = self.scheduler(followers)
+
+        scheduler.schedule(self.post('p1'))
+        scheduler.run_pending()
+
+        self.assertEqual(followers.calls, [0, 2, 2, 2, 4])
+        for i in range(5):
+            self.assertEqual(self.store.lrange(inbox_key(f'user-{i}'), 0, -1), ['p1'])
+        self.assertEqual(scheduler.stats()['retried_batches'], 2)
+        self.assertEqual(scheduler.stats()['failed_batches'], 0)
+
+    def test_batch_is_dropped_after_max_attempts(self):
+        followers = FakeFollowers(['user-0'], fail_at=[0], failures=10)
+        scheduler = self.scheduler(followers)
+
+        scheduler.schedule(self.post('p1'))
+        scheduler.run_pending()
+
+        self.assertEqual(followers.calls, [0, 0, 0])
+        self.assertEqual(scheduler.stats()['failed_batches'], 1)
+        self.assertEqual(len(scheduler.queue), 0)
+
+    def profile_answers(self, status_code):
+        scheduler = FanoutScheduler(job_queue=LocalQueue(), store=self.store, batch_size=2, start_workers=False)
+        response = mock.Mock(status_code=status_code)
+        patcher = mock.patch('feed.fanout.call_service_api', return_value=response)
+        call_service_api = patcher.start()
+        self.addCleanup(patcher.stop)
+
+        scheduler.schedule(self.post('p1'))
+        scheduler.run_pending()
+        return scheduler, call_service_api
+
+    def test_missing_profile_is_an_empty_follower_page(self):
+        scheduler, call_service_api = self.profile_answers(404)
+
+        call_service_api.assert_called_once()
+        self.assertEqual(scheduler.stats()['processed_batches'], 1)
+        self.assertEqual(scheduler.stats()['delivered'], 0)
+        self.assertEqual(scheduler.stats()['retried_batches'], 0)
+        self.assertEqual(len(scheduler.queue), 0)
+
+    def test_rejected_request_is_dropped_without_retries(self):
+        scheduler, call_service_api = self.profile_answers(403)
+
+        call_service_api.assert_called_once()
+        self.assertEqual(scheduler.stats()['failed_batches'], 1)
+        self.assertEqual(scheduler.stats()['retried_batches'], 0)
+
+    def test_server_errors_are_retried(self):
+        scheduler, call_service_api = self.profile_answers(503)
+
+        self.assertEqual(call_service_api.call_count, 3)
+        self.assertEqual(scheduler.stats()['retried_batches'], 2)
+        self.assertEqual(scheduler.stats()['failed_batches'], 1)
+
+    @override_settings(FEED_CONFIG={'FANOUT_RETRY_BASE_DELAY': 60})
+    def test_retry_waits_for_backoff(self):
+        followers = FakeFollowers(['user-0'], fail_at=[0])
+        scheduler = self.scheduler(followers)
+
+        scheduler.schedule(self.post('p1'))
+        scheduler.run_pending()
+
+        self.assertEqual(followers.calls, [0])
+        job = scheduler.queue.oldest()
+        self.assertEqual(job['attempts'], 1)
+        self.assertFalse(scheduler.is_due(job))
+
+
+class FeedCacheTests(LocalStoreTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cache = FeedCache(store=self.store)
+
+    def key(self, user_id='viewer', categories=('music',), authors=()):
+        return self.cache.page_key(user_id, 'default', 1, 20, categories, authors)
+
+    def test_generations_change_only_affected_keys(self):
+        viewer, other = self.key(), self.key(user_id='other')
+
+        invalidate_user('viewer')
+        self.assertNotEqual(self.key(), viewer)
+        self.assertEqual(self.key(user_id='other'), other)
+
+        viewer, sports = self.key(), self.key(categories=('sports',))
+        invalidate_categories(['music'])
+        self.assertNotEqual(self.key(), viewer)
+        self.assertEqual(self.key(categories=('sports',)), sports)
+
+    def test_celebrity_author_generation_is_part_of_followers_keys(self):
+        following, not_following = self.key(authors={'star'}), self.key()
+
+        invalidate_author('star')
+
+        self.assertNotEqual(self.key(authors={'star'}), following)
+        self.assertEqual(self.key(), not_following)
+
+    def test_page_is_built_once_then_served_from_cache(self):
+        build = mock.Mock(return_value={'results': ['p1']})
+
+        first = self.cache.get_or_build('viewer', 'default', 1, 20, ['music'], build)
+        second = self.cache.get_or_build('viewer', 'default', 1, 20, ['music'], build)
+
+        self.assertEqual(first, ({'results': ['p1']}, MISS))
+        self.assertEqual(second, ({'results': ['p1']}, HIT))
+        build.assert_called_once()
+
+    def test_invalidated_page_is_served_stale_while_rebuilding(self):
+        self.cache.get_or_build('viewer', 'default', 1, 20, ['music'], lambda: {'results': ['p1']})
+        invalidate_user('viewer')
+
+        with mock.patch.object(FeedCache, '_rebuild_in_background') as rebuild:
+            data, state = self.cache.get_or_build('viewer', 'default', 1, 20, ['music'], lambda: {'results': ['p2']})
+
+        self.assertEqual((data, state), ({'results': ['p1']}, STALE))
+        rebuild.assert_called_once()
+
+
+class CategoryListTests(LocalStoreTestCase):
+    def post(self, description='New song from my band'):
+        post = Post.objects.create(user_id='author', description=description)
+        tag_post(post)
+        return str(post.id)
+
+    def test_tag_post_extends_a_loaded_list(self):
+        first = self.post()
+        self.assertEqual(get_category_posts('music', 10), [first])
+
+        second = self.post()
+
+        self.assertEqual(self.store.lrange(category_key('music'), 0, -1), [second, first])
+        self.assertEqual(self.store.lrange(category_key('sports'), 0, -1), [])
+
+    def test_missing_list_is_rebuilt_newest_first_on_read(self):
+        older, newer = self.post(), self.post()
+        # tag_post never creates a partial list: the rebuild below loads everything
+        self.assertEqual(self.store.llen(category_key('music')), 0)
+
+        self.assertEqual(get_category_posts('music', 10), [newer, older])
+        with self.assertNumQueries(0):
+            self.assertEqual(get_category_posts('music', 1), [newer])
+
+    @override_settings(FEED_CONFIG={'CATEGORY_LIST_SIZE': 2, 'CATEGORY_LIST_TTL': 300})
+    def test_rebuilt_list_is_bounded_and_expires(self):
+        post_ids = [self.post() for _ in range(3)]
+
+        self.assertEqual(rebuild_category_list('music'), post_ids[:0:-1])
+        with mock.patch('feed.store.time.monotonic', return_value=time.monotonic() + 301):
+            self.assertEqual(self.store.lrange(category_key('music'), 0, -1), [])
+
+    @override_settings(FEED_CONFIG={'STORE_URL': 'redis://feed'})
+    def test_shared_store_lists_do_not_expire_by_default(self):
+        self.post()
+        get_category_posts('music', 10)
+
+        self.assertNotIn(category_key('music'), self.store._expires)
+
+    @override_settings(FEED_CONFIG={'EMPTY_CATEGORY_TTL': 60})
+    def test_empty_category_is_marked_until_the_marker_expires(self):
+        self.assertEqual(get_category_posts('music', 10), [])
+        self.assertEqual(self.store.get(empty_category_key('music')), '1')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_category_posts('music', 10), [])
+
+        later = time.monotonic() + 61
+        with mock.patch('feed.store.time.monotonic', return_value=later), self.assertNumQueries(1):
+            self.assertEqual(get_category_posts('music', 10), [])
+
+    def test_new_post_clears_the_empty_marker(self):
+        get_category_posts('music', 10)
+
+        post_id = self.post()
+
+        self.assertIsNone(self.store.get(empty_category_key('music')))
+        self.assertEqual(get_category_posts('music', 10), [post_id])
+
+    def test_candidates_interleave_categories_and_drop_duplicates(self):
+        # Lists are newest-first; 'b' is tagged with both categories
+        self.store.lpush(category_key('music'), 'c', 'b', 'a')
+        self.store.lpush(category_key('sports'), 'e', 'd', 'b')
+
+        self.assertEqual(get_candidates(['music', 'sports'], per_category=3), ['a', 'b', 'd', 'c', 'e'])
+        self.assertEqual(get_candidates(['music', 'sports'], per_category=1), ['a', 'b'])
+        self.assertEqual(get_candidates([]), [])
+
+
+class FeedViewTests(LocalStoreTestCase):
+    def test_feed_media_urls_are_absolute(self):
+        post = Post.objects.create(user_id='author', description='New song from my band')
+        PostMedia.objects.create(post=post, media_type='image', file='posts/cover.jpg')
+        request = APIRequestFactory().get('/api/feed/', {'categories': 'music'})
+        force_authenticate(request, user=SimpleNamespace(id='viewer', is_authenticated=True))
+
+        with mock.patch('feed.views.get_candidates', return_value=[str(post.id)]), \
+                mock.patch('feed.views.get_following_candidates', return_value=[]), \
+                mock.patch('feed.views.followed_celebrities', return_value=set()):
+            response = FeedViewSet.as_view({'get': 'list'})(request)
+
+        media, = response.data['results'][0]['media_files']
+        self.assertTrue(media['file'].startswith('http://testserver/'))
+        self.assertTrue(media['signed_url'].startswith('http://testserver/'))
+
+
+class DiversifyTests(SimpleTestCase):
+    def test_caps_posts_per_author(self):
+        authors = ['a', 'a', 'a', 'b', 'b']
+
+        self.assertEqual(diversify(range(5), authors, [None] * 5, 3, max_per_author=2), [0, 1, 3])
+
+    def test_caps_posts_per_category(self):
+        authors = ['a', 'b', 'c', 'd', 'e']
+        categories = ['music', 'music', 'music', None, 'sports']
+
+        selected = diversify(range(5), authors, categories, 4, max_per_author=2, max_per_category=2)
+
+        self.assertEqual(selected, [0, 1, 3, 4])
+
+    def test_skipped_candidates_fill_a_short_page_in_order(self):
+        authors = ['a', 'a', 'a', 'a', 'b']
+
+        self.assertEqual(diversify(range(5), authors, [None] * 5, 4, max_per_author=2), [0, 1, 4, 2])
+
+    def test_empty_input(self):
+        self.assertEqual(diversify([], [], [], 10), [])
+
+
+class RankTests(SimpleTestCase):
+    def candidates(self):
+        # 'fresh' was posted now without engagement; 'liked' is two days old with many likes
+        features = build_features(
+            np.array([0.0, 48.0]), np.array([0.0, 500.0]), np.array([0.0, 50.0]),
+            np.array([0.0, 0.0]), np.array([0.0, 0.0]),
+        )
+        return CandidateSet(['fresh', 'liked'], ['a', 'b'], [None, None], features)
+
+    def test_build_features_normalizes_raw_values(self):
+        features = build_features(
+            np.array([-1.0, 24.0]), np.array([0.0, np.e - 1]), np.array([0.0, 0.0]),
+            np.array([0.0, 0.0]), np.array([1.0, 0.5]),
+        )
+
+        self.assertEqual(features.shape, (2, len(FEATURES)))
+        # Recency halves every RECENCY_HALF_LIFE_HOURS (24) and never exceeds 1 for clock skew
+        np.testing.assert_allclose(features[:, 0], [1.0, 0.5], rtol=1e-6)
+        np.testing.assert_allclose(features[:, 1], [0.0, 1.0], rtol=1e-6)
+        np.testing.assert_allclose(features[:, 4], [1.0, 0.5])
+
+    def test_plan_weights_change_the_order(self):
+        self.assertEqual(rank(self.candidates(), plan='latest'), ['fresh', 'liked'])
+        self.assertEqual(rank(self.candidates(), plan='popular'), ['liked', 'fresh'])
+
+    def test_unknown_plan_is_rejected(self):
+        with self.assertRaises(KeyError):
+            rank(self.candidates(), plan='nope')
+
+    def test_page_is_limited_and_diversified(self):
+        features = build_features(np.arange(6.0), np.zeros(6), np.zeros(6), np.zeros(6), np.zeros(6))
+        candidates = CandidateSet([f'p{i}' for i in range(6)], ['a', 'a', 'a', 'b', 'c', 'c'], [None] * 6, features)
+
+        self.assertEqual(rank(candidates, limit=4), ['p0', 'p1', 'p3', 'p4'])
+
+    def test_empty_candidates(self):
+        empty = CandidateSet([], [], [], np.empty((0, len(FEATURES)), dtype=np.float32))
+
+        self.assertEqual(rank(empty), [])
+
+
+class LoadCandidatesTests(TestCase):
+    def test_loads_engagement_affinity_and_interest_match(self):
+        liked = Post.objects.create(user_id='friend', description='Concert tonight')
+        plain = Post.objects.create(user_id='stranger', description='Hello')
+        PostStats.objects.create(post=liked, like_count=3, comment_count=1)
+        AuthorAffinity.objects.create(user_id='viewer', author_id='friend', score=2)
+        PostCategory.objects.create(post=liked, category='music', created_at=liked.created_at)
+
+        with self.assertNumQueries(3):
+            candidates = load_candidates([str(liked.id), str(plain.id), str(uuid.uuid4())], 'viewer', ['music', 'sports'])
+
+        self.assertEqual(sorted(candidates.post_ids), sorted([str(liked.id), str(plain.id)]))
+        rows = {post_id: row for post_id, row in zip(candidates.post_ids, candidates.features)}
+        categories = dict(zip(candidates.post_ids, candidates.categories))
+        np.testing.assert_allclose(rows[str(liked.id)][1:], np.log1p([3, 1, 2]).tolist() + [0.5], rtol=1e-6)
+        np.testing.assert_allclose(rows[str(plain.id)][1:], [0, 0, 0, 0])
+        self.assertEqual(categories, {str(liked.id): 'music', str(plain.id): None})
+
+    def test_no_candidates(self):
+        candidates = load_candidates([], 'viewer', ['music'])
+
+        self.assertEqual(len(candidates), 0)
+        self.assertEqual(rank(candidates), [])
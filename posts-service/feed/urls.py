@@ -0,0 +1,10 @@
+from django.urls import path, include
+from rest_framework.routers import DefaultRouter
+from .views import FeedViewSet
+
+router = DefaultRouter()
+router.register(r'feed', FeedViewSet, basename='feed')
+
+urlpatterns = [
+    path('api/', include(router.urls)),
+]
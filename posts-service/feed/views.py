@@ -0,0 +1,158 @@
+from django.core.exceptions import ValidationError
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from shared_auth.authentication import MicroserviceAuthentication, ServiceToServiceAuthentication
+from shared_auth.permissions import IsAuthenticatedUser, IsServiceUser
+
+from posts.media import sign_media_urls
+from posts.models import Post
+from posts.serializers import PostListSerializer
+from .cache import FeedCache, invalidate_user
+from .candidates import (
+    fetch_user_categories, followed_celebrities, get_candidates, get_following_candidates,
+    invalidate_following
+)
+from .fanout import get_fanout_scheduler
+from .ranking import get_plans, load_candidates, rank, record_engagement
+
+
+class FeedViewSet(viewsets.ViewSet):
+    """ViewSet for personalized feed generation"""
+    
+    authentication_classes = [MicroserviceAuthentication]
+    permission_classes = [IsAuthenticatedUser]
+    
+    def get_user_categories(self, request):
+        """Interest categories from the query string, or the user's profile interests"""
+        categories = request.query_params.get('categories')
+        if categories:
+            return [category.strip() for category in categories.split(',') if category.strip()]
+        return fetch_user_categories(request.auth, str(request.user.id))
+    
+    def list(self, request):
+        """Get a ranked page of the current user's feed"""
+        plan = request.query_params.get('plan', 'default')
+        if plan not in get_plans():
+            return Response(
+                {'error': f'Unknown feed plan: {plan}', 'plans': list(get_plans())},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+            page = max(int(request.query_params.get('page', 1)), 1)
+        except ValueError:
+            return Response(
+                {'error': 'limit and page must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        user_id = str(request.user.id)
+        categories = self.get_user_categories(request)
+        
+        def build_page():
+            post_ids = get_following_candidates(user_id) + get_candidates(categories)
+            candidates = load_candidates(post_ids, user_id, categories)
+            post_ids = rank(candidates, plan=plan, limit=limit * page)[limit * (page - 1):]
+            
+            posts = Post.objects.filter(id__in=post_ids).prefetch_related('media_files')
+            posts_by_id = {str(post.id): post for post in posts}
+            ordered_posts = [posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id]
+            
+            return {
+                'plan': plan,
+                'page': page,
+                'count': len(ordered_posts),
+                'results': PostListSerializer(ordered_posts, many=True, context={'request': request}).data
+            }
+        
+        data, cache_state = FeedCache().get_or_build(
+            user_id, plan, page, limit, categories, build_page, authors=followed_celebrities(user_id)
+        )
+        # Cached pages outlive signed media URLs; sign them for this response
+        sign_media_urls(data['results'], request)
+        response = Response(data)
+        response['X-Feed-Cache'] = cache_state
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def candidates(self, request):
+        """Get candidate post IDs for the current user's interests"""
+        try:
+            per_category = int(request.query_params.get('per_category', 0)) or None
+        except ValueError:
+            return Response(
+                {'error': 'per_category must be an integer'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        categories = self.get_user_categories(request)
+        post_ids = get_candidates(categories, per_category)
+        
+        return Response({
+            'categories': categories,
+            'count': len(post_ids),
+            'post_ids': post_ids
+        })
+    
+    @action(detail=False, methods=['get'])
+    def fanout_status(self, request):
+        """Get fan-out queue depth and lag"""
+        return Response(get_fanout_scheduler().stats())
+    
+    @action(
+        detail=False, methods=['post'],
+        authentication_classes=[ServiceToServiceAuthentication],
+        permission_classes=[IsServiceUser]
+    )
+    def engagement(self, request):
+        """Record a like/comment event sent by the likes or comments service"""
+        event = request.data.get('event')
+        post_id = request.data.get('post_id')
+        user_id = request.data.get('user_id')
+        
+        if not event or not post_id or not user_id:
+            return Response(
+                {'error': 'event, post_id and user_id are required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            post = Post.objects.get(id=post_id)
+            record_engagement(event, post, user_id)
+            invalidate_user(user_id)
+        except (Post.DoesNotExist, ValidationError):
+            return Response(
+                {'error': 'Post not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except ValueError as e:
+            return Response(
+                {'error': str(e)},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        return Response({'message': 'Engagement recorded', 'event': event, 'post_id': post_id})
+    
+    @action(
+        detail=False, methods=['post'],
+        authentication_classes=[ServiceToServiceAuthentication],
+        permission_classes=[IsServiceUser]
+    )
+    def follow_event(self, request):
+        """Record a follow/unfollow event sent by the profile service"""
+        event = request.data.get('event')
+        follower_id = request.data.get('follower_id')
+        
+        if event not in ('follow', 'unfollow') or not follower_id:
+            return Response(
+                {'error': 'event must be follow or unfollow and follower_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        # Drop the following list first, or the rebuilt page would use the old one
+        invalidate_following(str(follower_id))
+        invalidate_user(str(follower_id))
+        return Response({'message': 'Follow event recorded', 'event': event, 'follower_id': follower_id})
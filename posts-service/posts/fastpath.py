@@ -0,0 +1,74 @@
+"""
+Fast Post Read Path
+
+Listing posts through `PostListSerializer` instantiates a model and runs the
+nested `PostMediaSerializer` field by field for every post and media file,
+which dominates CPU time on large responses. `PostViewSet.list` and
+`retrieve` build the same response from `values()` rows instead:
+
+- posts are loaded as dicts with one query, media files with one more
+- each media file's storage URL is computed once and reused for `file` and
+  `file_url`; signed URLs share one expiry per response
+- UUIDs and datetimes are left as Python objects for `ORJSONRenderer`, which
+  encodes them natively in the format DRF would produce
+
+The output is identical to the serializers'. Compare both paths with
+`python manage.py bench_post_serialization`.
+"""
+
+import orjson
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+from .media import media_url_expiry, signed_media_url
+from .models import PostMedia
+
+POST_LIST_FIELDS = ('id', 'user_id', 'description', 'post_number', 'created_at')
+POST_DETAIL_FIELDS = POST_LIST_FIELDS + ('updated_at',)
+
+
+class ORJSONRenderer(BaseRenderer):
+    """JSON renderer backed by orjson; falls back to DRF's encoder for other types"""
+
+    media_type = 'application/json'
+    format = 'json'
+    charset = None
+    options = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+    _default = JSONEncoder().default
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return orjson.dumps(data, default=self._default, option=self.options)
+
+
+def serialize_posts(queryset, fields=POST_LIST_FIELDS, request=None):
+    """Post dicts with nested media files, in queryset order, using two queries"""
+    posts = list(queryset.prefetch_related(None).values(*fields))
+    posts_by_id = {}
+    for post in posts:
+        post['media_files'] = []
+        posts_by_id[post['id']] = post
+    if not posts:
+        return posts
+
+    storage = PostMedia._meta.get_field('file').storage
+    origin = request.build_absolute_uri('/')[:-1] if request else ''
+    expires = media_url_expiry()
+    media_rows = (
+        PostMedia.objects.filter(post_id__in=posts_by_id)
+        .order_by('created_at')
+        .values_list('id', 'post_id', 'media_type', 'file', 'created_at')
+    )
+    for media_id, post_id, media_type, name, created_at in media_rows:
+        url = storage.url(name) if name else None
+        signed_url = signed_media_url(media_id, expires)
+        posts_by_id[post_id]['media_files'].append({
+            'id': media_id,
+            'media_type': media_type,
+            'file': origin + url if url and url.startswith('/') else url,
+            'file_url': url,
+            'signed_url': origin + signed_url,
+            'created_at': created_at,
+        })
+    return posts
@@ -0,0 +1,75 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test import RequestFactory
+from rest_framework.renderers import JSONRenderer
+
+from posts.fastpath import ORJSONRenderer, POST_LIST_FIELDS, serialize_posts
+from posts.models import Post, PostMedia
+from posts.serializers import PostListSerializer
+
+
+class Command(BaseCommand):
+    help = 'Compare DRF serializers and the fast read path on a list of posts (data is rolled back)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1000, help='Posts in the list response')
+        parser.add_argument('--media', type=int, default=2, help='Media files per post')
+        parser.add_argument('--repeat', type=int, default=10, help='Timed iterations')
+
+    def handle(self, *args, **options):
+        """Time building and rendering a list response both ways"""
+        count = options['posts']
+        repeat = options['repeat']
+        request = RequestFactory().get('/api/posts/')
+
+        with transaction.atomic():
+            start_number = (Post.objects.order_by('-post_number').values_list('post_number', flat=True).first() or 0) + 1
+            posts = Post.objects.bulk_create([
+                Post(user_id='bench', description=f'Benchmark post {i}', post_number=start_number + i)
+                for i in range(count)
+            ])
+            PostMedia.objects.bulk_create([
+                PostMedia(post=post, media_type='image', file=f'posts/bench/{post.id}-{i}.jpg')
+                for post in posts for i in range(options['media'])
+            ])
+            queryset = Post.objects.filter(user_id='bench')
+
+            def timed(function):
+                start = time.perf_counter()
+                for _ in range(repeat):
+                    result = function()
+                return (time.perf_counter() - start) / repeat * 1000, result
+
+            drf_data_ms, drf_data = timed(lambda: PostListSerializer(
+                queryset.prefetch_related('media_files'), many=True, context={'request': request}
+            ).data)
+            drf_render_ms, drf_body = timed(lambda: JSONRenderer().render(drf_data))
+            fast_data_ms, fast_data = timed(lambda: serialize_posts(queryset, POST_LIST_FIELDS, request))
+            fast_render_ms, fast_body = timed(lambda: ORJSONRenderer().render(fast_data))
+
+            transaction.set_rollback(True)
+
+        def comparable(body):
+            # Signatures differ when the two paths straddle a second boundary
+            data = json.loads(body)
+            for post in data:
+                for media in post['media_files']:
+                    media.pop('signed_url')
+            return data
+
+        identical = comparable(drf_body) == comparable(fast_body)
+        per_thousand = 1000 / count
+        drf_ms = (drf_data_ms + drf_render_ms) * per_thousand
+        fast_ms = (fast_data_ms + fast_render_ms) * per_thousand
+
+        self.stdout.write(f'Posts: {count}, media per post: {options["media"]}, iterations: {repeat}')
+        self.stdout.write('Per 1000 posts (queries included):')
+        self.stdout.write(f'  DRF serializers:  {drf_data_ms * per_thousand:8.1f} ms + JSONRenderer   {drf_render_ms * per_thousand:6.1f} ms')
+        self.stdout.write(f'  values() path:    {fast_data_ms * per_thousand:8.1f} ms + ORJSONRenderer {fast_render_ms * per_thousand:6.1f} ms')
+        self.stdout.write(f'  identical output: {identical}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Fast read path: {fast_ms:.1f} ms vs {drf_ms:.1f} ms per 1000 posts ({drf_ms / fast_ms:.1f}x faster)'
+        ))
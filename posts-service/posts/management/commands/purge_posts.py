@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts.purge import get_purger
+
+
+class Command(BaseCommand):
+    help = 'Run pending background post purges (requested through delete_user_posts)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run the pending purges and exit')
+        parser.add_argument('--interval', type=int, default=10, help='Seconds between checks for new purges')
+
+    def handle(self, *args, **options):
+        purger = get_purger()
+        while True:
+            count = purger.run_pending()
+            if count:
+                self.stdout.write(self.style.SUCCESS(f'Ran {count} post purges'))
+            if options['once']:
+                return
+            time.sleep(options['interval'])
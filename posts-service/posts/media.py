@@ -0,0 +1,244 @@
+"""
+Media Delivery
+
+Media URLs handed to clients are signed and expire: the URL carries an expiry
+timestamp and an HMAC of the media ID and that timestamp, so a request for it
+is verified with one hash and no call to the database or the login service.
+
+The bytes themselves are sent according to `MEDIA_DELIVERY['MODE']`:
+
+- `django`: streamed by the Django worker (`FileResponse`), for development
+- `x-accel-redirect`: nginx serves the file from an `internal` location
+  mapped to `ACCEL_REDIRECT_PREFIX`
+- `x-sendfile`: Apache (mod_xsendfile) or lighttpd serves the file by path
+
+In the offloaded modes the worker only returns headers, and the front server
+does the transfer however long a video download takes.
+
+Responses carry the file's content type, a strong ETag and Last-Modified, so
+revalidation is answered with 304 before the file is opened. In `django` mode
+single byte ranges are served as 206 (video seeking); requests for several
+ranges get the whole file.
+"""
+
+import functools
+import hashlib
+import hmac
+import mimetypes
+import os
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.utils.cache import get_conditional_response
+from django.utils.crypto import constant_time_compare
+from django.utils.http import http_date
+from rest_framework import authentication
+from rest_framework.exceptions import AuthenticationFailed
+
+from shared_auth.authentication import MicroserviceUser
+
+DJANGO = 'django'
+X_ACCEL_REDIRECT = 'x-accel-redirect'
+X_SENDFILE = 'x-sendfile'
+
+
+def _media_config():
+    return getattr(settings, 'MEDIA_DELIVERY', {})
+
+
+@functools.lru_cache(maxsize=8)
+def _derived_key(secret):
+    # Same key derivation as django.utils.crypto.salted_hmac, done once per secret
+    return hashlib.sha256(b'posts.media' + secret.encode()).digest()
+
+
+def media_signature(media_id, expires):
+    secret = _media_config().get('SIGNING_KEY') or settings.SECRET_KEY
+    return hmac.new(_derived_key(secret), f'{media_id}:{expires}'.encode(), hashlib.sha256).hexdigest()
+
+
+def media_url_expiry():
+    """Expiry timestamp for media URLs signed now"""
+    return int(time.time()) + _media_config().get('URL_TTL', 3600)
+
+
+@functools.lru_cache(maxsize=None)
+def _media_path_template():
+    # reverse() costs far more than signing; resolve the route once
+    return reverse('media-detail', args=['MEDIA_ID'])
+
+
+def signed_media_url(media_id, expires=None):
+    """Path of a media file that stays valid until `expires` (default: `URL_TTL` from now)"""
+    expires = expires or media_url_expiry()
+    path = _media_path_template().replace('MEDIA_ID', str(media_id))
+    return f'{path}?expires={expires}&signature={media_signature(media_id, expires)}'
+
+
+def sign_media_urls(posts, request=None):
+    """Set a fresh `signed_url` on every media entry of serialized posts"""
+    expires = media_url_expiry()
+    for post in posts:
+        for media in post['media_files']:
+            url = signed_media_url(media['id'], expires)
+            media['signed_url'] = request.build_absolute_uri(url) if request else url
+    return posts
+
+
+def verify_media_signature(media_id, expires, signature):
+    try:
+        expires = int(expires)
+    except (TypeError, ValueError):
+        return False
+    if expires < time.time():
+        return False
+    return constant_time_compare(signature, media_signature(media_id, expires))
+
+
+class SignedMediaAuthentication(authentication.BaseAuthentication):
+    """
+    Accept requests for a media file that carry a valid signature for it.
+
+    Signatures are only accepted for fetching the file itself (`retrieve`),
+    never for issuing new URLs, so a signed link cannot be used to extend its
+    own expiry. Other requests are left to the next authentication class.
+    """
+
+    def authenticate(self, request):
+        signature = request.query_params.get('signature')
+        view = request.parser_context.get('view')
+        if not signature or getattr(view, 'action', None) != 'retrieve':
+            return None
+
+        media_id = request.parser_context['kwargs'].get('pk')
+        if not verify_media_signature(media_id, request.query_params.get('expires'), signature):
+            raise AuthenticationFailed('Invalid or expired media signature')
+        return (MicroserviceUser(user_id=None, username='signed_media_url'), None)
+
+    def authenticate_header(self, request):
+        return 'Bearer realm="api"'
+
+
+class UnsatisfiableRange(Exception):
+    """The requested byte range lies outside the file"""
+
+
+def media_content_type(media):
+    """Content type from the file extension, if it agrees with the stored media type"""
+    guessed, _ = mimetypes.guess_type(media.file.name)
+    if guessed and guessed.startswith(f'{media.media_type}/'):
+        return guessed
+    return 'application/octet-stream'
+
+
+def media_etag(media, stat):
+    """Strong ETag; uploaded files are never modified in place"""
+    digest = hashlib.sha1(f'{media.file.name}:{stat.st_size}:{stat.st_mtime_ns}'.encode()).hexdigest()
+    return f'"{digest}"'
+
+
+def parse_byte_range(header, size):
+    """
+    (start, end) of a single `bytes=` range, end inclusive.
+
+    Returns None when the whole file should be sent instead: no or malformed
+    header, or several ranges (allowed by RFC 9110). Raises
+    UnsatisfiableRange if the range starts past the end of the file.
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    specs = header[len('bytes='):].split(',')
+    if len(specs) != 1:
+        return None
+
+    first, _, last = specs[0].strip().partition('-')
+    try:
+        if not first:
+            # Suffix range: the last N bytes
+            suffix = int(last)
+            if suffix <= 0 or size == 0:
+                raise UnsatisfiableRange()
+            return max(size - suffix, 0), size - 1
+        start = int(first)
+        end = int(last) if last else None
+    except ValueError:
+        return None
+    if end is not None and start > end:
+        return None
+    if start >= size:
+        raise UnsatisfiableRange()
+    if end is None:
+        return start, size - 1
+    return start, min(end, size - 1)
+
+
+def _read_range(path, start, length, chunk_size=64 * 1024):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            chunk = f.read(min(chunk_size, length))
+            if not chunk:
+                return
+            length -= len(chunk)
+            yield chunk
+
+
+def _deliver(request, media, size, etag, last_modified, content_type):
+    mode = _media_config().get('MODE', DJANGO)
+    if mode == X_ACCEL_REDIRECT:
+        # nginx answers Range requests for the redirected file itself
+        response = HttpResponse(content_type=content_type)
+        prefix = _media_config().get('ACCEL_REDIRECT_PREFIX', '/protected-media/')
+        response['X-Accel-Redirect'] = prefix + quote(media.file.name)
+        return response
+    if mode == X_SENDFILE:
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = media.file.path
+        return response
+
+    byte_range = None
+    if_range = request.headers.get('If-Range')
+    # A range is only valid against the representation the client already has
+    if not if_range or if_range in (etag, http_date(last_modified)):
+        try:
+            byte_range = parse_byte_range(request.headers.get('Range'), size)
+        except UnsatisfiableRange:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{size}'
+            return response
+
+    if byte_range is None:
+        response = FileResponse(media.file.open('rb'), content_type=content_type)
+    else:
+        start, end = byte_range
+        response = StreamingHttpResponse(
+            _read_range(media.file.path, start, end - start + 1), status=206, content_type=content_type
+        )
+        response['Content-Range'] = f'bytes {start}-{end}/{size}'
+        response['Content-Length'] = end - start + 1
+    response['Accept-Ranges'] = 'bytes'
+    return response
+
+
+def media_response(request, media):
+    """
+    Response delivering a media file according to MEDIA_DELIVERY['MODE'].
+
+    Conditional requests (If-None-Match, If-Modified-Since, ...) are answered
+    from the file's ETag and modification time before any bytes are read.
+    Raises FileNotFoundError if the file is missing.
+    """
+    stat = os.stat(media.file.path)
+    etag = media_etag(media, stat)
+    last_modified = int(stat.st_mtime)
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = _deliver(request, media, stat.st_size, etag, last_modified, media_content_type(media))
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+    response['Cache-Control'] = f"private, max-age={_media_config().get('CACHE_MAX_AGE', 3600)}"
+    return response
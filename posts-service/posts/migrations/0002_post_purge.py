@@ -0,0 +1,34 @@
+# Generated by Django 4.2.7 on 2026-10-19 11:15
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PostPurge',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('user_id', models.CharField(help_text='User whose posts are deleted', max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='pending', max_length=10)),
+                ('total_posts', models.PositiveIntegerField(default=0, help_text='Posts found when the purge was requested')),
+                ('deleted_posts', models.PositiveIntegerField(default=0)),
+                ('deleted_files', models.PositiveIntegerField(default=0)),
+                ('failed_files', models.PositiveIntegerField(default=0)),
+                ('error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'updated_at'], name='posts_postp_status_49862e_idx'), models.Index(fields=['user_id', 'status'], name='posts_postp_user_id_e94740_idx')],
+            },
+        ),
+    ]
@@ -64,3 +64,47 @@ class PostMedia(models.Model):
         if self.file:
             return self.file.url
         return None
+
+
+class PostPurge(models.Model):
+    """Background deletion of all posts (and media files) of one user"""
+    
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+    
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    user_id = models.CharField(max_length=100, help_text="User whose posts are deleted")
+    status = models.CharField(max_length=10, choices=STATUSES, default=PENDING)
+    total_posts = models.PositiveIntegerField(default=0, help_text="Posts found when the purge was requested")
+    deleted_posts = models.PositiveIntegerField(default=0)
+    deleted_files = models.PositiveIntegerField(default=0)
+    failed_files = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'updated_at']),
+            models.Index(fields=['user_id', 'status']),
+        ]
+    
+    def __str__(self):
+        return f"Purge of {self.user_id}'s posts ({self.status})"
+    
+    @property
+    def progress(self):
+        """Fraction of the posts found at request time that are deleted"""
+        if self.status == self.DONE or not self.total_posts:
+            return 1.0 if self.status == self.DONE else 0.0
+        return min(self.deleted_posts / self.total_posts, 1.0)
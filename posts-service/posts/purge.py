@@ -0,0 +1,174 @@
+"""
+Background Post Purge
+
+Deleting every post of a heavy user in one `delete()` loads all rows for
+cascade handling, holds locks for the whole delete and leaves the media files
+in MEDIA_ROOT. `delete_user_posts` instead records a `PostPurge` job and
+returns; a background worker then:
+
+1. takes the next `BATCH_SIZE` posts of the user and deletes them (with their
+   media, categories and stats) in one short transaction,
+2. after the commit, deletes the batch's media files on a small thread pool,
+3. records progress on the job and pauses `PAUSE` seconds before the next
+   batch so other writers get the tables.
+
+Each batch only looks at the user's remaining posts, so a job interrupted by
+a restart simply continues: jobs left "running" without progress for
+`STALE_AFTER` seconds are claimed again. Workers run inside the web process;
+`python manage.py purge_posts` runs pending jobs from a separate process.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Post, PostMedia, PostPurge
+
+logger = logging.getLogger(__name__)
+
+
+def _purge_config():
+    return getattr(settings, 'PURGE_CONFIG', {})
+
+
+def request_purge(user_id):
+    """Record a purge of a user's posts (or return the one in progress) and wake the worker"""
+    purge = PostPurge.objects.filter(
+        user_id=user_id, status__in=[PostPurge.PENDING, PostPurge.RUNNING]
+    ).first()
+    if purge is None:
+        purge = PostPurge.objects.create(
+            user_id=user_id, total_posts=Post.objects.filter(user_id=user_id).count()
+        )
+    transaction.on_commit(get_purger().wake)
+    return purge
+
+
+class PostPurger:
+    """Worker thread deleting users' posts in batches"""
+
+    def __init__(self):
+        purge_config = _purge_config()
+        self.batch_size = purge_config.get('BATCH_SIZE', 500)
+        self.pause = purge_config.get('PAUSE', 0.05)
+        self.stale_after = purge_config.get('STALE_AFTER', 5 * 60)
+        self.storage = PostMedia._meta.get_field('file').storage
+        self._files = ThreadPoolExecutor(
+            max_workers=purge_config.get('FILE_WORKERS', 4), thread_name_prefix='post-purge-files'
+        )
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def claim(self):
+        """Mark the next due job as running and return it, or None"""
+        stale = timezone.now() - timedelta(seconds=self.stale_after)
+        due = Q(status=PostPurge.PENDING) | Q(status=PostPurge.RUNNING, updated_at__lt=stale)
+        for purge in PostPurge.objects.filter(due).order_by('created_at')[:10]:
+            # Conditional update: only one worker (or process) wins the job
+            claimed = PostPurge.objects.filter(id=purge.id, status=purge.status, updated_at=purge.updated_at).update(
+                status=PostPurge.RUNNING, updated_at=timezone.now()
+            )
+            if claimed:
+                purge.refresh_from_db()
+                return purge
+        return None
+
+    def delete_file(self, name):
+        try:
+            self.storage.delete(name)
+            return True
+        except Exception as e:
+            logger.warning(f"Could not delete media file {name}: {str(e)}")
+            return False
+
+    def delete_batch(self, purge):
+        """Delete one batch of the user's posts and their files; returns the number of posts deleted"""
+        with transaction.atomic():
+            post_ids = list(
+                Post.objects.filter(user_id=purge.user_id).values_list('id', flat=True)[:self.batch_size]
+            )
+            if not post_ids:
+                return 0
+            files = [
+                name for name in
+                PostMedia.objects.filter(post_id__in=post_ids).values_list('file', flat=True) if name
+            ]
+            Post.objects.filter(id__in=post_ids).delete()
+
+        # Files go only once the rows are gone, so a failed delete never leaves posts without media
+        results = list(self._files.map(self.delete_file, files))
+        PostPurge.objects.filter(id=purge.id).update(
+            deleted_posts=F('deleted_posts') + len(post_ids),
+            deleted_files=F('deleted_files') + results.count(True),
+            failed_files=F('failed_files') + results.count(False),
+            updated_at=timezone.now(),
+        )
+        return len(post_ids)
+
+    def run(self, purge):
+        """Delete every post of the job's user, batch by batch"""
+        try:
+            while self.delete_batch(purge):
+                if self.pause:
+                    time.sleep(self.pause)
+        except Exception as e:
+            logger.exception("Post purge %s failed", purge.id)
+            PostPurge.objects.filter(id=purge.id).update(
+                status=PostPurge.FAILED, error=str(e), finished_at=timezone.now()
+            )
+            return
+        PostPurge.objects.filter(id=purge.id).update(status=PostPurge.DONE, finished_at=timezone.now())
+
+    def run_pending(self):
+        """Run due jobs in the calling thread; returns the number of jobs run"""
+        count = 0
+        while True:
+            purge = self.claim()
+            if purge is None:
+                return count
+            self.run(purge)
+            count += 1
+
+    def _work(self):
+        while True:
+            self._wakeup.wait(self.stale_after)
+            self._wakeup.clear()
+            try:
+                self.run_pending()
+            except Exception:
+                logger.exception("Post purge worker failed")
+            finally:
+                close_old_connections()
+
+    def start(self):
+        """Start the worker thread if it is not running yet"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._work, name='post-purge', daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self.start()
+        self._wakeup.set()
+
+
+_purger = None
+_purger_lock = threading.Lock()
+
+
+def get_purger():
+    """Return the process-wide post purger"""
+    global _purger
+    if _purger is None:
+        with _purger_lock:
+            if _purger is None:
+                _purger = PostPurger()
+    return _purger
@@ -1,13 +1,22 @@
 from rest_framework import serializers
-from .models import Post, PostMedia
+from .media import signed_media_url
+from .models import Post, PostMedia, PostPurge
 
 
 class PostMediaSerializer(serializers.ModelSerializer):
     """Serializer for PostMedia model"""
     
+    signed_url = serializers.SerializerMethodField()
+    
     class Meta:
         model = PostMedia
-        fields = ['id', 'media_type', 'file', 'file_url', 'created_at']
+        fields = ['id', 'media_type', 'file', 'file_url', 'signed_url', 'created_at']
+    
+    def get_signed_url(self, obj):
+        """Expiring URL that can be fetched without an Authorization header"""
+        url = signed_media_url(obj.id)
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
 
 
 class PostSerializer(serializers.ModelSerializer):
@@ -84,3 +93,16 @@ class PostListSerializer(serializers.ModelSerializer):
     class Meta:
         model = Post
         fields = ['id', 'user_id', 'description', 'post_number', 'created_at', 'media_files']
+
+
+class PostPurgeSerializer(serializers.ModelSerializer):
+    """Serializer for background post purge progress"""
+    
+    progress = serializers.FloatField(read_only=True)
+    
+    class Meta:
+        model = PostPurge
+        fields = [
+            'id', 'user_id', 'status', 'total_posts', 'deleted_posts', 'deleted_files',
+            'failed_files', 'progress', 'error', 'created_at', 'updated_at', 'finished_at'
+        ]
@@ -2,20 +2,28 @@ from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
+from rest_framework.renderers import BrowsableAPIRenderer
+from django.core.exceptions import ValidationError
+from django.http import Http404
+from django.urls import reverse
 from django.shortcuts import get_object_or_404
 from django.db.models import Q
-from django.http import FileResponse
 from django.utils import timezone
-import os
 
 # Import shared authentication
 from shared_auth.authentication import MicroserviceAuthentication
 from shared_auth.permissions import IsAuthenticatedUser, IsOwnerOrReadOnly, AllowAny
 
-from .models import Post, PostMedia
+from .fastpath import ORJSONRenderer, POST_DETAIL_FIELDS, POST_LIST_FIELDS, serialize_posts
+from .media import SignedMediaAuthentication, media_response, signed_media_url
+from .models import Post, PostMedia, PostPurge
+from .purge import request_purge
 from .serializers import (
-    PostSerializer, PostCreateSerializer, PostListSerializer
+    PostSerializer, PostCreateSerializer, PostListSerializer, PostPurgeSerializer
 )
+from feed.cache import invalidate_categories
+from feed.candidates import tag_post
+from feed.fanout import get_fanout_scheduler
 
 
 @api_view(['GET'])
@@ -39,6 +47,7 @@ class PostViewSet(viewsets.ModelViewSet):
     authentication_classes = [MicroserviceAuthentication]
     permission_classes = [IsAuthenticatedUser]  # Require authentication for all operations
     parser_classes = [JSONParser, MultiPartParser, FormParser]
+    renderer_classes = [ORJSONRenderer, BrowsableAPIRenderer]
     
     def get_queryset(self):
         """Filter queryset based on request parameters"""
@@ -59,11 +68,34 @@ class PostViewSet(viewsets.ModelViewSet):
             return PostListSerializer
         return PostSerializer
     
+    def list(self, request, *args, **kwargs):
+        """List posts built from values() rows instead of the serializers (see posts.fastpath)"""
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(serialize_posts(queryset, POST_LIST_FIELDS, request))
+    
+    def retrieve(self, request, *args, **kwargs):
+        """Get one post through the fast read path"""
+        queryset = self.filter_queryset(self.get_queryset())
+        try:
+            posts = serialize_posts(queryset.filter(pk=kwargs['pk']), POST_DETAIL_FIELDS, request)
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        if not posts:
+            raise Http404
+        return Response(posts[0])
+    
     def perform_create(self, serializer):
         """Create post with user_id from authenticated user"""
         # Get user_id from the authenticated user
         user_id = str(self.request.user.id)
-        serializer.save(user_id=user_id)
+        post = serializer.save(user_id=user_id)
+        
+        # Tag with interest categories for feed candidate generation and
+        # invalidate cached feed pages of users interested in them
+        invalidate_categories(tag_post(post))
+        
+        # Deliver to followers' feeds in the background
+        get_fanout_scheduler().schedule(post)
     
     def get_permissions(self):
         """Return appropriate permissions based on action"""
@@ -91,34 +123,71 @@ class PostViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
         
-        # Delete all posts by the user (this will cascade delete media files)
-        deleted_count, _ = Post.objects.filter(user_id=user_id).delete()
+        # Posts and their media files are deleted in batches by a background worker
+        purge = request_purge(user_id)
         
         return Response({
-            'message': f'Deleted {deleted_count} posts for user {user_id}',
-            'deleted_count': deleted_count
-        }, status=status.HTTP_200_OK)
+            'message': f'Deleting {purge.total_posts} posts for user {user_id}',
+            'purge': PostPurgeSerializer(purge).data,
+            'status_url': request.build_absolute_uri(
+                f"{reverse('post-purge-status')}?purge_id={purge.id}"
+            )
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    @action(detail=False, methods=['get'])
+    def purge_status(self, request):
+        """Get the progress of a background purge started by delete_user_posts"""
+        try:
+            purge = PostPurge.objects.get(id=request.query_params.get('purge_id'))
+        except (PostPurge.DoesNotExist, ValidationError):
+            return Response(
+                {'error': 'Purge not found'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        if str(request.user.id) != purge.user_id:
+            return Response(
+                {'error': 'You can only view your own purges'}, 
+                status=status.HTTP_403_FORBIDDEN
+            )
+        
+        return Response(PostPurgeSerializer(purge).data)
 
 
 class MediaViewSet(viewsets.ViewSet):
     """ViewSet for serving media files"""
     
-    authentication_classes = [MicroserviceAuthentication]
+    # Signed URLs are checked first so they skip the login service round trip
+    authentication_classes = [SignedMediaAuthentication, MicroserviceAuthentication]
     permission_classes = [IsAuthenticatedUser]
     
     def retrieve(self, request, pk=None):
         """Serve media file"""
         try:
-            media = PostMedia.objects.get(pk=pk)
-            if media.file and os.path.exists(media.file.path):
-                return FileResponse(media.file, content_type='application/octet-stream')
-            else:
-                return Response(
-                    {'error': 'File not found'}, 
-                    status=status.HTTP_404_NOT_FOUND
-                )
+            media = PostMedia.objects.only('id', 'file', 'media_type').get(pk=pk)
+            if media.file:
+                return media_response(request, media)
+            return Response(
+                {'error': 'File not found'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        except FileNotFoundError:
+            return Response(
+                {'error': 'File not found'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
         except PostMedia.DoesNotExist:
             return Response(
                 {'error': 'Media not found'}, 
                 status=status.HTTP_404_NOT_FOUND
             )
+    
+    @action(detail=True, methods=['get'], authentication_classes=[MicroserviceAuthentication])
+    def url(self, request, pk=None):
+        """Return a signed, expiring URL for a media file"""
+        if not PostMedia.objects.filter(pk=pk).exists():
+            return Response(
+                {'error': 'Media not found'}, 
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response({'url': request.build_absolute_uri(signed_media_url(pk))})
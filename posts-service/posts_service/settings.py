@@ -41,6 +41,7 @@ INSTALLED_APPS = [
     'rest_framework',
     'corsheaders',
     'posts',
+    'feed',
 ]
 
 MIDDLEWARE = [
@@ -126,6 +127,15 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Media delivery (see posts/media.py)
+MEDIA_DELIVERY = {
+    'MODE': os.environ.get('MEDIA_DELIVERY_MODE', 'django'),  # 'django', 'x-accel-redirect' or 'x-sendfile'
+    'ACCEL_REDIRECT_PREFIX': '/protected-media/',  # nginx internal location aliased to MEDIA_ROOT
+    'URL_TTL': 60 * 60,  # Seconds a signed media URL stays valid
+    'CACHE_MAX_AGE': 60 * 60,  # Cache-Control max-age of media responses (revalidated by ETag)
+    'SIGNING_KEY': os.environ.get('MEDIA_SIGNING_KEY', ''),  # Empty uses SECRET_KEY
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -154,6 +164,14 @@ CORS_ALLOW_CREDENTIALS = True
 FILE_UPLOAD_MAX_MEMORY_SIZE = 52428800  # 50MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = 52428800  # 50MB
 
+# Background post purges (see posts/purge.py)
+PURGE_CONFIG = {
+    'BATCH_SIZE': 500,  # Posts deleted per transaction
+    'PAUSE': 0.05,  # Seconds between batches
+    'FILE_WORKERS': 4,  # Threads deleting media files
+    'STALE_AFTER': 5 * 60,  # Seconds without progress before a running purge is claimed again
+}
+
 # Service Discovery Configuration
 SERVICES = {
     'login': os.environ.get('LOGIN_SERVICE_URL', 'http://localhost:8000'),
@@ -168,3 +186,31 @@ SERVICE_TOKENS = [
     'posts_service_secret_token_123',
     'internal_service_token_456',
 ]
+
+# Feed Configuration
+FEED_CONFIG = {
+    'STORE_URL': os.environ.get('FEED_STORE_URL', ''),  # redis://... ; empty uses the in-process store
+    'CLASSIFIER': 'feed.classifiers.KeywordClassifier',
+    'CATEGORY_LIST_SIZE': 500,  # Newest posts kept per interest category
+    # Seconds before a category list is rebuilt from the database; defaults to 300 with the
+    # in-process store (each worker has its own copy) and to no expiry with STORE_URL
+    # 'CATEGORY_LIST_TTL': 300,
+    'EMPTY_CATEGORY_TTL': 60,  # Seconds an empty category is trusted before it is reloaded from the database
+    'CANDIDATES_PER_CATEGORY': 100,
+    'RECENCY_HALF_LIFE_HOURS': 24,
+    'RERANK_WINDOW': 10,  # Candidates considered by the diversity re-ranker, as a multiple of the page size
+    'MAX_POSTS_PER_AUTHOR': 2,  # Per feed page
+    'MAX_POSTS_PER_CATEGORY': 4,  # Per feed page
+    'INTERESTS_CACHE_TTL': 300,  # Seconds a user's interest categories are reused
+    'PAGE_CACHE_TTL': 24 * 60 * 60,  # Safety net only; pages are invalidated by events
+    'PAGE_REBUILD_LOCK_TTL': 30,
+    'PAGE_REBUILD_WAIT': 2.0,  # Seconds to wait for a concurrent first build before building
+    'INBOX_SIZE': 500,  # Newest fanned-out posts kept per user
+    'FANOUT_QUEUE': os.environ.get('FEED_FANOUT_QUEUE', 'local'),  # 'local' or 'store' (shared via STORE_URL)
+    'FANOUT_WORKERS': 4,
+    'FANOUT_BATCH_SIZE': 500,  # Followers delivered per job
+    'FANOUT_MAX_ATTEMPTS': 5,  # Tries per batch before it is dropped
+    'FANOUT_RETRY_BASE_DELAY': 5,  # Seconds; doubled on every retry
+    'FANOUT_RETRY_MAX_DELAY': 5 * 60,
+    'CELEBRITY_FOLLOWER_THRESHOLD': 10000,  # Above this, followers pull the author's posts at read time
+}
@@ -0,0 +1,130 @@
+"""
+Interest Catalog Snapshot
+
+The interest catalog is small and only changes through `populate_interests`
+or the admin, yet it is read on every signup screen. The active interests are
+loaded once per process into an immutable snapshot holding:
+
+- the serialized interests in catalog order (category, name)
+- the interest IDs per category
+- an n-gram index over the lowercased name and description: every substring of
+  up to three characters maps to the interests containing it
+
+A search query of up to three characters is a single index lookup; a longer
+query intersects the sets of its trigrams and confirms the survivors with a
+substring check, so results match the `icontains` lookup they replace.
+
+The snapshot's version is derived from the database: the latest
+`updated_at` and the row count of the interests table. Each worker checks
+it at most every `INTEREST_CATALOG_CHECK_SECONDS` (one aggregate query) and
+reloads the snapshot when it changed, so edits made through any process,
+including the admin on another host, show up without a shared cache.
+`Interest.save` and `Interest.delete` also expire the local snapshot so the
+writing process sees its own change immediately. Writes that bypass
+`updated_at` (`QuerySet.update`, raw SQL) are only picked up once another
+row changes.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+GRAM_SIZE = 3
+
+
+def expire_catalog_snapshot():
+    """Make this process check the catalog version on its next read"""
+    interest_catalog.expire()
+
+
+def current_version():
+    """(latest updated_at, row count) of the interests table"""
+    from .models import Interest
+
+    aggregate = Interest.objects.aggregate(updated=Max('updated_at'), count=Count('id'))
+    return aggregate['updated'], aggregate['count']
+
+
+def _grams(text, size):
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class CatalogSnapshot:
+    """Immutable view of the active interests with a search index"""
+
+    def __init__(self, interests, version):
+        from .serializers import InterestListSerializer
+
+        self.version = version
+        self.results = InterestListSerializer(interests, many=True).data
+        self.positions = {result['id']: position for position, result in enumerate(self.results)}
+        self.texts = {}
+        self.by_category = {}
+        self.index = {}
+
+        for interest in interests:
+            text = f'{interest.name}\n{interest.description}'.lower()
+            self.texts[interest.id] = text
+            self.by_category.setdefault(interest.category, set()).add(interest.id)
+            for size in range(1, GRAM_SIZE + 1):
+                for gram in _grams(text, size):
+                    self.index.setdefault(gram, set()).add(interest.id)
+
+    def _matching(self, query):
+        query = query.lower()
+        if len(query) <= GRAM_SIZE:
+            return self.index.get(query, set())
+
+        grams = sorted(_grams(query, GRAM_SIZE), key=lambda gram: len(self.index.get(gram, ())))
+        candidates = set(self.index.get(grams[0], ()))
+        for gram in grams[1:]:
+            candidates &= self.index.get(gram, set())
+            if not candidates:
+                return candidates
+        # Trigrams may match out of order; confirm the exact substring
+        return {interest_id for interest_id in candidates if query in self.texts[interest_id]}
+
+    def search(self, query='', category=''):
+        """Serialized interests matching `query` in name or description, in catalog order"""
+        ids = None
+        if query:
+            ids = self._matching(query)
+        if category:
+            in_category = self.by_category.get(category, set())
+            ids = in_category if ids is None else ids & in_category
+        if ids is None:
+            return list(self.results)
+        return [self.results[position] for position in sorted(self.positions[i] for i in ids)]
+
+
+class InterestCatalog:
+    """Process-wide interest snapshot, reloaded when the database version moves"""
+
+    def __init__(self):
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def expire(self):
+        self._checked_at = 0.0
+
+    def _due(self):
+        interval = getattr(settings, 'INTEREST_CATALOG_CHECK_SECONDS', 5)
+        return self._snapshot is None or time.monotonic() - self._checked_at > interval
+
+    def snapshot(self):
+        if self._due():
+            with self._lock:
+                if self._due():
+                    version = current_version()
+                    if self._snapshot is None or self._snapshot.version != version:
+                        from .models import Interest
+
+                        self._snapshot = CatalogSnapshot(list(Interest.objects.filter(is_active=True)), version)
+                    self._checked_at = time.monotonic()
+        return self._snapshot
+
+
+interest_catalog = InterestCatalog()
@@ -1,4 +1,5 @@
 from django.db import models
+from .catalog import expire_catalog_snapshot
 
 
 class Interest(models.Model):
@@ -42,3 +43,14 @@ class Interest(models.Model):
     
     def __str__(self):
         return f"{self.name} ({self.get_category_display()})"
+    
+    def save(self, *args, **kwargs):
+        """Save and invalidate the cached interest catalog"""
+        super().save(*args, **kwargs)
+        expire_catalog_snapshot()
+    
+    def delete(self, *args, **kwargs):
+        """Delete and invalidate the cached interest catalog"""
+        result = super().delete(*args, **kwargs)
+        expire_catalog_snapshot()
+        return result
@@ -1,11 +1,14 @@
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from django.db.models import Q
+from .catalog import interest_catalog
 from .models import Interest
 from .serializers import InterestSerializer, InterestListSerializer
 
 
+CATEGORIES = dict(Interest.INTEREST_CATEGORIES)
+
+
 class InterestViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for Interest model - Read-only operations"""
     
@@ -21,33 +24,21 @@ class InterestViewSet(viewsets.ReadOnlyModelViewSet):
     @action(detail=False, methods=['get'])
     def categories(self, request):
         """Get all available interest categories"""
-        categories = dict(Interest.INTEREST_CATEGORIES)
         return Response({
-            'categories': categories,
-            'count': len(categories)
+            'categories': CATEGORIES,
+            'count': len(CATEGORIES)
         })
     
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Search interests by name or category"""
+        """Search interests by name or category (served from the in-memory catalog)"""
         query = request.query_params.get('q', '')
         category = request.query_params.get('category', '')
         
-        queryset = self.queryset
-        
-        if query:
-            queryset = queryset.filter(
-                Q(name__icontains=query) | 
-                Q(description__icontains=query)
-            )
-        
-        if category:
-            queryset = queryset.filter(category=category)
-        
-        serializer = self.get_serializer(queryset, many=True)
+        results = interest_catalog.snapshot().search(query, category)
         return Response({
-            'results': serializer.data,
-            'count': queryset.count(),
+            'results': results,
+            'count': len(results),
             'query': query,
             'category': category
         })
@@ -75,6 +75,24 @@ DATABASES = {
     }
 }
 
+# Cache; set REDIS_URL to share it between workers. Profile summaries are only
+# cached in a shared cache, since a per-process cache cannot be invalidated everywhere.
+REDIS_URL = os.environ.get('REDIS_URL', '')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'profile-service',
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -138,11 +156,37 @@ SIMPLE_JWT = {
 
 # Login Service Configuration
 LOGIN_SERVICE_URL = os.environ.get('LOGIN_SERVICE_URL', 'http://localhost:8000')
+POSTS_SERVICE_URL = os.environ.get('POSTS_SERVICE_URL', 'http://localhost:8002')
+FOLLOW_EVENT_WORKERS = 2  # Threads sending follow events to the posts service
+FOLLOW_EVENT_MAX_PENDING = 1000  # Further events are dropped (and logged) while this many are queued
+
+# Local token validation
+TOKEN_REVOCATION_SYNC_SECONDS = 30  # Poll interval of the login service revocation feed
+INVALID_TOKEN_CACHE_TTL = 300  # Seconds a rejected token is remembered
+INVALID_TOKEN_CACHE_SIZE = 10000
+
+# Token sent as X-Service-Token on service-to-service calls
+SERVICE_TOKEN = os.environ.get('SERVICE_TOKEN', 'internal_service_token_456')
 
 # File Upload Configuration
 MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5MB
 ALLOWED_IMAGE_TYPES = ['image/jpeg', 'image/png', 'image/gif']
 
+# Avatar renditions, generated in the background after an upload
+AVATAR_RENDITION_SIZES = [48, 128, 512]
+AVATAR_RENDITION_QUALITY = 80
+AVATAR_RENDITION_WORKERS = 2
+IMMUTABLE_MEDIA_MAX_AGE = 365 * 24 * 60 * 60  # Content-addressed picture names never change content
+
 # Profile Configuration
 MAX_BIO_LENGTH = 200
 MAX_INTERESTS = 5
+INTEREST_CATALOG_CHECK_SECONDS = 5  # How often each worker compares its interest snapshot with the database
+
+# Profile summaries for other services
+PROFILE_SUMMARY_CACHE_TTL = 60 * 60  # Safety net; summaries are invalidated on Profile.save
+PROFILE_SUMMARY_MAX_IDS = 500
+
+# In-memory username availability index
+USERNAME_INDEX_REBUILD_SECONDS = 300  # Picks up usernames taken through other workers
+USERNAME_INDEX_ERROR_RATE = 0.01
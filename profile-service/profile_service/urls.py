@@ -2,9 +2,11 @@
 URL configuration for profile_service project.
 """
 from django.contrib import admin
-from django.urls import path, include
+import re
+
+from django.urls import path, include, re_path
 from django.conf import settings
-from django.conf.urls.static import static
+from django.views.static import serve
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -12,6 +14,24 @@ urlpatterns = [
     path('api/', include('interests.urls')),
 ]
 
+# Content-addressed pictures and their renditions never change under the same name
+IMMUTABLE_MEDIA = re.compile(r'^profile_pictures/[0-9a-f]{2}/[0-9a-f]{64}(_\d+)?\.\w+$')
+
+
+def serve_media(request, path, document_root=None):
+    """Serve media files, marking content-addressed pictures as cacheable forever"""
+    response = serve(request, path, document_root=document_root)
+    if IMMUTABLE_MEDIA.match(path):
+        response['Cache-Control'] = f'public, max-age={settings.IMMUTABLE_MEDIA_MAX_AGE}, immutable'
+    return response
+
+
 # Serve media files during development
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
+    urlpatterns += [
+        re_path(
+            r'^%s(?P<path>.*)$' % re.escape(settings.MEDIA_URL.lstrip('/')),
+            serve_media,
+            {'document_root': settings.MEDIA_ROOT}
+        ),
+    ]
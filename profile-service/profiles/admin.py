@@ -1,10 +1,10 @@
 from django.contrib import admin
-from .models import Profile, UserInterest, ProfilePicture
+from .models import Profile, UserInterest, ProfilePicture, Follow
 
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
-    list_display = ['username', 'user_id', 'is_complete', 'is_public', 'interests_count', 'created_at']
+    list_display = ['username', 'user_id', 'is_complete', 'is_public', 'interests_count', 'followers_count', 'created_at']
     list_filter = ['is_complete', 'is_public', 'created_at', 'updated_at']
     search_fields = ['username', 'user_id', 'bio']
     list_editable = ['is_public']
@@ -15,7 +15,7 @@ class ProfileAdmin(admin.ModelAdmin):
             'fields': ('user_id', 'username', 'bio')
         }),
         ('Media', {
-            'fields': ('profile_picture',)
+            'fields': ('profile_picture', 'profile_picture_renditions')
         }),
         ('Settings', {
             'fields': ('is_complete', 'is_public')
@@ -26,7 +26,7 @@ class ProfileAdmin(admin.ModelAdmin):
         }),
     )
     
-    readonly_fields = ['created_at', 'updated_at', 'interests_count']
+    readonly_fields = ['created_at', 'updated_at', 'interests_count', 'profile_picture_renditions']
     
     def interests_count(self, obj):
         return obj.interests_count
@@ -71,3 +71,12 @@ class ProfilePictureAdmin(admin.ModelAdmin):
     )
     
     readonly_fields = ['uploaded_at']
+
+
+@admin.register(Follow)
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ['follower', 'followee', 'created_at']
+    search_fields = ['follower__username', 'followee__username']
+    raw_id_fields = ['follower', 'followee']
+    ordering = ['-created_at']
+    readonly_fields = ['created_at']
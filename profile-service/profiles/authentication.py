@@ -1,15 +1,18 @@
-import requests
-from django.conf import settings
 from django.contrib.auth.models import AnonymousUser
 from rest_framework import authentication
 from rest_framework.exceptions import AuthenticationFailed
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 from rest_framework_simplejwt.tokens import AccessToken
 
+from .revocations import invalid_tokens, revocation_list
+
 
 class LoginServiceAuthentication(authentication.BaseAuthentication):
     """
-    Custom authentication class that validates JWT tokens with the login service
+    Custom authentication class that validates JWT tokens issued by the login service.
+    
+    Tokens are verified locally with the shared signing key; revocations are
+    synced from the login service in the background (see profiles.revocations).
     """
     
     def authenticate(self, request):
@@ -51,38 +54,30 @@ class LoginServiceAuthentication(authentication.BaseAuthentication):
         return parts[1]
     
     def get_validated_token(self, raw_token):
-        """Validate the raw token and return a validated token"""
+        """
+        Validate the raw token locally (signature, expiry and revocation)
+        without calling the login service
+        """
+        reason = invalid_tokens.get(raw_token)
+        if reason is not None:
+            raise AuthenticationFailed(reason)
+        
         try:
-            # First try to validate locally
-            return AccessToken(raw_token)
+            token = AccessToken(raw_token)
         except (InvalidToken, TokenError):
-            # If local validation fails, try to validate with login service
-            return self.validate_with_login_service(raw_token)
+            invalid_tokens.add(raw_token, 'Invalid token')
+            raise AuthenticationFailed('Invalid token')
+        
+        revocation_list.start()
+        if revocation_list.is_revoked(token.get('jti')):
+            invalid_tokens.add(raw_token, 'Token has been revoked')
+            raise AuthenticationFailed('Token has been revoked')
+        
+        return token
     
-    def validate_with_login_service(self, raw_token):
-        """Validate token with the login service"""
-        try:
-            # Call login service to validate token
-            response = requests.post(
-                f"{settings.LOGIN_SERVICE_URL}/api/validate-token/",
-                headers={'Authorization': f'Bearer {raw_token.decode()}'},
-                timeout=5
-            )
-            
-            if response.status_code == 200:
-                # Token is valid, create a local token object
-                token = AccessToken(raw_token)
-                return token
-            else:
-                raise AuthenticationFailed('Invalid token')
-                
-        except requests.RequestException:
-            # If login service is unavailable, fall back to local validation
-            # This allows for offline development
-            try:
-                return AccessToken(raw_token)
-            except (InvalidToken, TokenError):
-                raise AuthenticationFailed('Invalid token')
+    def authenticate_header(self, request):
+        """Return 401 rather than 403 for rejected tokens"""
+        return 'Bearer realm="api"'
     
     def get_user(self, validated_token):
         """Get the user from the validated token"""
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+from profiles.models import Profile
+from profiles.pictures import generate_renditions
+
+
+class Command(BaseCommand):
+    help = 'Generate missing avatar renditions for profile pictures'
+    
+    def handle(self, *args, **options):
+        """Render every stored profile picture that has no renditions yet"""
+        
+        picture_names = (
+            Profile.objects.exclude(profile_picture='')
+            .exclude(profile_picture__isnull=True)
+            .values_list('profile_picture', 'profile_picture_renditions')
+        )
+        pending = sorted({name for name, renditions in picture_names if renditions.get('source') != name})
+        
+        failed_count = 0
+        for name in pending:
+            try:
+                generate_renditions(name)
+            except Exception as e:
+                failed_count += 1
+                self.stdout.write(self.style.ERROR(f'Failed to render {name}: {e}'))
+        
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Successfully processed pictures. '
+                f'Rendered: {len(pending) - failed_count}, Failed: {failed_count}'
+            )
+        )
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='followers_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of followers, maintained on follow/unfollow'),
+        ),
+        migrations.AddField(
+            model_name='profile',
+            name='following_count',
+            field=models.PositiveIntegerField(default=0, help_text='Number of profiles followed, maintained on follow/unfollow'),
+        ),
+        migrations.CreateModel(
+            name='Follow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('followee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='follower_edges', to='profiles.profile')),
+                ('follower', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='following_edges', to='profiles.profile')),
+            ],
+            options={
+                'verbose_name': 'Follow',
+                'verbose_name_plural': 'Follows',
+                'indexes': [models.Index(fields=['followee', 'id'], name='profiles_fo_followe_cb5ac2_idx'), models.Index(fields=['follower', 'id'], name='profiles_fo_followe_39dd1b_idx')],
+                'unique_together': {('follower', 'followee')},
+            },
+        ),
+    ]
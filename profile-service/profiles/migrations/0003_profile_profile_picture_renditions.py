@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 10:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('profiles', '0002_profile_followers_count_profile_following_count_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='profile',
+            name='profile_picture_renditions',
+            field=models.JSONField(blank=True, default=dict, help_text='Stored names of the square avatar renditions, keyed by size'),
+        ),
+    ]
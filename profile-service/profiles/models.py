@@ -1,16 +1,24 @@
-import os
-from django.db import models
+import uuid
+from django.db import models, transaction
+from django.db.models import F
 from django.conf import settings
 from django.core.validators import MinLengthValidator, MaxLengthValidator
 from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
 from interests.models import Interest
+from .pictures import PICTURE_DIRECTORY, commit_picture, content_addressed_name, schedule_renditions
+from .summaries import invalidate_summary
+from .usernames import username_index, validate_username
 
 
 def profile_picture_path(instance, filename):
-    """Generate file path for profile pictures"""
-    ext = filename.split('.')[-1]
-    filename = f"profile_pic_{instance.user_id}.{ext}"
-    return os.path.join('profile_pictures', filename)
+    """Generate a content-addressed file path for profile pictures"""
+    for field_name in ('profile_picture', 'image'):
+        field_file = getattr(instance, field_name, None)
+        if field_file and not field_file._committed and field_file.name == filename:
+            return content_addressed_name(field_file)
+    ext = filename.split('.')[-1].lower()
+    return f"{PICTURE_DIRECTORY}/{uuid.uuid4().hex}.{ext}"
 
 
 class Profile(models.Model):
@@ -40,6 +48,11 @@ class Profile(models.Model):
         null=True,
         help_text="User profile picture"
     )
+    profile_picture_renditions = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Stored names of the square avatar renditions, keyed by size"
+    )
     is_complete = models.BooleanField(
         default=False,
         help_text="Whether the profile setup is complete"
@@ -48,6 +61,14 @@ class Profile(models.Model):
         default=True,
         help_text="Whether the profile is publicly visible"
     )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of followers, maintained on follow/unfollow"
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        help_text="Number of profiles followed, maintained on follow/unfollow"
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -62,19 +83,25 @@ class Profile(models.Model):
     def clean(self):
         """Custom validation"""
         if self.username:
-            # Check for valid username characters
-            if not self.username.replace('_', '').replace('-', '').isalnum():
-                raise ValidationError("Username can only contain letters, numbers, underscores, and hyphens")
-            
-            # Check for reserved usernames
-            reserved_names = ['admin', 'root', 'system', 'user', 'test', 'demo']
-            if self.username.lower() in reserved_names:
-                raise ValidationError("This username is reserved and cannot be used")
+            # Check for valid username characters and reserved usernames
+            validate_username(self.username)
     
     def save(self, *args, **kwargs):
         """Custom save method"""
         self.full_clean()
+        commit_picture(self.profile_picture)
         super().save(*args, **kwargs)
+        invalidate_summary(self.user_id)
+        username_index.add(self.username)
+        if self.profile_picture and self.profile_picture_renditions.get('source') != self.profile_picture.name:
+            schedule_renditions(self.profile_picture.name)
+    
+    def delete(self, *args, **kwargs):
+        """Drop the cached summary along with the profile"""
+        user_id = self.user_id
+        result = super().delete(*args, **kwargs)
+        invalidate_summary(user_id)
+        return result
     
     @property
     def profile_picture_url(self):
@@ -83,6 +110,15 @@ class Profile(models.Model):
             return self.profile_picture.url
         return None
     
+    @property
+    def avatar_urls(self):
+        """URLs of the generated avatar renditions, keyed by size"""
+        return {
+            size: default_storage.url(name)
+            for size, name in self.profile_picture_renditions.items()
+            if size != 'source' and self.profile_picture_renditions.get('source') == self.profile_picture.name
+        }
+    
     @property
     def interests_count(self):
         """Get count of user interests"""
@@ -160,4 +196,65 @@ class ProfilePicture(models.Model):
                 profile=self.profile, 
                 is_current=True
             ).update(is_current=False)
+        commit_picture(self.image)
         super().save(*args, **kwargs)
+
+
+class FollowManager(models.Manager):
+    """Manager that keeps profile follower/following counts in sync with the graph"""
+    
+    def follow(self, follower, followee):
+        """Create a follow edge; returns False if it already existed"""
+        if follower.pk == followee.pk:
+            raise ValidationError("Users cannot follow themselves")
+        
+        with transaction.atomic():
+            _, created = self.get_or_create(follower=follower, followee=followee)
+            if created:
+                Profile.objects.filter(pk=follower.pk).update(following_count=F('following_count') + 1)
+                Profile.objects.filter(pk=followee.pk).update(followers_count=F('followers_count') + 1)
+        return created
+    
+    def unfollow(self, follower, followee):
+        """Delete a follow edge; returns False if there was none"""
+        with transaction.atomic():
+            deleted, _ = self.filter(follower=follower, followee=followee).delete()
+            if deleted:
+                Profile.objects.filter(pk=follower.pk, following_count__gt=0).update(
+                    following_count=F('following_count') - 1
+                )
+                Profile.objects.filter(pk=followee.pk, followers_count__gt=0).update(
+                    followers_count=F('followers_count') - 1
+                )
+        return bool(deleted)
+
+
+class Follow(models.Model):
+    """Directed follow edge between two profiles (adjacency list storage)"""
+    
+    follower = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        related_name='following_edges'
+    )
+    followee = models.ForeignKey(
+        Profile,
+        on_delete=models.CASCADE,
+        related_name='follower_edges'
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    objects = FollowManager()
+    
+    class Meta:
+        unique_together = ['follower', 'followee']
+        indexes = [
+            # Keyset pagination over a profile's followers (fan-out) and followees
+            models.Index(fields=['followee', 'id']),
+            models.Index(fields=['follower', 'id']),
+        ]
+        verbose_name = 'Follow'
+        verbose_name_plural = 'Follows'
+    
+    def __str__(self):
+        return f"{self.follower_id} -> {self.followee_id}"
@@ -0,0 +1,125 @@
+"""
+Profile Picture Storage
+
+Uploaded pictures are stored once under a name derived from a hash of their
+content. `Profile.profile_picture` and the `ProfilePicture` history row both
+reference that stored name, so neither model write copies the file again, and
+re-uploading an identical image reuses the existing file.
+
+Because a name always refers to the same bytes, picture URLs are immutable and
+can be cached forever by browsers and CDNs. Fixed-size WebP avatar renditions
+(`AVATAR_RENDITION_SIZES`) are generated next to the original on a background
+thread pool and recorded in `Profile.profile_picture_renditions`.
+"""
+
+import hashlib
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+
+PICTURE_DIRECTORY = 'profile_pictures'
+
+
+def content_hash(upload):
+    """SHA-256 of an uploaded file, read in chunks"""
+    digest = hashlib.sha256()
+    for chunk in upload.chunks():
+        digest.update(chunk)
+    upload.seek(0)
+    return digest.hexdigest()
+
+
+def content_addressed_name(upload):
+    """Storage name for an upload: profile_pictures/<ab>/<sha256>.<ext>
+
+    Hashed names are served with `Cache-Control: immutable` (see profile_service.urls).
+    """
+    ext = os.path.splitext(upload.name)[1].lower() or '.jpg'
+    digest = content_hash(upload)
+    return os.path.join(PICTURE_DIRECTORY, digest[:2], f'{digest}{ext}')
+
+
+def store_picture(upload):
+    """Write an upload to storage once and return its stored name"""
+    name = content_addressed_name(upload)
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, upload)
+
+
+def commit_picture(field_file):
+    """Store a newly assigned model image via store_picture so identical uploads share one file"""
+    if field_file and not field_file._committed:
+        field_file.name = store_picture(field_file)
+        field_file._committed = True
+
+
+def rendition_name(name, size):
+    """Storage name of a square WebP rendition of a stored picture"""
+    base = os.path.splitext(name)[0]
+    return f'{base}_{size}.webp'
+
+
+def render_avatar(image, size):
+    """Center-cropped square WebP of `size` pixels"""
+    avatar = ImageOps.fit(image, (size, size), method=Image.LANCZOS)
+    output = io.BytesIO()
+    avatar.save(output, format='WEBP', quality=settings.AVATAR_RENDITION_QUALITY, method=4)
+    return output.getvalue()
+
+
+def generate_renditions(name):
+    """
+    Create every configured avatar size for a stored picture and record them
+    on the profiles that use it. Existing renditions are not regenerated,
+    since content-addressed names never change meaning.
+    """
+    from .models import Profile
+    from .summaries import invalidate_summary
+
+    renditions = {'source': name}
+    with default_storage.open(name) as source:
+        image = ImageOps.exif_transpose(Image.open(source))
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+        for size in settings.AVATAR_RENDITION_SIZES:
+            target = rendition_name(name, size)
+            if not default_storage.exists(target):
+                target = default_storage.save(target, ContentFile(render_avatar(image, size)))
+            renditions[str(size)] = target
+
+    profiles = Profile.objects.filter(profile_picture=name)
+    user_ids = list(profiles.values_list('user_id', flat=True))
+    profiles.update(profile_picture_renditions=renditions)
+    for user_id in user_ids:
+        invalidate_summary(user_id)
+    return renditions
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'AVATAR_RENDITION_WORKERS', 2),
+    thread_name_prefix='avatar-renditions'
+)
+
+
+def _generate_in_background(name):
+    try:
+        generate_renditions(name)
+    except Exception:
+        logger.exception("Avatar rendition generation failed for %s", name)
+    finally:
+        close_old_connections()
+
+
+def schedule_renditions(name):
+    """Generate renditions on the background pool once the current transaction commits"""
+    transaction.on_commit(lambda: _executor.submit(_generate_in_background, name))
@@ -0,0 +1,147 @@
+"""
+Local Token Deny-Lists
+
+Access tokens are validated locally (signature and expiry) by
+`LoginServiceAuthentication`; the login service is never called on the request
+path. Two in-process lists cover what local validation cannot know or should
+not repeat:
+
+- `RevocationList`: JTIs of tokens revoked in the login service (logout,
+  refresh rotation). A background thread polls the login service's revocation
+  feed every `TOKEN_REVOCATION_SYNC_SECONDS` and only asks for entries newer
+  than the last sync. Entries are dropped once the token would have expired
+  anyway.
+- `InvalidTokenCache`: digests of tokens that already failed validation, so a
+  client retrying a bad or expired token is rejected with one dict lookup.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+def _access_token_lifetime():
+    return settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME'].total_seconds()
+
+
+class InvalidTokenCache:
+    """Bounded LRU of digests of tokens known to be invalid"""
+
+    def __init__(self, max_size=None, ttl=None):
+        self.max_size = max_size or getattr(settings, 'INVALID_TOKEN_CACHE_SIZE', 10000)
+        self.ttl = ttl or getattr(settings, 'INVALID_TOKEN_CACHE_TTL', 300)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _digest(raw_token):
+        return hashlib.sha256(raw_token).digest()
+
+    def add(self, raw_token, reason):
+        with self._lock:
+            digest = self._digest(raw_token)
+            self._entries[digest] = (time.monotonic() + self.ttl, reason)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def get(self, raw_token):
+        """Return the cached rejection reason, or None if the token is not known to be bad"""
+        digest = self._digest(raw_token)
+        entry = self._entries.get(digest)
+        if entry is None:
+            return None
+        expires_at, reason = entry
+        if expires_at < time.monotonic():
+            with self._lock:
+                self._entries.pop(digest, None)
+            return None
+        return reason
+
+
+class RevocationList:
+    """JTIs revoked in the login service, kept in sync by a polling thread"""
+
+    feed_path = '/api/users/token-revocations/'
+
+    def __init__(self, sync_interval=None):
+        self.sync_interval = sync_interval or getattr(settings, 'TOKEN_REVOCATION_SYNC_SECONDS', 30)
+        self._revoked = {}
+        self._since = None
+        self._thread = None
+        self._lock = threading.Lock()
+        self.last_synced_at = None
+
+    def is_revoked(self, jti):
+        return jti in self._revoked
+
+    def add(self, jti, expires_at):
+        self._revoked[jti] = expires_at
+
+    def prune(self):
+        now = time.time()
+        for jti, expires_at in list(self._revoked.items()):
+            if expires_at < now:
+                self._revoked.pop(jti, None)
+
+    def sync(self):
+        """Fetch revocations newer than the previous sync from the login service"""
+        # Overlap the previous window so revocations committed late are not missed; the
+        # overlap only widens this request, the stored watermark stays where it was
+        params = {'since': self._since - 5} if self._since else {}
+        latest = None
+        while True:
+            response = requests.get(
+                f"{settings.LOGIN_SERVICE_URL}{self.feed_path}",
+                params=params,
+                headers={'X-Service-Token': settings.SERVICE_TOKEN},
+                timeout=5
+            )
+            response.raise_for_status()
+            data = response.json()
+
+            for entry in data.get('results', []):
+                # Revoked tokens stop mattering once they would have expired anyway
+                expires_at = entry.get('expires_at') or time.time() + _access_token_lifetime()
+                self.add(entry['jti'], expires_at)
+
+            if data.get('next_since') is not None:
+                latest = data['next_since']
+            # Page on the feed's (time, id) cursor so revocations sharing a timestamp are not skipped
+            params = {'cursor': data.get('next_cursor')}
+            if not data.get('has_more'):
+                break
+
+        # Entries in the overlap are older than the watermark; never move it back
+        if latest is not None and (self._since is None or latest > self._since):
+            self._since = latest
+        self.last_synced_at = time.time()
+        self.prune()
+
+    def _run(self):
+        while True:
+            try:
+                self.sync()
+            except Exception as e:
+                logger.warning(f"Token revocation sync failed: {str(e)}")
+            time.sleep(self.sync_interval)
+
+    def start(self):
+        """Start the polling thread if it is not running yet"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='token-revocation-sync', daemon=True)
+                self._thread.start()
+
+
+invalid_tokens = InvalidTokenCache()
+revocation_list = RevocationList()
@@ -1,9 +1,49 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.core.validators import MinLengthValidator, MaxLengthValidator
+from django.db import transaction
 from .models import Profile, UserInterest, ProfilePicture
+from .usernames import username_error
+from interests.models import Interest
 from interests.serializers import InterestSerializer
 
 
+def validate_interest_ids(value):
+    """De-duplicate interest IDs and check the limit and their existence with one query"""
+    interest_ids = list(dict.fromkeys(value))
+    
+    if len(interest_ids) > settings.MAX_INTERESTS:
+        raise serializers.ValidationError(f"Maximum {settings.MAX_INTERESTS} interests allowed")
+    
+    if interest_ids:
+        found = set(Interest.objects.filter(id__in=interest_ids, is_active=True).values_list('id', flat=True))
+        unknown = [interest_id for interest_id in interest_ids if interest_id not in found]
+        if unknown:
+            raise serializers.ValidationError(f"Unknown interest IDs: {unknown}")
+    
+    return interest_ids
+
+
+def set_profile_interests(profile, interest_ids, is_new=False):
+    """
+    Make the profile's interests exactly `interest_ids`.
+    
+    Only the difference to the current interests is written: one targeted
+    delete and one bulk insert. The limit was already checked by
+    validate_interest_ids, so UserInterest.save's per-row validation is skipped.
+    """
+    current = set() if is_new else set(profile.user_interests.values_list('interest_id', flat=True))
+    to_remove = current.difference(interest_ids)
+    to_add = [interest_id for interest_id in interest_ids if interest_id not in current]
+    
+    if to_remove:
+        profile.user_interests.filter(interest_id__in=to_remove).delete()
+    if to_add:
+        UserInterest.objects.bulk_create([
+            UserInterest(profile=profile, interest_id=interest_id) for interest_id in to_add
+        ])
+
+
 class ProfilePictureSerializer(serializers.ModelSerializer):
     """Serializer for profile picture uploads"""
     
@@ -29,6 +69,7 @@ class ProfileSerializer(serializers.ModelSerializer):
     """Main profile serializer"""
     
     profile_picture_url = serializers.CharField(read_only=True)
+    avatar_urls = serializers.DictField(child=serializers.CharField(), read_only=True)
     interests_count = serializers.IntegerField(read_only=True)
     user_interests = UserInterestSerializer(many=True, read_only=True)
     interests = serializers.ListField(
@@ -42,52 +83,42 @@ class ProfileSerializer(serializers.ModelSerializer):
         model = Profile
         fields = [
             'id', 'user_id', 'username', 'bio', 'profile_picture', 
-            'profile_picture_url', 'is_complete', 'is_public', 
+            'profile_picture_url', 'avatar_urls', 'is_complete', 'is_public', 
             'interests_count', 'user_interests', 'interests',
+            'followers_count', 'following_count',
+            'created_at', 'updated_at'
+        ]
+        read_only_fields = [
+            'id', 'user_id', 'is_complete', 'followers_count', 'following_count',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['id', 'user_id', 'is_complete', 'created_at', 'updated_at']
     
     def validate_username(self, value):
         """Validate username"""
         if value:
-            # Check for valid characters
-            if not value.replace('_', '').replace('-', '').isalnum():
-                raise serializers.ValidationError(
-                    "Username can only contain letters, numbers, underscores, and hyphens"
-                )
-            
-            # Check for reserved names
-            reserved_names = ['admin', 'root', 'system', 'user', 'test', 'demo']
-            if value.lower() in reserved_names:
-                raise serializers.ValidationError(
-                    "This username is reserved and cannot be used"
-                )
+            # Check for valid characters and reserved names
+            error = username_error(value)
+            if error:
+                raise serializers.ValidationError(error)
         
         return value
     
     def validate_interests(self, value):
         """Validate interests list"""
-        if value and len(value) > 5:
-            raise serializers.ValidationError(
-                "Maximum 5 interests allowed"
-            )
-        return value
+        return validate_interest_ids(value)
     
+    @transaction.atomic
     def create(self, validated_data):
         """Create profile with interests"""
         interests_data = validated_data.pop('interests', [])
         profile = Profile.objects.create(**validated_data)
         
         # Add interests
-        for interest_id in interests_data:
-            UserInterest.objects.create(
-                profile=profile,
-                interest_id=interest_id
-            )
+        set_profile_interests(profile, interests_data, is_new=True)
         
         return profile
     
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Update profile with interests"""
         interests_data = validated_data.pop('interests', None)
@@ -98,17 +129,9 @@ class ProfileSerializer(serializers.ModelSerializer):
         
         instance.save()
         
-        # Update interests if provided
+        # Replace interests if provided, writing only what changed
         if interests_data is not None:
-            # Clear existing interests
-            instance.user_interests.all().delete()
-            
-            # Add new interests
-            for interest_id in interests_data:
-                UserInterest.objects.create(
-                    profile=instance,
-                    interest_id=interest_id
-                )
+            set_profile_interests(instance, interests_data)
         
         return instance
 
@@ -131,11 +154,9 @@ class ProfileSetupSerializer(serializers.ModelSerializer):
         if not value:
             raise serializers.ValidationError("At least one interest is required")
         
-        if len(value) > 5:
-            raise serializers.ValidationError("Maximum 5 interests allowed")
-        
-        return value
+        return validate_interest_ids(value)
     
+    @transaction.atomic
     def create(self, validated_data):
         """Create profile with interests"""
         # Extract interests data before creating profile
@@ -144,12 +165,8 @@ class ProfileSetupSerializer(serializers.ModelSerializer):
         # Create the profile
         profile = Profile.objects.create(**validated_data)
         
-        # Add interests through UserInterest model
-        for interest_id in interests_data:
-            UserInterest.objects.create(
-                profile=profile,
-                interest_id=interest_id
-            )
+        # Add interests through UserInterest model in one bulk insert
+        set_profile_interests(profile, interests_data, is_new=True)
         
         return profile
 
@@ -172,6 +189,11 @@ class ProfileUpdateSerializer(serializers.ModelSerializer):
             'profile_picture': {'required': False}
         }
     
+    def validate_interests(self, value):
+        """Validate interests list"""
+        return validate_interest_ids(value)
+    
+    @transaction.atomic
     def update(self, instance, validated_data):
         """Update profile with interests"""
         # Extract interests data before updating profile
@@ -183,16 +205,8 @@ class ProfileUpdateSerializer(serializers.ModelSerializer):
         
         instance.save()
         
-        # Update interests if provided
+        # Replace interests if provided, writing only what changed
         if interests_data is not None:
-            # Clear existing interests
-            instance.user_interests.all().delete()
-            
-            # Add new interests
-            for interest_id in interests_data:
-                UserInterest.objects.create(
-                    profile=instance,
-                    interest_id=interest_id
-                )
+            set_profile_interests(instance, interests_data)
         
         return instance
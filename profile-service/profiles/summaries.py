@@ -0,0 +1,69 @@
+"""
+Compact Profile Summaries
+
+Other services only need a user's username and avatar to render posts, likes
+and comments. Summaries are served from the Django cache and rebuilt from the
+database only for cache misses, so hydrating every author on a page is one
+`get_many` plus at most one query. `Profile.save` and `Profile.delete` drop
+the cached summary of the affected user.
+
+Invalidation has to reach every worker, so summaries are only cached in a
+shared cache (`REDIS_URL`). With the per-process LocMemCache a rename in one
+worker could never evict the copies held by the others; summaries are then
+read straight from the database, still one query per batch.
+"""
+
+from django.conf import settings
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache, caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+def summary_cache_key(user_id):
+    return f'profile:summary:{user_id}'
+
+
+def build_summary(profile):
+    """Compact, cacheable representation of a profile"""
+    return {
+        'user_id': profile.user_id,
+        'username': profile.username,
+        'avatar_url': profile.profile_picture.url if profile.profile_picture else None,
+        'avatar_urls': profile.avatar_urls,
+    }
+
+
+def summaries_cached():
+    """True if the cache is shared between processes, so invalidation reaches every worker"""
+    return not isinstance(caches[DEFAULT_CACHE_ALIAS], (LocMemCache, DummyCache))
+
+
+def invalidate_summary(user_id):
+    if summaries_cached():
+        cache.delete(summary_cache_key(user_id))
+
+
+def get_summaries(user_ids):
+    """Return {user_id: summary} for the given user IDs; unknown IDs are left out"""
+    from .models import Profile
+
+    user_ids = [str(user_id) for user_id in dict.fromkeys(user_ids)]
+    use_cache = summaries_cached()
+    cached = cache.get_many([summary_cache_key(user_id) for user_id in user_ids]) if use_cache else {}
+    summaries = {user_id: cached[summary_cache_key(user_id)] for user_id in user_ids
+                 if summary_cache_key(user_id) in cached}
+
+    missing = [user_id for user_id in user_ids if user_id not in summaries]
+    if missing:
+        profiles = Profile.objects.filter(user_id__in=missing).only(
+            'user_id', 'username', 'profile_picture', 'profile_picture_renditions'
+        )
+        fresh = {profile.user_id: build_summary(profile) for profile in profiles}
+        if use_cache:
+            cache.set_many(
+                {summary_cache_key(user_id): summary for user_id, summary in fresh.items()},
+                timeout=getattr(settings, 'PROFILE_SUMMARY_CACHE_TTL', 60 * 60)
+            )
+        summaries.update(fresh)
+
+    return {user_id: summaries[user_id] for user_id in user_ids if user_id in summaries}
@@ -0,0 +1,316 @@
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, TestCase
+from rest_framework.exceptions import AuthenticationFailed, ValidationError as SerializerValidationError
+from rest_framework.test import APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+
+from interests.models import Interest
+from .authentication import LoginServiceAuthentication
+from .models import Follow, Profile
+from .revocations import InvalidTokenCache, RevocationList
+from .serializers import ProfileUpdateSerializer, set_profile_interests, validate_interest_ids
+from .usernames import BloomFilter, UsernameIndex
+from .views import FollowViewSet, ProfileViewSet
+
+
+def feed_response(results=(), next_since=None, next_cursor=None, has_more=False):
+    response = mock.Mock(status_code=200)
+    response.json.return_value = {
+        'results': list(results), 'next_since': next_since, 'next_cursor': next_cursor, 'has_more': has_more,
+    }
+    return response
+
+
+class RevocationListSyncTests(SimpleTestCase):
+    def setUp(self):
+        self.revocations = RevocationList(sync_interval=30)
+        patcher = mock.patch('profiles.revocations.requests.get')
+        self.get = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_empty_polls_keep_the_watermark(self):
+        self.revocations._since = 1000.0
+        self.get.return_value = feed_response()
+
+        for _ in range(3):
+            self.revocations.sync()
+
+        self.assertEqual(self.revocations._since, 1000.0)
+        # Every poll asks for the same overlapping window
+        self.assertEqual([call.kwargs['params'] for call in self.get.call_args_list], [{'since': 995.0}] * 3)
+
+    def test_follows_the_cursor_through_every_page(self):
+        self.get.side_effect = [
+            feed_response([{'jti': 'a', 'expires_at': 9e9}], next_since=1000.0, next_cursor='c1', has_more=True),
+            feed_response([{'jti': 'b', 'expires_at': 9e9}], next_since=1000.0, next_cursor='c2', has_more=True),
+            feed_response([{'jti': 'c', 'expires_at': 9e9}], next_since=1001.0, next_cursor='c3'),
+        ]
+
+        self.revocations.sync()
+
+        self.assertEqual(
+            [call.kwargs['params'] for call in self.get.call_args_list], [{}, {'cursor': 'c1'}, {'cursor': 'c2'}]
+        )
+        self.assertTrue(all(self.revocations.is_revoked(jti) for jti in 'abc'))
+        self.assertEqual(self.revocations._since, 1001.0)
+
+    def test_expired_entries_are_pruned(self):
+        self.revocations.add('old', time.time() - 1)
+        self.get.return_value = feed_response(
+            [{'jti': 'expired', 'expires_at': time.time() - 1}, {'jti': 'live', 'expires_at': time.time() + 60}],
+            next_since=1000.0, next_cursor='c1'
+        )
+
+        self.revocations.sync()
+
+        self.assertFalse(self.revocations.is_revoked('old'))
+        self.assertFalse(self.revocations.is_revoked('expired'))
+        self.assertTrue(self.revocations.is_revoked('live'))
+
+    def test_overlap_entries_do_not_move_the_watermark_back(self):
+        self.revocations._since = 1000.0
+        self.get.return_value = feed_response(
+            [{'jti': 'late', 'expires_at': 9e9}], next_since=998.0, next_cursor='998000000-1'
+        )
+
+        self.revocations.sync()
+
+        self.assertTrue(self.revocations.is_revoked('late'))
+        self.assertEqual(self.revocations._since, 1000.0)
+
+
+class LoginServiceAuthenticationTests(SimpleTestCase):
+    def setUp(self):
+        self.invalid_tokens = InvalidTokenCache(max_size=10, ttl=60)
+        self.revocations = RevocationList()
+        for target, value in (('invalid_tokens', self.invalid_tokens), ('revocation_list', self.revocations)):
+            patcher = mock.patch(f'profiles.authentication.{target}', value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # No polling thread: revocations are added directly
+        patcher = mock.patch.object(self.revocations, 'start')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.auth = LoginServiceAuthentication()
+
+    def raw_token(self, user_id='42'):
+        token = AccessToken()
+        token['user_id'] = user_id
+        return str(token).encode(), token['jti']
+
+    def test_valid_token_is_accepted_locally(self):
+        raw_token, _ = self.raw_token()
+
+        token = self.auth.get_validated_token(raw_token)
+
+        self.assertEqual(self.auth.get_user(token).id, '42')
+
+    def test_revoked_token_is_rejected(self):
+        raw_token, jti = self.raw_token()
+        self.revocations.add(jti, time.time() + 60)
+
+        with self.assertRaisesMessage(AuthenticationFailed, 'Token has been revoked'):
+            self.auth.get_validated_token(raw_token)
+        self.assertEqual(self.invalid_tokens.get(raw_token), 'Token has been revoked')
+
+    def test_repeated_bad_token_is_rejected_from_the_cache(self):
+        with self.assertRaisesMessage(AuthenticationFailed, 'Invalid token'):
+            self.auth.get_validated_token(b'not-a-token')
+
+        with mock.patch('profiles.authentication.AccessToken') as access_token, \
+                self.assertRaisesMessage(AuthenticationFailed, 'Invalid token'):
+            self.auth.get_validated_token(b'not-a-token')
+        access_token.assert_not_called()
+
+    def test_cached_rejections_expire(self):
+        self.invalid_tokens.add(b'not-a-token', 'Invalid token')
+
+        with mock.patch('profiles.revocations.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertIsNone(self.invalid_tokens.get(b'not-a-token'))
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        bloom = BloomFilter(capacity=2000, error_rate=0.01)
+        members = [f'member_{i}' for i in range(2000)]
+        for member in members:
+            bloom.add(member)
+
+        self.assertTrue(all(member in bloom for member in members))
+        false_positives = sum(f'stranger_{i}' in bloom for i in range(20000))
+        self.assertLess(false_positives / 20000, 0.02)
+
+
+class UsernameIndexTests(TestCase):
+    def setUp(self):
+        self.index = UsernameIndex()
+        for target in ('profiles.models.username_index', 'profiles.views.username_index'):
+            patcher = mock.patch(target, self.index)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def check(self, username):
+        request = APIRequestFactory().post('/api/profiles/check_username/', {'username': username}, format='json')
+        force_authenticate(request, user=SimpleNamespace(id='viewer', is_authenticated=True))
+        return ProfileViewSet.as_view({'post': 'check_username'})(request).data
+
+    def test_usernames_added_during_a_rebuild_survive_the_swap(self):
+        Profile.objects.create(user_id='1', username='existing')
+        scan_add = BloomFilter.add
+
+        def add(bloom, username):
+            scan_add(bloom, username)
+            if username == 'existing':
+                # Another request takes a username while the table is being scanned
+                self.index.add('newcomer')
+
+        # As schedule_rebuild does before its thread starts
+        self.index._rebuilding = True
+        with mock.patch.object(BloomFilter, 'add', add):
+            self.index.rebuild()
+
+        self.assertIn('existing', self.index._filter)
+        self.assertIn('newcomer', self.index._filter)
+        self.assertEqual(self.index._added_during_rebuild, [])
+
+    def test_taken_username_is_confirmed_in_the_database(self):
+        Profile.objects.create(user_id='1', username='existing')
+        self.index.rebuild()
+
+        with self.assertNumQueries(1):
+            self.assertFalse(self.check('existing')['available'])
+
+    def test_index_miss_answers_without_a_query(self):
+        self.index.rebuild()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.check('newcomer')['available'])
+
+    def test_every_check_queries_until_the_first_build(self):
+        with mock.patch.object(UsernameIndex, 'schedule_rebuild'), self.assertNumQueries(1):
+            self.assertTrue(self.check('newcomer')['available'])
+
+
+class FollowTests(TestCase):
+    def setUp(self):
+        self.alice = Profile.objects.create(user_id='1', username='alice')
+        self.bob = Profile.objects.create(user_id='2', username='bob')
+
+    def counts(self, profile):
+        profile.refresh_from_db()
+        return profile.followers_count, profile.following_count
+
+    def test_follow_and_unfollow_keep_counters_in_sync(self):
+        self.assertTrue(Follow.objects.follow(self.alice, self.bob))
+        self.assertEqual((self.counts(self.alice), self.counts(self.bob)), ((0, 1), (1, 0)))
+
+        self.assertTrue(Follow.objects.unfollow(self.alice, self.bob))
+        self.assertEqual((self.counts(self.alice), self.counts(self.bob)), ((0, 0), (0, 0)))
+
+    def test_duplicate_follow_and_missing_unfollow_change_nothing(self):
+        Follow.objects.follow(self.alice, self.bob)
+
+        self.assertFalse(Follow.objects.follow(self.alice, self.bob))
+        self.assertEqual(self.counts(self.bob), (1, 0))
+
+        Follow.objects.unfollow(self.alice, self.bob)
+        self.assertFalse(Follow.objects.unfollow(self.alice, self.bob))
+        self.assertEqual((self.counts(self.alice), self.counts(self.bob)), ((0, 0), (0, 0)))
+
+    def test_counters_never_go_negative(self):
+        Follow.objects.follow(self.alice, self.bob)
+        # Counters out of sync with the edges, e.g. after a manual fix-up
+        Profile.objects.update(followers_count=0, following_count=0)
+
+        self.assertTrue(Follow.objects.unfollow(self.alice, self.bob))
+        self.assertEqual((self.counts(self.alice), self.counts(self.bob)), ((0, 0), (0, 0)))
+
+    def test_self_follow_is_rejected(self):
+        with self.assertRaises(ValidationError):
+            Follow.objects.follow(self.alice, self.alice)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_cursor_pages_return_every_follower_once(self):
+        followers = [Profile.objects.create(user_id=str(i), username=f'follower{i}') for i in range(10, 15)]
+        for follower in followers:
+            Follow.objects.follow(follower, self.bob)
+        view = FollowViewSet.as_view({'get': 'followers'})
+
+        seen, cursor, pages = [], 0, 0
+        while cursor is not None:
+            request = APIRequestFactory().get('/api/follows/followers/', {'user_id': '2', 'cursor': cursor, 'limit': 2})
+            data = view(request).data
+            self.assertEqual(data['count'], 5)
+            seen += data['results']
+            cursor = data['next_cursor']
+            pages += 1
+
+        self.assertEqual(seen, [follower.user_id for follower in followers])
+        self.assertEqual(pages, 3)
+
+
+class ProfileInterestsTests(TestCase):
+    def setUp(self):
+        self.profile = Profile.objects.create(user_id='1', username='alice')
+        self.interests = [
+            Interest.objects.create(name=f'Interest {i}', category='music').id for i in range(6)
+        ]
+        self.inactive = Interest.objects.create(name='Retired', category='music', is_active=False).id
+
+    def current(self):
+        return sorted(self.profile.user_interests.values_list('interest_id', flat=True))
+
+    def test_adding_only_inserts_the_new_interests(self):
+        set_profile_interests(self.profile, self.interests[:2])
+
+        # One read of the current interests, one bulk insert
+        with self.assertNumQueries(2):
+            set_profile_interests(self.profile, self.interests[:3])
+        self.assertEqual(self.current(), self.interests[:3])
+
+    def test_removing_only_deletes_the_dropped_interests(self):
+        set_profile_interests(self.profile, self.interests[:3])
+
+        with self.assertNumQueries(2):
+            set_profile_interests(self.profile, self.interests[:1])
+        self.assertEqual(self.current(), self.interests[:1])
+
+    def test_unchanged_interests_are_not_written(self):
+        set_profile_interests(self.profile, self.interests[:3])
+
+        with self.assertNumQueries(1):
+            set_profile_interests(self.profile, list(reversed(self.interests[:3])))
+        self.assertEqual(self.current(), self.interests[:3])
+
+    def test_replacing_interests_takes_the_same_queries_for_any_number_of_changes(self):
+        set_profile_interests(self.profile, self.interests[:1])
+
+        # Read, one delete, one bulk insert: whether one or four interests change
+        with self.assertNumQueries(3):
+            set_profile_interests(self.profile, self.interests[1:2])
+        with self.assertNumQueries(3):
+            set_profile_interests(self.profile, self.interests[2:6])
+        self.assertEqual(self.current(), self.interests[2:6])
+
+    def test_update_serializer_validates_with_one_query(self):
+        serializer = ProfileUpdateSerializer(self.profile, data={'interests': self.interests[:5]}, partial=True)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        serializer.save()
+        self.assertEqual(self.current(), self.interests[:5])
+
+    def test_more_than_the_limit_is_rejected_without_queries(self):
+        with self.assertNumQueries(0), self.assertRaisesMessage(SerializerValidationError, 'Maximum 5'):
+            validate_interest_ids(self.interests)
+
+    def test_duplicates_count_once_against_the_limit(self):
+        self.assertEqual(validate_interest_ids(self.interests[:5] + self.interests[:1]), self.interests[:5])
+
+    def test_unknown_and_inactive_interests_are_rejected(self):
+        with self.assertRaisesMessage(SerializerValidationError, str([self.inactive, 9999])):
+            validate_interest_ids([self.interests[0], self.inactive, 9999])
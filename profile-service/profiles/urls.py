@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ProfileViewSet, ProfilePictureViewSet, health_check
+from .views import ProfileViewSet, ProfilePictureViewSet, FollowViewSet, health_check
 
 router = DefaultRouter()
 router.register(r'profiles', ProfileViewSet, basename='profile')
 router.register(r'profile-pictures', ProfilePictureViewSet, basename='profile-picture')
+router.register(r'follows', FollowViewSet, basename='follow')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -0,0 +1,155 @@
+"""
+Username Rules and Availability Index
+
+`check_username` is called on every keystroke during signup. The username
+rules are checked against precompiled constants, and taken usernames are kept
+in an in-memory Bloom filter so most "is this free?" questions are answered
+without touching the database:
+
+- the filter says "not present"  -> report the username as free
+- the filter says "maybe present" -> confirm with one indexed `exists()` query
+
+"Taken" answers are always confirmed; "free" answers are advisory, since the
+filter has no false negatives only for usernames it has seen.
+
+The filter is built from all usernames on a background thread, extended by
+`Profile.save` and rebuilt in the background every
+`USERNAME_INDEX_REBUILD_SECONDS` so usernames taken through other worker
+processes are picked up. Requests never wait for the table scan: until the
+first build finishes every username is confirmed in the database, and
+afterwards the previous filter serves reads until the new one is swapped in.
+A username taken through another process since the last rebuild can
+therefore read as free; the unique constraint on `Profile.username` remains
+the source of truth when a profile is saved.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+
+RESERVED_USERNAMES = frozenset(['admin', 'root', 'system', 'user', 'test', 'demo'])
+
+INVALID_CHARACTERS_MESSAGE = "Username can only contain letters, numbers, underscores, and hyphens"
+RESERVED_MESSAGE = "This username is reserved and cannot be used"
+
+
+def username_error(username):
+    """Return the rule violated by a username, or None if it is well formed"""
+    if not username.replace('_', '').replace('-', '').isalnum():
+        return INVALID_CHARACTERS_MESSAGE
+    if username.lower() in RESERVED_USERNAMES:
+        return RESERVED_MESSAGE
+    return None
+
+
+def validate_username(username):
+    """Raise ValidationError if a username breaks the character or reserved-name rules"""
+    error = username_error(username)
+    if error:
+        raise ValidationError(error)
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(capacity, 1)
+        self.size = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size / capacity * math.log(2))), 1)
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # Double hashing: two 64-bit halves of one digest give every probe position
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hash_count)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+class UsernameIndex:
+    """Bloom filter of taken usernames with periodic background rebuilds from the database"""
+
+    def __init__(self):
+        self._filter = None
+        self._built_at = 0.0
+        self._rebuilding = False
+        # Usernames taken while a rebuild scans the table, replayed into the new filter
+        self._added_during_rebuild = []
+        self._lock = threading.Lock()
+
+    def _stale(self):
+        interval = getattr(settings, 'USERNAME_INDEX_REBUILD_SECONDS', 300)
+        return self._filter is None or time.monotonic() - self._built_at > interval
+
+    def rebuild(self):
+        """Load every taken username into a new filter and swap it in; the lock is only held for the swap"""
+        from .models import Profile
+
+        usernames = Profile.objects.values_list('username', flat=True)
+        # Leave room for growth so the false positive rate holds between rebuilds
+        bloom = BloomFilter(
+            capacity=max(usernames.count() * 2, 10000),
+            error_rate=getattr(settings, 'USERNAME_INDEX_ERROR_RATE', 0.01)
+        )
+        for username in usernames.iterator(chunk_size=5000):
+            bloom.add(username)
+
+        with self._lock:
+            for username in self._added_during_rebuild:
+                bloom.add(username)
+            self._added_during_rebuild = []
+            self._filter = bloom
+            self._built_at = time.monotonic()
+
+    def _rebuild_in_background(self):
+        try:
+            self.rebuild()
+        except Exception:
+            logger.exception("Username index rebuild failed")
+        finally:
+            with self._lock:
+                self._rebuilding = False
+            close_old_connections()
+
+    def schedule_rebuild(self):
+        """Start a background rebuild unless one is already running"""
+        with self._lock:
+            if self._rebuilding:
+                return
+            self._rebuilding = True
+            self._added_during_rebuild = []
+        threading.Thread(target=self._rebuild_in_background, name='username-index', daemon=True).start()
+
+    def add(self, username):
+        """Record a newly taken username (profile created or renamed)"""
+        with self._lock:
+            if self._filter is not None:
+                self._filter.add(username)
+            if self._rebuilding:
+                self._added_during_rebuild.append(username)
+
+    def might_be_taken(self, username):
+        """False means definitely free; True means check the database"""
+        if self._stale():
+            self.schedule_rebuild()
+        bloom = self._filter
+        return bloom is None or username in bloom
+
+
+username_index = UsernameIndex()
@@ -1,17 +1,28 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import requests
 from django.conf import settings
 from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Exists, OuterRef
 from django.http import JsonResponse
 from rest_framework import viewsets, status, permissions
 from rest_framework.decorators import action, api_view
 from rest_framework.response import Response
 from rest_framework.parsers import MultiPartParser, FormParser, JSONParser
 from django.utils import timezone
-from .models import Profile, UserInterest, ProfilePicture
+from .models import Profile, UserInterest, ProfilePicture, Follow
 from .serializers import (
     ProfileSerializer, ProfileSetupSerializer, ProfileUpdateSerializer,
     ProfilePictureSerializer
 )
+from .pictures import schedule_renditions, store_picture
+from .summaries import get_summaries, invalidate_summary
+from .usernames import username_error, username_index
+
+logger = logging.getLogger(__name__)
 
 
 @api_view(['GET'])
@@ -144,31 +155,48 @@ class ProfileViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
             
-            # Get or create profile
-            profile, created = Profile.objects.get_or_create(
-                user_id=request.user.id,
-                defaults={'username': f'user_{request.user.id}'}
-            )
-            
-            # Update profile picture
-            profile.profile_picture = image_file
-            profile.save()
+            # Store the file once; both records below reference the stored name
+            picture_name = store_picture(image_file)
             
-            # Create profile picture record
-            ProfilePicture.objects.create(
-                profile=profile,
-                image=image_file,
-                is_current=True
-            )
+            with transaction.atomic():
+                # Get or create profile, learning whether it has interests in the same query
+                try:
+                    profile = Profile.objects.annotate(
+                        has_interests=Exists(UserInterest.objects.filter(profile=OuterRef('pk')))
+                    ).get(user_id=request.user.id)
+                except Profile.DoesNotExist:
+                    profile = Profile.objects.create(
+                        user_id=request.user.id,
+                        username=f'user_{request.user.id}'
+                    )
+                    profile.has_interests = False
+                
+                # Update profile picture and completion status in one write
+                profile.profile_picture.name = picture_name
+                profile.profile_picture_renditions = {}
+                profile.is_complete = profile.is_complete or bool(profile.username and profile.has_interests)
+                Profile.objects.filter(pk=profile.pk).update(
+                    profile_picture=picture_name,
+                    profile_picture_renditions={},
+                    is_complete=profile.is_complete,
+                    updated_at=timezone.now()
+                )
+                
+                # Create profile picture record, replacing the current one
+                ProfilePicture.objects.filter(profile=profile, is_current=True).update(is_current=False)
+                ProfilePicture.objects.bulk_create([
+                    ProfilePicture(profile=profile, image=picture_name, is_current=True)
+                ])
+                
+                # Avatar sizes are resized off the request path and recorded when ready
+                schedule_renditions(picture_name)
             
-            # Check completion status
-            if profile.is_setup_complete() and not profile.is_complete:
-                profile.is_complete = True
-                profile.save()
+            invalidate_summary(profile.user_id)
             
             return Response({
                 'detail': 'Profile picture uploaded successfully',
-                'profile_picture_url': profile.profile_picture_url
+                'profile_picture_url': profile.profile_picture_url,
+                'avatar_urls': profile.avatar_urls
             })
         
         except Exception as e:
@@ -198,9 +226,59 @@ class ProfileViewSet(viewsets.ModelViewSet):
                 'missing_fields': ['username', 'profile_picture', 'interests']
             })
     
+    @action(
+        detail=False, methods=['get', 'post'],
+        authentication_classes=[], permission_classes=[permissions.AllowAny]
+    )
+    def summaries(self, request):
+        """
+        Get compact summaries (user_id, username, avatar_url) for many users.
+        
+        GET ?user_ids=1,2,3 or POST {"user_ids": [...]} for larger batches.
+        """
+        if request.method == 'POST':
+            user_ids = request.data.get('user_ids', [])
+        else:
+            user_ids = [user_id for user_id in request.query_params.get('user_ids', '').split(',') if user_id]
+        
+        if not isinstance(user_ids, list) or not user_ids:
+            return Response(
+                {'detail': 'user_ids is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        max_ids = settings.PROFILE_SUMMARY_MAX_IDS
+        if len(user_ids) > max_ids:
+            return Response(
+                {'detail': f'At most {max_ids} user_ids per request'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        summaries = get_summaries(user_ids)
+        results = []
+        for summary in summaries.values():
+            if summary['avatar_url']:
+                summary = dict(
+                    summary,
+                    avatar_url=request.build_absolute_uri(summary['avatar_url']),
+                    avatar_urls={size: request.build_absolute_uri(url) for size, url in summary.get('avatar_urls', {}).items()}
+                )
+            results.append(summary)
+        
+        return Response({
+            'results': results,
+            'missing': [str(user_id) for user_id in user_ids if str(user_id) not in summaries]
+        })
+    
     @action(detail=False, methods=['post'])
     def check_username(self, request):
-        """Check if username is available"""
+        """
+        Check if username is available.
+
+        "Taken" is confirmed in the database; "available" is advisory, as the
+        username index may not have seen a name taken through another worker
+        yet. Saving the profile enforces uniqueness either way.
+        """
         username = request.data.get('username', '').strip()
         
         if not username:
@@ -209,25 +287,25 @@ class ProfileViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        # Check if username exists
-        if Profile.objects.filter(username=username).exists():
+        # Check if username is valid (precompiled rules, no model instance)
+        error = username_error(username)
+        if error:
             return Response({
                 'available': False,
-                'detail': 'Username already taken'
+                'detail': error
             })
         
-        # Check if username is valid
-        try:
-            Profile(username=username).clean()
-            return Response({
-                'available': True,
-                'detail': 'Username is available'
-            })
-        except ValidationError as e:
+        # Only probable hits in the username index need a database check
+        if username_index.might_be_taken(username) and Profile.objects.filter(username=username).exists():
             return Response({
                 'available': False,
-                'detail': str(e)
+                'detail': 'Username already taken'
             })
+        
+        return Response({
+            'available': True,
+            'detail': 'Username is available'
+        })
 
 
 class ProfilePictureViewSet(viewsets.ModelViewSet):
@@ -247,3 +325,157 @@ class ProfilePictureViewSet(viewsets.ModelViewSet):
         pictures = self.get_queryset().order_by('-uploaded_at')
         serializer = self.get_serializer(pictures, many=True)
         return Response(serializer.data)
+
+
+# Follow events go out on a small pool; the pending cap keeps a slow posts service
+# from piling up queued requests in memory
+_follow_event_executor = ThreadPoolExecutor(
+    max_workers=getattr(settings, 'FOLLOW_EVENT_WORKERS', 2),
+    thread_name_prefix='follow-events'
+)
+_follow_event_slots = threading.BoundedSemaphore(getattr(settings, 'FOLLOW_EVENT_MAX_PENDING', 1000))
+
+
+def _send_follow_event(event, follower_user_id):
+    try:
+        requests.post(
+            f"{settings.POSTS_SERVICE_URL}/api/feed/follow_event/",
+            json={'event': event, 'follower_id': follower_user_id},
+            headers={'X-Service-Token': settings.SERVICE_TOKEN},
+            timeout=2
+        )
+    except requests.RequestException as e:
+        logger.warning(f"Could not send {event} event to posts service: {e}")
+    finally:
+        _follow_event_slots.release()
+
+
+def notify_follow_event(event, follower_user_id):
+    """Tell the posts service a user's follow graph changed (invalidates their cached feed)"""
+    if not _follow_event_slots.acquire(blocking=False):
+        # The feed cache TTL bounds how long the follower sees a stale feed
+        logger.warning(f"Dropping {event} event for {follower_user_id}: too many follow events pending")
+        return
+    _follow_event_executor.submit(_send_follow_event, event, follower_user_id)
+
+
+class FollowViewSet(viewsets.ViewSet):
+    """ViewSet for the follow graph"""
+    
+    permission_classes = [permissions.IsAuthenticated]
+    
+    def get_permissions(self):
+        """Follower and following lists are public, changing the graph requires auth"""
+        if self.action in ['followers', 'following']:
+            return [permissions.AllowAny()]
+        return [permission() for permission in self.permission_classes]
+    
+    def _get_profiles(self, request, target_user_id):
+        """Return (caller profile, target profile) or an error Response"""
+        try:
+            follower = Profile.objects.get(user_id=request.user.id)
+        except Profile.DoesNotExist:
+            return None, Response(
+                {'detail': 'Profile not found. Please complete profile setup.'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        try:
+            followee = Profile.objects.get(user_id=target_user_id)
+        except Profile.DoesNotExist:
+            return None, Response(
+                {'detail': 'User to follow not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return (follower, followee), None
+    
+    def create(self, request):
+        """Follow a user"""
+        user_id = str(request.data.get('user_id', '')).strip()
+        if not user_id:
+            return Response(
+                {'detail': 'user_id is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        profiles, error = self._get_profiles(request, user_id)
+        if error:
+            return error
+        follower, followee = profiles
+        
+        try:
+            created = Follow.objects.follow(follower, followee)
+        except ValidationError as e:
+            return Response({'detail': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if created:
+            notify_follow_event('follow', follower.user_id)
+        
+        return Response({
+            'detail': 'Followed successfully' if created else 'Already following',
+            'user_id': followee.user_id
+        }, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
+    
+    def destroy(self, request, pk=None):
+        """Unfollow a user"""
+        profiles, error = self._get_profiles(request, pk)
+        if error:
+            return error
+        follower, followee = profiles
+        
+        if not Follow.objects.unfollow(follower, followee):
+            return Response(
+                {'detail': 'Not following this user'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        notify_follow_event('unfollow', follower.user_id)
+        return Response(status=status.HTTP_204_NO_CONTENT)
+    
+    def _edge_page(self, request, lookup_field, user_id_field, count_field):
+        """Keyset-paginated page of follower or followee user_ids"""
+        user_id = request.query_params.get('user_id') or getattr(request.user, 'id', None)
+        if not user_id:
+            return Response(
+                {'detail': 'user_id parameter is required'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            cursor = int(request.query_params.get('cursor', 0))
+            limit = min(max(int(request.query_params.get('limit', 100)), 1), 1000)
+        except ValueError:
+            return Response(
+                {'detail': 'cursor and limit must be integers'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            profile = Profile.objects.only('id', 'user_id', count_field).get(user_id=user_id)
+        except Profile.DoesNotExist:
+            return Response(
+                {'detail': 'Profile not found'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        
+        edges = list(
+            Follow.objects.filter(**{lookup_field: profile}, id__gt=cursor)
+            .order_by('id')
+            .values_list('id', user_id_field)[:limit]
+        )
+        
+        return Response({
+            'user_id': profile.user_id,
+            'count': getattr(profile, count_field),
+            'results': [edge_user_id for _, edge_user_id in edges],
+            'next_cursor': edges[-1][0] if len(edges) == limit else None
+        })
+    
+    @action(detail=False, methods=['get'])
+    def followers(self, request):
+        """Get a page of a user's followers (?user_id=&cursor=&limit=)"""
+        return self._edge_page(request, 'followee', 'follower__user_id', 'followers_count')
+    
+    @action(detail=False, methods=['get'])
+    def following(self, request):
+        """Get a page of the users a user follows (?user_id=&cursor=&limit=)"""
+        return self._edge_page(request, 'follower', 'followee__user_id', 'following_count')